@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
-import subprocess
+import argparse
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, NamedTuple, Optional
 
 # --- Determine Project Root (assuming script is run from project root) ---
 PROJECT_ROOT = Path.cwd()
@@ -13,7 +17,13 @@ HARDWARE_TEST_BASE_DIR = PROJECT_ROOT / "hardware/test"
 # AIDEV-NOTE: Updated for reorganized asm src structure with hardware_validation/ subdirectories
 SOFTWARE_ASM_SRC_DIR = PROJECT_ROOT / "software/asm/src"
 HARDWARE_VALIDATION_DIR = SOFTWARE_ASM_SRC_DIR / "hardware_validation"
-TEST_MANAGER_SCRIPT_PATH = PROJECT_ROOT / "scripts/devtools/test_manager.py"
+GENERATED_FIXTURES_BASE_DIR = PROJECT_ROOT / "hardware/test/_fixtures_generated"
+ASSEMBLER_SRC_DIR = PROJECT_ROOT / "software/assembler/src"
+ASSEMBLER_PARSE_CACHE_DIR = PROJECT_ROOT / "software/assembler/.parse_cache"
+
+# Fixtures are built with the same default regions as test_manager.py assemble
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "devtools"))
+from test_manager import DEFAULT_REGIONS, DEFAULT_REGION_ARGS
 
 # Define test categories and their subdirectories
 TEST_CATEGORIES = {
@@ -22,120 +32,179 @@ TEST_CATEGORIES = {
     "modules": HARDWARE_TEST_BASE_DIR / "modules",
 }
 
-def run_command(command_list, cwd=None):
-    """Helper function to run a shell command and print its output."""
-    str_command_list = [str(c) for c in command_list]
-    print(f"\nExecuting: {' '.join(str_command_list)}")
-    if cwd:
-        print(f"(In directory: {cwd})")
-    try:
-        process = subprocess.run(
-            str_command_list,
-            check=True,
-            capture_output=True,
-            text=True,
-            cwd=cwd or PROJECT_ROOT
-        )
-        if process.stdout:
-            print("STDOUT:\n" + process.stdout.strip())
-        if process.stderr:
-            print("STDERR:\n" + process.stderr.strip())
-        return True # Command was successful
-    except subprocess.CalledProcessError as e:
-        print(f"--- ERROR executing command ---")
-        print(f"Command failed with return code {e.returncode}")
-        if e.stdout:
-            print("STDOUT:\n" + e.stdout.strip())
-        if e.stderr:
-            print("STDERR:\n" + e.stderr.strip())
-        return False # Command failed
-    except FileNotFoundError:
-        print(f"Error: Could not find command: {str_command_list[0]}")
-        return False # Command failed
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return False # Command failed
-
-def generate_fixtures_for_category(category_name: str, test_dir: Path):
+# Source file cache of this process, kept across the jobs it runs (see init_worker)
+_source_manager = None
+
+
+def init_worker():
+    """
+    Makes the assembler importable and gives the process one source manager, so
+    includes shared by several tests are loaded once per worker.
+    """
+    global _source_manager
+    if str(ASSEMBLER_SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(ASSEMBLER_SRC_DIR))
+    from parse_cache import ParseCache
+    from source_manager import SourceManager
+    _source_manager = SourceManager(ParseCache(str(ASSEMBLER_PARSE_CACHE_DIR)))
+
+
+class FixtureResult(NamedTuple):
+    test_name: str
+    asm_file_path: Path
+    success: bool
+    error: Optional[str]
+    diagnostic_lines: List[str]
+    elapsed_s: float
+    dependencies: List[str]  # Source, include and INCBIN files read
+    outputs: List[str]       # Files written
+
+
+def assemble_fixture(test_name: str, asm_file_path: Path) -> FixtureResult:
+    """
+    Assembles one test's .asm into hardware/test/_fixtures_generated/<test_name>/,
+    in this process. Failures are returned, never raised.
+    """
+    import assembler
+
+    start = time.perf_counter()
+    error = None
+    dependencies, outputs = [], []
+    with assembler.collect_diagnostics() as diagnostics:
+        try:
+            asm = assembler.Assembler(str(asm_file_path), str(GENERATED_FIXTURES_BASE_DIR / test_name), DEFAULT_REGIONS,
+                                      str(ASSEMBLER_PARSE_CACHE_DIR), source_manager=_source_manager)
+            asm.assemble()
+            outputs = asm.write_output_files()
+            dependencies = asm.dependencies
+        except Exception as e:
+            error = str(e)
+    diagnostic_lines = [f"{d.level}: {d.message}" for d in diagnostics if d.level != "ERROR"]
+    return FixtureResult(test_name, asm_file_path, error is None, error, diagnostic_lines,
+                         time.perf_counter() - start, dependencies, outputs)
+
+
+def find_asm_file(test_name: str) -> Path:
+    # AIDEV-NOTE: Look for assembly file in hardware_validation subdirectories
+    for subdir in ["instruction_set", "integration", "peripherals"]:
+        candidate_path = HARDWARE_VALIDATION_DIR / subdir / f"{test_name}.asm"
+        if candidate_path.exists():
+            return candidate_path
+    return SOFTWARE_ASM_SRC_DIR / f"{test_name}.asm"  # fallback for backward compatibility
+
+
+def generate_fixtures_for_category(category_name: str, test_dir: Path, pool, manifest, force: bool):
     """
-    Finds _tb.sv files in the given directory and attempts to assemble
-    corresponding .asm files using test_manager.py.
-    Returns True if all assemblies in this category succeed, False otherwise.
+    Finds _tb.sv files in the given directory and assembles the corresponding
+    .asm files, on the worker pool if one is given. Fixtures the manifest shows
+    to be up to date are skipped unless force is set; the manifest is updated
+    with every assembly.
+    Returns the list of (test_name, error message) for every assembly that failed.
     """
     print(f"\n--- Generating .hex files for {category_name.replace('_', ' ').title()} tests ---")
 
     if not test_dir.is_dir():
         print(f"WARNING: Test directory not found: {test_dir.relative_to(PROJECT_ROOT)}")
         print(f"         Skipping category: {category_name}")
-        return True
+        return []
 
     print(f"Searching for testbenches in: {test_dir.relative_to(PROJECT_ROOT)}")
-    tb_files_found = list(test_dir.glob("*_tb.sv"))
+    tb_files_found = sorted(test_dir.glob("*_tb.sv"))
 
     if not tb_files_found:
         print(f"No '*_tb.sv' files found in {test_dir.relative_to(PROJECT_ROOT)}.")
-        return True
+        return []
 
+    failures = []
+    jobs = []
     for tb_file in tb_files_found:
         test_name = tb_file.stem.removesuffix("_tb")
-        # AIDEV-NOTE: Look for assembly file in hardware_validation subdirectories
-        asm_file_path = None
-        for subdir in ["instruction_set", "integration", "peripherals"]:
-            candidate_path = HARDWARE_VALIDATION_DIR / subdir / f"{test_name}.asm"
-            if candidate_path.exists():
-                asm_file_path = candidate_path
-                break
-        
-        if asm_file_path is None:
-            asm_file_path = SOFTWARE_ASM_SRC_DIR / f"{test_name}.asm"  # fallback for backward compatibility
-
-        print(f"\nProcessing Testbench: {tb_file.name} (Derived Test Name: {test_name})")
+        asm_file_path = find_asm_file(test_name)
 
         if not asm_file_path.is_file():
             if category_name == "modules":
                 print(f"INFO: No ASM file at '{asm_file_path.relative_to(PROJECT_ROOT)}'. Skipping assembly for module test: {test_name}.")
-                continue
             else:
-                # For non-module tests, if test_manager.py is robust, it will print an error
-                # and run_command will return False.
-                print(f"WARNING: ASM source file not found: {asm_file_path.relative_to(PROJECT_ROOT)}")
-                print(f"         Assembly will likely fail for test: {test_name}")
-
-        print(f"Attempting to assemble for: {test_name}")
-        assemble_command = [
-            sys.executable,
-            str(TEST_MANAGER_SCRIPT_PATH),
-            "assemble",
-            "--test-name",
-            test_name,
-        ]
-
-        if not run_command(assemble_command):
-            # If run_command returns False, it means test_manager.py failed
-            print(f"--- FAILED to generate/assemble fixtures for test: {test_name} ---")
-            print(f"Stopping script due to error in category '{category_name}'.")
-            return False # Stop processing this category and signal failure
-
-    return True # All assemblies in this category succeeded
+                print(f"ERROR: ASM source file not found for {tb_file.name}: {asm_file_path.relative_to(PROJECT_ROOT)}")
+                failures.append((test_name, f"ASM source file not found: {asm_file_path.relative_to(PROJECT_ROOT)}"))
+            continue
+        if not force and manifest.is_current(test_name, str(asm_file_path), DEFAULT_REGION_ARGS):
+            print(f"UP-TO-DATE {test_name}")
+            continue
+        jobs.append((test_name, asm_file_path))
+
+    if pool is None:
+        results = (assemble_fixture(test_name, asm_file_path) for test_name, asm_file_path in jobs)
+    else:
+        results = pool.map(assemble_fixture, *zip(*jobs)) if jobs else []
+
+    for result in results:
+        print(f"{'OK    ' if result.success else 'FAILED'} {result.test_name} ({result.elapsed_s * 1000:.1f} ms)")
+        for line in result.diagnostic_lines:
+            print(f"       {line}")
+        if result.success:
+            manifest.record(result.test_name, str(result.asm_file_path), DEFAULT_REGION_ARGS,
+                            result.dependencies, result.outputs)
+        else:
+            print(f"       {result.error}")
+            failures.append((result.test_name, result.error))
+            manifest.forget(result.test_name)
+
+    return failures
 
 
 def main():
+    argp = argparse.ArgumentParser(description="Generate the .hex fixtures of every testbench")
+    argp.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                      help="Number of worker processes assembling in parallel (default: CPU count)")
+    argp.add_argument("--force", action="store_true",
+                      help="Reassemble every fixture, even those the manifest shows to be up to date")
+    args = argp.parse_args()
+
     print("Starting Verilog fixture generation process...\n")
 
-    if not TEST_MANAGER_SCRIPT_PATH.is_file():
-        print(f"CRITICAL ERROR: The 'test_manager.py' script was not found at {TEST_MANAGER_SCRIPT_PATH.relative_to(PROJECT_ROOT)}")
-        print("Please ensure the path is correct and the script exists.")
+    if not ASSEMBLER_SRC_DIR.is_dir():
+        print(f"CRITICAL ERROR: The assembler was not found at {ASSEMBLER_SRC_DIR.relative_to(PROJECT_ROOT)}")
+        print("Please run this script from the project root.")
         sys.exit(1)
 
-    for category, directory in TEST_CATEGORIES.items():
-        if not generate_fixtures_for_category(category, directory):
-            # If any category fails (which now happens on first assembly error within it)
-            print(f"\n\n--- Verilog fixture generation FAILED during '{category}' processing. ---")
-            print("Please review the output above for the specific error details.")
-            sys.exit(1) # Exit the entire script
+    init_worker()  # The parent reads and writes the manifest
+    from fixture_manifest import FixtureManifest, MANIFEST_FILENAME
+    manifest = FixtureManifest(str(GENERATED_FIXTURES_BASE_DIR / MANIFEST_FILENAME), str(PROJECT_ROOT))
+
+    jobs = max(1, args.jobs)
+    print(f"Assembling in-process with {jobs} worker(s).")
+    all_failures = {}
+    timings = {}
+    total_start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) if jobs > 1 else None
+    try:
+        for category, directory in TEST_CATEGORIES.items():
+            category_start = time.perf_counter()
+            failures = generate_fixtures_for_category(category, directory, pool, manifest, args.force)
+            timings[category] = time.perf_counter() - category_start
+            if failures:
+                all_failures[category] = failures
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        manifest.save()
+
+    print("\n\n--- Fixture generation timings (wall clock) ---")
+    for category, elapsed_s in timings.items():
+        print(f"  {category:<16} {elapsed_s:8.2f} s")
+    print(f"  {'total':<16} {time.perf_counter() - total_start:8.2f} s")
+
+    if all_failures:
+        failure_count = sum(len(failures) for failures in all_failures.values())
+        print(f"\n--- Verilog fixture generation FAILED for {failure_count} test(s). ---")
+        for category, failures in all_failures.items():
+            for test_name, error in failures:
+                print(f"  - [{category}] {test_name}: {error}")
+        sys.exit(1)
 
     print("\n\n--- Verilog fixture generation completed successfully for all categories. ---")
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
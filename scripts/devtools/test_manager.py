@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
 import argparse
+import io
 import os
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from typing import Optional, TextIO
 
 # Placeholder for <<test_name>> in templates
 TEST_NAME_PLACEHOLDER = "<<test_name>>"
@@ -27,11 +31,29 @@ SV_TEST_BASE_DIR = PROJECT_ROOT / "hardware/test"
 GENERATED_FIXTURES_BASE_DIR = PROJECT_ROOT / "hardware/test/_fixtures_generated"
 
 ASSEMBLER_SCRIPT_PATH = PROJECT_ROOT / "software/assembler/src/assembler.py"
+# Persistent parse cache shared by all assembler runs (shared includes are scanned once)
+ASSEMBLER_PARSE_CACHE_DIR = PROJECT_ROOT / "software/assembler/.parse_cache"
+# Socket of a running assembler server (software/assembler/src/assembler_server.py), used when present
+ASSEMBLER_SERVER_SOCKET = Path(os.environ.get("ASSEMBLER_SERVER_SOCKET") or PROJECT_ROOT / "software/assembler/.assembler_server.sock")
+
+# Default regions passed to assembler.py when no --asm-args are given (also used by ci/build_all_fixtures.py)
+DEFAULT_REGIONS = [
+    ("ROM", "F000", "FFFF"),  # Example ROM region
+    ("RAM", "0000", "1FFF"),  # Example RAM region (covers $1234)
+                              # Ensure this range is appropriate for your RAM
+]
+# The same regions as assembler arguments, as recorded in the fixture manifest
+DEFAULT_REGION_ARGS = [arg for region in DEFAULT_REGIONS for arg in ("--region", *region)]
+# Records what each fixture was assembled from, so assemble-all-sources can skip unchanged ones
+FIXTURE_MANIFEST_PATH = GENERATED_FIXTURES_BASE_DIR / "manifest.json"
 
 # Define valid categories for tests
 VALID_VERILOG_CATEGORIES = ["instruction_set", "cpu_control", "modules"]
 VALID_ASM_CATEGORIES = ["instruction_set", "integration", "peripherals"]
 
+# Default number of parallel assemblies for assemble-all-sources
+DEFAULT_JOBS = os.cpu_count() or 1
+
 
 def create_file_from_template(template_path: Path, output_path: Path, test_name_value: str, dry_run: bool, force: bool) -> str:
     """
@@ -80,34 +102,86 @@ def create_file_from_template(template_path: Path, output_path: Path, test_name_
         return "error"
 
 
-def run_assembler(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: str, dry_run: bool) -> bool:
+def import_assembler_module(module_name: str):
+    """Imports a module of the assembler (software/assembler/src) into this process."""
+    if str(ASSEMBLER_SCRIPT_PATH.parent) not in sys.path:
+        sys.path.insert(0, str(ASSEMBLER_SCRIPT_PATH.parent))
+    return __import__(module_name)
+
+
+def forget_fixture(test_name: str):
+    """Drops a fixture from the manifest, so the next batch run reassembles it with its usual arguments."""
+    fixture_manifest = import_assembler_module("fixture_manifest")
+    manifest = fixture_manifest.FixtureManifest(str(FIXTURE_MANIFEST_PATH), str(PROJECT_ROOT))
+    if test_name in manifest.entries:
+        manifest.forget(test_name)
+        manifest.save()
+
+
+def run_assembler_on_server(assembler_args: list, asm_file_path: Path, out: Optional[TextIO] = None):
+    """
+    Runs an assembly job on the assembler server, if one is listening on ASSEMBLER_SERVER_SOCKET.
+    Returns True on success, False on error, or None if no server is running (the caller
+    then runs assembler.py itself). Progress is printed to out (default: stdout).
+    """
+    if not ASSEMBLER_SERVER_SOCKET.exists():
+        return None
+    assembler_server = import_assembler_module("assembler_server")
+
+    try:
+        response = assembler_server.assemble_via_server(assembler_args, cwd=str(PROJECT_ROOT),
+                                                        socket_path=str(ASSEMBLER_SERVER_SOCKET))
+    except (OSError, ValueError) as e:
+        print(f"INFO: Assembler server not reachable at {ASSEMBLER_SERVER_SOCKET} ({e}). Running assembler.py instead.", file=out)
+        return None
+
+    print(f"(Assembled by the assembler server in {response.get('elapsed_ms', 0):.1f} ms)", file=out)
+    for diagnostic in response.get("diagnostics", []):
+        print(f"{diagnostic['level']}: {diagnostic['message']}", file=out)
+    for output in response.get("outputs", []):
+        print(f"Wrote: {Path(output).relative_to(PROJECT_ROOT) if PROJECT_ROOT in Path(output).parents else output}", file=out)
+    if response.get("ok"):
+        print(f"\n--- Assembly for '{asm_file_path.stem}' successful. ---", file=out)
+        return True
+    print("\n--- Error during assembly! ---", file=out)
+    print(response.get("error"), file=out)
+    return False
+
+
+def run_assembler(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: str, dry_run: bool,
+                  out: Optional[TextIO] = None, log_file: bool = True, dependency_file: Optional[Path] = None) -> bool:
     """
     Runs the assembler for a given .asm file.
     The fixture_output_dir is passed as the 'output_specifier' to assembler.py,
     which assembler.py uses as the base directory for its region-named .hex files.
+    Progress and the assembler's output are printed to out (default: stdout).
+    With log_file False, assembler.py does not write assembler.log (for batch runs,
+    where concurrent assemblies would overwrite each other's log). With a
+    dependency_file, assembler.py writes one there (-MF), recording the files the
+    assembly wrote and read.
     Returns True on success, False on error.
     """
-    print(f"\n--- Assembling: {asm_file_path.name} (Output to: {fixture_output_dir.relative_to(PROJECT_ROOT)}) ---")
+    print(f"\n--- Assembling: {asm_file_path.name} (Output to: {fixture_output_dir.relative_to(PROJECT_ROOT)}) ---", file=out)
 
     if not asm_file_path.is_file() and not dry_run:
-        print(f"Error: ASM source file not found: {asm_file_path.relative_to(PROJECT_ROOT)}")
+        print(f"Error: ASM source file not found: {asm_file_path.relative_to(PROJECT_ROOT)}", file=out)
         return False
     elif not asm_file_path.is_file() and dry_run:
-         print(f"[DRY RUN] ASM source file {asm_file_path.relative_to(PROJECT_ROOT)} would be used.")
+         print(f"[DRY RUN] ASM source file {asm_file_path.relative_to(PROJECT_ROOT)} would be used.", file=out)
 
     if not ASSEMBLER_SCRIPT_PATH.is_file():
-        print(f"Error: Assembler script not found: {ASSEMBLER_SCRIPT_PATH.relative_to(PROJECT_ROOT)}")
+        print(f"Error: Assembler script not found: {ASSEMBLER_SCRIPT_PATH.relative_to(PROJECT_ROOT)}", file=out)
         if not dry_run: return False
 
     if not dry_run:
         try:
             fixture_output_dir.mkdir(parents=True, exist_ok=True)
         except OSError as e:
-            print(f"Error: Could not create/ensure fixture directory {fixture_output_dir} for assembler output: {e}")
+            print(f"Error: Could not create/ensure fixture directory {fixture_output_dir} for assembler output: {e}", file=out)
             return False
     else:
         if not fixture_output_dir.exists():
-            print(f"[DRY RUN] Fixture output directory {fixture_output_dir.relative_to(PROJECT_ROOT)} would be created if it doesn't exist.")
+            print(f"[DRY RUN] Fixture output directory {fixture_output_dir.relative_to(PROJECT_ROOT)} would be created if it doesn't exist.", file=out)
 
     # Base command: python assembler.py <input_asm> <output_dir_for_regions>
     asm_command_base = [
@@ -115,27 +189,26 @@ def run_assembler(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: s
         str(ASSEMBLER_SCRIPT_PATH),
         str(asm_file_path),
         str(fixture_output_dir), # This is the 'output_specifier' for assembler.py
+        "--cache-dir", str(ASSEMBLER_PARSE_CACHE_DIR),
     ]
+    if not log_file:
+        asm_command_base.append("--no-log-file")
+    if dependency_file is not None:
+        asm_command_base.extend(["-MF", str(dependency_file)])
 
     # Determine the region arguments to pass to assembler.py
     final_region_args = []
     if asm_args_str: # If --asm-args are explicitly provided to this script
-        print(f"INFO: Using custom assembler arguments passed via --asm-args: \"{asm_args_str}\"")
+        print(f"INFO: Using custom assembler arguments passed via --asm-args: \"{asm_args_str}\"", file=out)
         final_region_args = asm_args_str.split()
     else:
         # Default to defining both ROM and RAM regions for assembler.py
-        print("INFO: No explicit --asm-args provided. Using default ROM and RAM regions for assembler.py.")
-        # Adjust these addresses and names as per your CPU architecture and assembler.py expectations
-        default_regions = [
-            "--region", "ROM", "F000", "FFFF",  # Example ROM region
-            "--region", "RAM", "0000", "1FFF"   # Example RAM region (covers $1234)
-                                                # Ensure this range is appropriate for your RAM
-        ]
-        final_region_args.extend(default_regions)
+        print("INFO: No explicit --asm-args provided. Using default ROM and RAM regions for assembler.py.", file=out)
+        final_region_args.extend(DEFAULT_REGION_ARGS)
 
     asm_command_final = asm_command_base + final_region_args
 
-    print(f"\nExecuting assembler command:")
+    print(f"\nExecuting assembler command:", file=out)
     # Create a display-friendly version of the command
     display_command_parts = [Path(sys.executable).name]
     for part in asm_command_final[1:]: # Skip the python executable itself for display
@@ -149,13 +222,17 @@ def run_assembler(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: s
         except OSError: # Handle cases where part is not a valid path component (e.g. "--region")
             display_command_parts.append(str(part))
 
-    print(f"  $ {' '.join(display_command_parts)}")
-    print(f"(Running from: {PROJECT_ROOT})")
+    print(f"  $ {' '.join(display_command_parts)}", file=out)
+    print(f"(Running from: {PROJECT_ROOT})", file=out)
 
     if dry_run:
-        print("[DRY RUN] Assembler command would be executed.")
+        print("[DRY RUN] Assembler command would be executed.", file=out)
         return True
 
+    server_result = run_assembler_on_server([str(p) for p in asm_command_final[2:]], asm_file_path, out)
+    if server_result is not None:
+        return server_result
+
     try:
         # Ensure all command parts are strings for subprocess.run
         str_asm_command_final = [str(p) for p in asm_command_final]
@@ -166,24 +243,37 @@ def run_assembler(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: s
             text=True,
             cwd=PROJECT_ROOT
         )
-        if process.stdout: print("\nAssembler STDOUT:\n" + process.stdout.strip())
-        if process.stderr: print("\nAssembler STDERR:\n" + process.stderr.strip()) # assembler.py logs here
-        print(f"\n--- Assembly for '{asm_file_path.stem}' successful. ---")
+        if process.stdout: print("\nAssembler STDOUT:\n" + process.stdout.strip(), file=out)
+        if process.stderr: print("\nAssembler STDERR:\n" + process.stderr.strip(), file=out) # assembler.py logs here
+        print(f"\n--- Assembly for '{asm_file_path.stem}' successful. ---", file=out)
         return True
     except subprocess.CalledProcessError as e:
-        print("\n--- Error during assembly! ---")
-        print(f"Command failed with return code {e.returncode}")
-        if e.stdout: print("\nAssembler STDOUT:\n" + e.stdout.strip())
-        if e.stderr: print("\nAssembler STDERR:\n" + e.stderr.strip())
+        print("\n--- Error during assembly! ---", file=out)
+        print(f"Command failed with return code {e.returncode}", file=out)
+        if e.stdout: print("\nAssembler STDOUT:\n" + e.stdout.strip(), file=out)
+        if e.stderr: print("\nAssembler STDERR:\n" + e.stderr.strip(), file=out)
         return False
     except FileNotFoundError:
-        print(f"Error: Could not find Python interpreter or assembler script: {ASSEMBLER_SCRIPT_PATH}")
+        print(f"Error: Could not find Python interpreter or assembler script: {ASSEMBLER_SCRIPT_PATH}", file=out)
         return False
     except Exception as e:
-        print(f"An unexpected error occurred during assembly: {e}")
+        print(f"An unexpected error occurred during assembly: {e}", file=out)
         return False
 
 
+def run_assembler_captured(asm_file_path: Path, fixture_output_dir: Path, asm_args_str: str, dry_run: bool,
+                           dependency_file: Path):
+    """
+    Runs run_assembler with its output captured, for pool threads; assembler.py does
+    not write assembler.log. Returns (success, captured output), so the caller can
+    print each file's log in one piece.
+    """
+    output = io.StringIO()
+    success = run_assembler(asm_file_path, fixture_output_dir, asm_args_str, dry_run, out=output, log_file=False,
+                            dependency_file=dependency_file)
+    return success, output.getvalue()
+
+
 def clean_test_artifacts(test_name: str, asm_file: Path, sv_file: Path, fixture_dir: Path, dry_run: bool):
     """
     Removes artifacts for a given test_name. sv_file now includes the sub-directory.
@@ -271,6 +361,8 @@ def cmd_init(args):
         proceed_to_asm = False
 
     if proceed_to_asm:
+        if not args.dry_run:
+            forget_fixture(test_name)
         if not run_assembler(new_asm_file_path, test_fixture_output_dir, getattr(args, 'asm_args', ''), args.dry_run):
             if not args.dry_run:
                 print(f"\n--- Assembly FAILED after initialization for '{test_name}'. ---")
@@ -301,6 +393,8 @@ def cmd_assemble(args):
         return
     test_fixture_output_dir = GENERATED_FIXTURES_BASE_DIR / test_name
 
+    if not args.dry_run:
+        forget_fixture(test_name)
     if not run_assembler(new_asm_file_path, test_fixture_output_dir, args.asm_args, args.dry_run):
         if not args.dry_run:
             sys.exit(1)
@@ -327,19 +421,57 @@ def cmd_assemble_all_sources(args):
         print(f"No .asm files found in {ASM_SRC_DIR.relative_to(PROJECT_ROOT)}.")
         return
 
-    print(f"Found {len(asm_files_found)} .asm files to process.")
+    fixture_manifest = import_assembler_module("fixture_manifest")
+    manifest = fixture_manifest.FixtureManifest(str(FIXTURE_MANIFEST_PATH), str(PROJECT_ROOT))
+    region_args = args.asm_args.split() if args.asm_args else DEFAULT_REGION_ARGS
+    if not args.force:
+        up_to_date = [asm_file_path for asm_file_path in asm_files_found
+                      if manifest.is_current(asm_file_path.stem, str(asm_file_path), region_args)]
+        if up_to_date:
+            print(f"Skipping {len(up_to_date)} up-to-date file(s) (use --force to reassemble them).")
+            asm_files_found = [asm_file_path for asm_file_path in asm_files_found if asm_file_path not in up_to_date]
+
+    jobs = max(1, min(args.jobs, len(asm_files_found)))
+    print(f"Found {len(asm_files_found)} .asm files to process ({jobs} parallel job(s)).")
     success_count = 0
     failure_count = 0
     failed_files_list = []
 
-    for asm_file_path in asm_files_found:
-        test_name_from_file = asm_file_path.stem
-        fixture_dir = GENERATED_FIXTURES_BASE_DIR / test_name_from_file
-        if run_assembler(asm_file_path, fixture_dir, args.asm_args, args.dry_run):
+    fixture_dirs = [GENERATED_FIXTURES_BASE_DIR / asm_file_path.stem for asm_file_path in asm_files_found]
+    # Each run's dependency file tells the manifest what it wrote and read
+    dependency_files = [fixture_dir / f"{fixture_dir.name}.d" for fixture_dir in fixture_dirs]
+    if jobs == 1:
+        results = (run_assembler(asm_file_path, fixture_dir, args.asm_args, args.dry_run, log_file=False,
+                                 dependency_file=dependency_file)
+                   for asm_file_path, fixture_dir, dependency_file in zip(asm_files_found, fixture_dirs, dependency_files))
+    else:
+        # Each job's output is captured and printed whole, in file order, so logs never interleave.
+        # The assembling is done by assembler.py subprocesses (or the server), so threads suffice
+        def collated_results():
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                for success, output in pool.map(run_assembler_captured, asm_files_found, fixture_dirs,
+                                                repeat(args.asm_args), repeat(args.dry_run), dependency_files):
+                    print(output, end="")
+                    yield success
+        results = collated_results()
+
+    assembler = import_assembler_module("assembler")
+    for asm_file_path, dependency_file, success in zip(asm_files_found, dependency_files, results):
+        if success:
             success_count += 1
+            if not args.dry_run:
+                try:
+                    outputs, dependencies = assembler.read_dependency_file(str(dependency_file))
+                    manifest.record(asm_file_path.stem, str(asm_file_path), region_args, dependencies, outputs)
+                except (OSError, ValueError) as e:
+                    print(f"WARNING: Not recording {asm_file_path.name} in the fixture manifest: {e}")
+                    manifest.forget(asm_file_path.stem)
         else:
             failure_count += 1
             failed_files_list.append(str(asm_file_path.relative_to(PROJECT_ROOT)))
+            manifest.forget(asm_file_path.stem)
+    if not args.dry_run:
+        manifest.save()
 
     print("\n--- Batch Assembly Summary ---")
     print(f"Successfully assembled: {success_count} file(s)")
@@ -414,6 +546,10 @@ def main():
                                               help='Assemble all .asm files in software/asm/src/')
     assemble_all_parser.add_argument('--asm-args', type=str, default='',
                                    help='Raw arguments to pass to assembler.py for all files')
+    assemble_all_parser.add_argument('--force', action='store_true',
+                                   help='Reassemble every file, even those unchanged since their fixtures were generated')
+    assemble_all_parser.add_argument('--jobs', '-j', type=int, default=DEFAULT_JOBS,
+                                   help=f'Number of files to assemble in parallel (default: CPU count, {DEFAULT_JOBS})')
     assemble_all_parser.add_argument('--dry-run', action='store_true', help='Show what would be done without execution')
 
     # Clean subcommand
@@ -0,0 +1 @@
+# software/assembler/benchmarks/__init__.py
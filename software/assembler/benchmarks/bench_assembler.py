@@ -0,0 +1,152 @@
+# software/assembler/benchmarks/bench_assembler.py
+"""
+Macro-benchmark: the assembler on synthetic programs that fill the 4K ROM.
+
+Run from software/assembler:
+    python -m benchmarks.bench_assembler [--repeat N] [--program NAME ...]
+                                         [--baseline FILE] [--save-baseline]
+
+Each program from benchmarks.programs is written to a temporary directory and
+three stages are timed separately, best of --repeat runs:
+
+  parse      Parser(main file): macro collection, includes, symbol table
+  assemble   Assembler.assemble(), which runs the parser and the second pass
+             (so assemble - parse is the code generation cost)
+  write      Assembler.write_output_files()
+
+Results are compared with the JSON baseline (default: baselines/assembler.json
+next to this file) and stages slower than --tolerance (and by more than
+--min-delta-ms, so sub-millisecond noise is ignored) are flagged; the exit
+status is 1 if any were. --save-baseline records the current results instead.
+The persistent parse cache is not used, so every run parses from scratch.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.programs import PROGRAMS, REGIONS, StressProgram
+from src.assembler import Assembler
+from src.parser import Parser
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "assembler.json")
+STAGES = ("parse", "assemble", "write")
+
+
+def best_time(run: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_program(program: StressProgram, repeat: int) -> Dict[str, float]:
+    """Best-of-repeat seconds per stage, plus the program's size."""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{program.name}_") as work_dir:
+        main_file = program.write(os.path.join(work_dir, "src"))
+        output_dir = os.path.join(work_dir, "out")
+
+        parse_s = best_time(lambda: Parser(main_file), repeat)
+
+        assemblers: List[Assembler] = []
+        def assemble() -> None:
+            assembler = Assembler(main_file, output_dir, REGIONS)
+            assembler.assemble()
+            assemblers.append(assembler)
+        assemble_s = best_time(assemble, repeat)
+
+        write_s = best_time(assemblers[-1].write_output_files, repeat)
+        bytes_emitted = sum(region.byte_count for region in assemblers[-1].regions)
+
+    return {
+        "lines": program.line_count,
+        "tokens": len(assemblers[-1].parsed_tokens),
+        "bytes": bytes_emitted,
+        "parse": parse_s,
+        "assemble": assemble_s,
+        "write": write_s,
+    }
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]], repeat: int) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "programs": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Optional[dict], tolerance: float,
+           min_delta_s: float) -> List[str]:
+    """Print the results (against the baseline, if any); returns the regressed 'program.stage' names."""
+    regressions: List[str] = []
+    baseline_programs = baseline["programs"] if baseline else {}
+    print(f"{'program':<15} {'lines':>6} {'bytes':>6}  " + "  ".join(f"{stage:>20}" for stage in STAGES))
+    for name, result in results.items():
+        cells = []
+        for stage in STAGES:
+            cell = f"{result[stage] * 1000:8.2f} ms"
+            previous = baseline_programs.get(name, {}).get(stage)
+            if previous:
+                ratio = result[stage] / previous
+                regressed = ratio > 1 + tolerance and result[stage] - previous > min_delta_s
+                flag = " !" if regressed else "  "
+                if regressed:
+                    regressions.append(f"{name}.{stage}")
+                cell += f" ({ratio:5.2f}x){flag}"
+            cells.append(f"{cell:>20}")
+        print(f"{name:<15} {result['lines']:>6} {result['bytes']:>6}  " + "  ".join(cells))
+    return regressions
+
+
+def main() -> None:
+    argp = argparse.ArgumentParser(description="Assembler macro-benchmark on synthetic 4K ROM programs")
+    argp.add_argument("--repeat", type=int, default=10, help="Timing repetitions, best one is reported (default: 10)")
+    argp.add_argument("--program", action="append", choices=sorted(PROGRAMS), help="Program to run (repeatable; default: all)")
+    argp.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"Baseline JSON file (default: {DEFAULT_BASELINE})")
+    argp.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file instead of comparing")
+    argp.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    argp.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this (default: 1.0 ms)")
+    args = argp.parse_args()
+
+    names = args.program or list(PROGRAMS)
+    results = {name: bench_program(PROGRAMS[name](), args.repeat) for name in names}
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline) if args.program else None
+        if baseline:
+            # Refresh only the selected programs
+            baseline["programs"].update(results)
+            results = baseline["programs"]
+        save_baseline(args.baseline, results, args.repeat)
+        report(results, None, args.tolerance, 0.0)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = report(results, load_baseline(args.baseline), args.tolerance, args.min_delta_ms / 1000)
+    if regressions:
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
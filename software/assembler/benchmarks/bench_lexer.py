@@ -0,0 +1,136 @@
+# software/assembler/benchmarks/bench_lexer.py
+"""
+Micro-benchmark: single-pass lexer vs. the line tokenization of the parser it
+replaced.
+
+Run from software/assembler:
+    python -m benchmarks.bench_lexer [--repeat N]
+
+Two measurements over every line of every .asm/.inc file under software/asm:
+
+  tokenize   One tokenization per line: the baseline parser's
+             _parse_line_components (strip, skip blank and comment lines,
+             LINE_PATTERN) vs. lex_line, which also records each part's column
+             and the comment.
+  parser     The scanning work each parser does per line. The baseline ran
+             _parse_line_components three times (macro collection, macro
+             expansion, then the processing loop) plus its MACRO/ENDM re.match
+             checks; the current parser lexes each line once and reuses the
+             result in both phases.
+
+Per line, lex_line is somewhat slower than the single regex match it replaced,
+since it builds column spans in Python; the parser gains from scanning each
+line once instead of three times.
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from src.lexer import lex_line, LexError
+
+ASM_SOURCE_ROOT = Path(__file__).resolve().parents[2] / "asm"
+
+# The line tokenization the parser used before the single-pass lexer, kept
+# here as the baseline the lexer is measured against.
+# Group 1: Label (e.g., GLOBAL_LABEL:, .local_label:)
+# Group 2: Mnemonic
+# Group 3: Operand
+LINE_PATTERN = re.compile(
+    r'^\s*'                                 # leading whitespace
+    r'(?:((?:[a-zA-Z_]\w*|\.\w+):))?'       # group 1: optional label (global or local)
+    r'\s*'                                  # separator
+    r'(?:'                                  # start main optional instruction part
+        r'([A-Z_a-z]\w*)'                   # group 2: mnemonic
+        r'(?:'                              # start OPTIONAL "delimiter and operand" subgroup
+            r'(?:\s*,\s*|\s+)'              #   REQUIRED delimiter
+            r'(.*?)'                        #   group 3: operand (lazy)
+        r')?'                               # end OPTIONAL "delimiter and operand" subgroup
+    r')?'                                   # end main optional instruction part
+    r'\s*(?:;.*)?$'                         # optional trailing comment
+)
+
+
+def load_corpus() -> List[str]:
+    lines: List[str] = []
+    for pattern in ("*.asm", "*.inc"):
+        for path in sorted(ASM_SOURCE_ROOT.rglob(pattern)):
+            lines.extend(path.read_text().splitlines())
+    return lines
+
+
+def tokenize_with_regex(line: str):
+    """The baseline Parser._parse_line_components, up to its EQU handling (which the parser still does)."""
+    text = line.strip()
+    if not text or text.startswith(';'):
+        return None
+    m = LINE_PATTERN.match(text)
+    if not m:
+        label_only_match = re.match(r'^\s*((?:[a-zA-Z_]\w*|\.\w+):)\s*(?:;.*)?$', text)
+        if label_only_match:
+            return (label_only_match.group(1).rstrip(':'), None, None)
+        return None
+    raw_label, raw_mnem, raw_op = m.groups()
+    label = raw_label.rstrip(':') if raw_label else None
+    return label, raw_mnem, raw_op
+
+
+def tokenize_with_lexer(line: str):
+    try:
+        lexed = lex_line(line)
+    except LexError:
+        return None
+    if lexed.is_empty:
+        return None
+    return lexed.label, lexed.mnemonic, lexed.operand
+
+
+def parser_workload_with_regex(line: str):
+    # Macro collection phase
+    re.match(r'^\s*MACRO\s+', line, re.IGNORECASE)
+    re.match(r'^\s*ENDM\s*(?:;.*)?$', line, re.IGNORECASE)
+    tokenize_with_regex(line)
+    # Macro expansion phase, then the processing loop over the expanded lines
+    re.match(r'^\s*MACRO\s+', line, re.IGNORECASE)
+    tokenize_with_regex(line)
+    return tokenize_with_regex(line)
+
+
+def parser_workload_with_lexer(line: str):
+    # MACRO/ENDM/INCLUDE checks read the lexed mnemonic; the source manager
+    # memoizes the result for the main phase
+    return tokenize_with_lexer(line)
+
+
+def time_path(tokenize: Callable, lines: List[str], repeat: int) -> float:
+    """Best-of-repeat wall time for tokenizing the whole corpus once."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            tokenize(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    argp = argparse.ArgumentParser(description="Lexer micro-benchmark")
+    argp.add_argument("--repeat", type=int, default=20, help="Timing repetitions, best one is reported (default: 20)")
+    args = argp.parse_args()
+
+    lines = load_corpus()
+    print(f"Corpus: {len(lines)} lines from {ASM_SOURCE_ROOT}")
+    measurements = (
+        ("tokenize", tokenize_with_regex, tokenize_with_lexer),
+        ("parser", parser_workload_with_regex, parser_workload_with_lexer),
+    )
+    for title, regex_path, lexer_path in measurements:
+        print(f"{title}:")
+        for name, tokenize in (("regex", regex_path), ("lexer", lexer_path)):
+            elapsed = time_path(tokenize, lines, args.repeat)
+            print(f"  {name:<6} {len(lines) / elapsed:>12,.0f} lines/s  ({elapsed * 1000:.2f} ms per pass)")
+
+
+if __name__ == "__main__":
+    main()
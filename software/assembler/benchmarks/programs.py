@@ -0,0 +1,182 @@
+# software/assembler/benchmarks/programs.py
+"""
+Synthetic stress programs for the assembler benchmarks.
+
+Each generator returns a StressProgram: a set of source files (the main file
+plus any includes) that assembles into the 4K ROM region ($F000-$FFFF) and
+fills most of it, built to stress one part of the assembler:
+
+  macro_nesting   Every invocation expands a chain of nested macros, each level
+                  with its own @@local labels.
+  local_labels    Thousands of local labels under a few hundred global labels,
+                  with backward references to them.
+  include_tree    A wide two-level INCLUDE tree of small subroutine files.
+  string_tables   Long DB string tables (with escapes) and a DW pointer table.
+  expressions     Operands and EQU chains built from nested expressions,
+                  LOW_BYTE/HIGH_BYTE and forward references.
+
+Byte budgets are computed from the instruction sizes in the comments, so the
+programs keep fitting the ROM as long as the instruction set does.
+"""
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+ROM_START = 0xF000
+ROM_SIZE = 0x1000
+
+# --region arguments for Assembler: the ROM the programs are sized for
+REGIONS: List[Tuple[str, str, str]] = [("ROM", "F000", "FFFF")]
+
+MAIN_FILE = "main.asm"
+
+
+@dataclass(frozen=True)
+class StressProgram:
+    """A generated program: source text by path relative to its directory."""
+    name: str
+    files: Dict[str, str]
+
+    @property
+    def line_count(self) -> int:
+        return sum(text.count("\n") for text in self.files.values())
+
+    def write(self, directory: str) -> str:
+        """
+        Write the program's files under directory.
+
+        Returns:
+            Path of the main source file
+        """
+        for relative_path, text in self.files.items():
+            path = os.path.join(directory, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+        return os.path.join(directory, MAIN_FILE)
+
+
+def _program(name: str, lines: List[str], includes: Dict[str, List[str]] = None) -> StressProgram:
+    files = {MAIN_FILE: "\n".join(lines) + "\n"}
+    for relative_path, include_lines in (includes or {}).items():
+        files[relative_path] = "\n".join(include_lines) + "\n"
+    return StressProgram(name, files)
+
+
+def macro_nesting_program(depth: int = 8) -> StressProgram:
+    lines = [f"; Stress: {depth}-level nested macro expansion", ""]
+    # Level 0: LDI (2) + DCR (1) + JNZ (3); each further level: JZ (3) + ORA (1) + NOP (1)
+    lines += ["MACRO NEST_0 value", "@@loop: LDI A, value", "    DCR A", "    JNZ @@loop", "ENDM", ""]
+    for level in range(1, depth):
+        lines += [f"MACRO NEST_{level} value",
+                  f"    NEST_{level - 1} value",
+                  "    JZ @@done",
+                  "    ORA B",
+                  "@@done: NOP",
+                  "ENDM", ""]
+    expansion_size = 6 + 5 * (depth - 1)
+
+    lines += [f"    ORG ${ROM_START:04X}", "START:"]
+    invocations = (ROM_SIZE - 1) // expansion_size
+    for index in range(invocations):
+        lines.append(f"    NEST_{depth - 1} #${index & 0xFF:02X}")
+    lines.append("    HLT")
+    return _program("macro_nesting", lines)
+
+
+def local_labels_program(locals_per_global: int = 48) -> StressProgram:
+    lines = ["; Stress: thousands of local labels with backward references", "",
+             f"    ORG ${ROM_START:04X}"]
+    # Per global: locals_per_global labelled INR (1 byte), a JNZ (3) back to an
+    # earlier local after every 8th, and a closing RET (1)
+    global_size = locals_per_global + 3 * (locals_per_global // 8) + 1
+    for global_index in range((ROM_SIZE - 1) // global_size):
+        lines.append(f"ROUTINE_{global_index}:")
+        for local_index in range(locals_per_global):
+            lines.append(f".l{local_index}: INR A")
+            if local_index % 8 == 7:
+                lines.append(f"    JNZ .l{local_index - 5}")
+        lines.append("    RET")
+    lines.append("    HLT")
+    return _program("local_labels", lines)
+
+
+def include_tree_program(groups: int = 16, leaves_per_group: int = 8) -> StressProgram:
+    includes: Dict[str, List[str]] = {}
+    main = [f"; Stress: INCLUDE tree of {groups} groups x {leaves_per_group} leaves", "",
+            f"    ORG ${ROM_START:04X}", "START:"]
+    # Main: JSR (3) per group + HLT (1). Group: JSR (3) per leaf + RET (1).
+    # Leaf: LDI (2) + ADD (1) + STA (3) + RET (1), plus padding NOPs
+    fixed_size = 3 * groups + 1 + groups * (3 * leaves_per_group + 1)
+    leaf_count = groups * leaves_per_group
+    padding = max(0, (ROM_SIZE - 1 - fixed_size) // leaf_count - 7)
+    for group in range(groups):
+        main.append(f"    JSR GROUP_{group}")
+    main.append("    HLT")
+    for group in range(groups):
+        group_path = f"group_{group}/group.inc"
+        main.append(f'    INCLUDE "{group_path}"')
+        group_lines = [f"; Group {group}", f"GROUP_{group}:"]
+        group_lines += [f"    JSR LEAF_{group}_{leaf}" for leaf in range(leaves_per_group)]
+        group_lines.append("    RET")
+        for leaf in range(leaves_per_group):
+            leaf_path = f"group_{group}/leaf_{leaf}.inc"
+            group_lines.append(f'    INCLUDE "leaf_{leaf}.inc"')
+            includes[leaf_path] = [
+                f"; Leaf {group}.{leaf}",
+                f"LEAF_{group}_{leaf}_VALUE EQU ${(group * leaves_per_group + leaf) & 0xFF:02X}",
+                f"LEAF_{group}_{leaf}:",
+                f"    LDI A, #LEAF_{group}_{leaf}_VALUE",
+                "    ADD B",
+                f"    STA ${0x2000 + group * leaves_per_group + leaf:04X}",
+            ] + ["    NOP"] * padding + ["    RET"]
+        includes[group_path] = group_lines
+    return _program("include_tree", main, includes)
+
+
+def string_tables_program(string_length: int = 56) -> StressProgram:
+    lines = ["; Stress: long DB string tables and a DW pointer table", "",
+             f"    ORG ${ROM_START:04X}", "START:", "    JMP START"]
+    # Per string: DW pointer (2) + the characters + \n (1) + terminating 0 (1)
+    entry_size = 2 + string_length + 2
+    count = (ROM_SIZE - 3) // entry_size
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,:;!?-+*/="
+    lines.append("STRING_TABLE:")
+    lines += [f"    DW MSG_{index}" for index in range(count)]
+    for index in range(count):
+        text = "".join(alphabet[(index + offset) % len(alphabet)] for offset in range(string_length))
+        lines.append(f'MSG_{index}: DB "{text}\\n", 0')
+    return _program("string_tables", lines)
+
+
+def expressions_program(constants: int = 64) -> StressProgram:
+    lines = ["; Stress: expression-heavy operands and EQU chains", ""]
+    # Constants reference later ones and the DATA label (forward references)
+    for index in range(constants - 1):
+        lines.append(f"K_{index} EQU ((K_{index + 1} + ${index & 0xFF:02X}) & $7F) ^ ({index % 8} << 1)")
+    lines.append(f"K_{constants - 1} EQU LOW_BYTE(DATA) | $01")
+    lines += ["", f"    ORG ${ROM_START:04X}", "START:"]
+    # Per step: LDI (2) + ANI (2) + JMP (3) + STA (3) + LDI (2)
+    step_size = 12
+    steps = (ROM_SIZE - 1 - constants) // step_size
+    for step in range(steps):
+        k = f"K_{step % constants}"
+        lines += [
+            f"    LDI A, #LOW_BYTE(START + {k}) ^ (({k} >> 1) & $3F)",
+            f"    ANI #~{k} & ($F0 | ({step % 16} << 2))",
+            f"    JMP START + ((({k} & $0F) << 1) | {step % 2})",
+            f"    STA $2000 + (HIGH_BYTE(DATA) << 2) + ({k} & $3F)",
+            f"    LDI B, #(({k} + 1) - ({k} & $0F)) & $FF",
+        ]
+    lines.append("DATA:")
+    lines += [f"    DB K_{index}" for index in range(constants)]
+    return _program("expressions", lines)
+
+
+PROGRAMS: Dict[str, Callable[[], StressProgram]] = {
+    "macro_nesting": macro_nesting_program,
+    "local_labels": local_labels_program,
+    "include_tree": include_tree_program,
+    "string_tables": string_tables_program,
+    "expressions": expressions_program,
+}
@@ -2,22 +2,49 @@
 
 # Ensure these imports are at the top of your assembler.py
 import argparse
+import bisect
 import logging
 import os
-import re 
-from typing import List, Dict, Optional, Tuple 
-from dataclasses import dataclass
+import re
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
 
 # Import the NEW Parser and its Token/ParserError from parser.py
 try:
     # Make sure InstrInfo is imported from constants if it's used as a type hint directly
     # However, we are using string forward references like 'InstrInfo' and 'Token'
     # so direct import for type hinting in class body might not be strictly necessary if Python version handles it.
-    from parser import Parser, Token, ParserError, CSV_SPLIT_REGEX 
-    from constants import INSTRUCTION_SET, DEBUG, InstrInfo # Keep InstrInfo imported for runtime access
+    from parser import Parser, PendingEqu, Token, ParserError
+    from source_manager import SourceManager
+    from parse_cache import ParseCache
+    from tokens import (TokenStore, TOKEN_KIND_ORG, TOKEN_KIND_INCBIN, TOKEN_KIND_UNKNOWN, TOKEN_KIND_IMPLIED,
+                        TOKEN_KIND_IMM8, TOKEN_KIND_ABS16, TOKEN_KIND_DB, TOKEN_KIND_DW)
+    from incbin import IncbinSpec, IncbinError, mapped_incbin
+    from data_items import split_data_items, numeric_data
+    from expressions import (evaluate_expression, evaluate_relocatable_expression, ExpressionError,
+                             RelocatableValue, RelocationError)
+    from object_file import (ObjectFile, ObjectSection, ObjectSymbol, Relocation, RELOC_BYTE, RELOC_HI8, RELOC_LO8,
+                             RELOC_WORD, RELOCATABLE_SECTION_NAME)
+    from output_formats import DEFAULT_OUTPUT_FORMATS, OUTPUT_FORMATS, output_path, render, validate_formats
+    from constants import DEBUG, InstrInfo # Keep InstrInfo imported for runtime access
 except ImportError:
-    from .parser import Parser, Token, ParserError, CSV_SPLIT_REGEX
-    from .constants import INSTRUCTION_SET, DEBUG, InstrInfo
+    from .parser import Parser, PendingEqu, Token, ParserError
+    from .source_manager import SourceManager
+    from .parse_cache import ParseCache
+    from .tokens import (TokenStore, TOKEN_KIND_ORG, TOKEN_KIND_INCBIN, TOKEN_KIND_UNKNOWN, TOKEN_KIND_IMPLIED,
+                        TOKEN_KIND_IMM8, TOKEN_KIND_ABS16, TOKEN_KIND_DB, TOKEN_KIND_DW)
+    from .incbin import IncbinSpec, IncbinError, mapped_incbin
+    from .data_items import split_data_items, numeric_data
+    from .expressions import (evaluate_expression, evaluate_relocatable_expression, ExpressionError,
+                              RelocatableValue, RelocationError)
+    from .object_file import (ObjectFile, ObjectSection, ObjectSymbol, Relocation, RELOC_BYTE, RELOC_HI8, RELOC_LO8,
+                              RELOC_WORD, RELOCATABLE_SECTION_NAME)
+    from .output_formats import DEFAULT_OUTPUT_FORMATS, OUTPUT_FORMATS, output_path, render, validate_formats
+    from .constants import DEBUG, InstrInfo
 
 
 logger = logging.getLogger(__name__) 
@@ -46,14 +73,190 @@ class AssemblerError(Exception):
 
 @dataclass
 class MemoryRegion: 
-    """Represents a memory region for output file generation with address tracking."""
+    """
+    Represents a memory region for output file generation.
+
+    Assembled bytes go into a preallocated image of the region, with an occupancy
+    map (one flag byte per address) recording which addresses were emitted; the
+    hex text is only rendered when the output file is written. The same map finds
+    overlapping writes and the free space left in the region.
+    """
     name: str
     start_addr: int
     end_addr: int
     output_filename: str
-    lines: List[str]
-    next_expected_relative_addr: int
-    has_emitted_any_content: bool
+    data: bytearray = field(init=False, repr=False)
+    occupied: bytearray = field(init=False, repr=False)
+    # Per address: 1 + index into writer_sources of the (source file, line) that stored it, 0 if unknown
+    writer_ids: array = field(init=False, repr=False)
+    writer_sources: List[Tuple[str, int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        size = self.end_addr - self.start_addr + 1
+        self.data = bytearray(size)
+        self.occupied = bytearray(size)
+        self.writer_ids = array('I', bytes(4 * size))
+        self.writer_sources = []
+        self._writer_id_by_source: Dict[Tuple[str, int], int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def has_content(self) -> bool:
+        return 1 in self.occupied
+
+    @property
+    def byte_count(self) -> int:
+        """Number of addresses that have been emitted."""
+        return self.occupied.count(1)
+
+    def first_occupied(self, relative_addr: int, count: int) -> int:
+        """Lowest already-occupied relative address in [relative_addr, relative_addr + count), or -1."""
+        return self.occupied.find(1, relative_addr, relative_addr + count)
+
+    def writer_of(self, relative_addr: int) -> Optional[Tuple[str, int]]:
+        """(source file, line) of the last store with a known source that covered relative_addr."""
+        writer_id = self.writer_ids[relative_addr]
+        return self.writer_sources[writer_id - 1] if writer_id else None
+
+    def store(self, relative_addr: int, byte_values: Sequence[int], source: Optional[Tuple[str, int]] = None) -> None:
+        """
+        Store bytes at consecutive region-relative addresses, replacing any already
+        there: overlap checks are the caller's (the assembler rejects overlapping
+        code, the linker patches relocated fields in place). If source (file, line)
+        is given, it is recorded per address for overlap reports.
+        """
+        end = relative_addr + len(byte_values)
+        if source is not None:
+            writer_id = self._writer_id_by_source.get(source)
+            if writer_id is None:
+                self.writer_sources.append(source)
+                writer_id = self._writer_id_by_source[source] = len(self.writer_sources)
+            self.writer_ids[relative_addr:end] = array('I', (writer_id,)) * len(byte_values)
+        try:
+            if isinstance(byte_values, (bytes, bytearray, memoryview)):
+                self.data[relative_addr:end] = byte_values  # Buffer copy, no per-byte conversion
+            else:
+                self.data[relative_addr:end] = bytes(byte_values)
+        except ValueError:
+            self.data[relative_addr:end] = bytes(byte_val & 0xFF for byte_val in byte_values)
+        self.occupied[relative_addr:end] = b"\x01" * len(byte_values)
+
+    def occupied_runs(self) -> List[Tuple[int, int]]:
+        """(start, end) region-relative ranges of contiguous emitted bytes, end exclusive, in address order."""
+        runs: List[Tuple[int, int]] = []
+        start = self.occupied.find(1)
+        while start != -1:
+            end = self.occupied.find(0, start)
+            if end == -1:
+                end = len(self.occupied)
+            runs.append((start, end))
+            start = self.occupied.find(1, end)
+        return runs
+
+    def free_ranges(self) -> List[Tuple[int, int]]:
+        """(start, end) region-relative ranges never written, end exclusive, in address order."""
+        free: List[Tuple[int, int]] = []
+        position = 0
+        for start, end in self.occupied_runs():
+            if start > position:
+                free.append((position, start))
+            position = end
+        if position < self.size:
+            free.append((position, self.size))
+        return free
+
+    def usage(self) -> 'RegionUsage':
+        free = self.free_ranges()
+        free_bytes = sum(end - start for start, end in free)
+        largest_free = max((end - start for start, end in free), default=0)
+        return RegionUsage(
+            name=self.name, size=self.size, used=self.size - free_bytes, free=free_bytes,
+            free_blocks=len(free), largest_free=largest_free,
+            # 0.0 when all free space is one block, approaching 1.0 as it splinters
+            fragmentation=1.0 - largest_free / free_bytes if free_bytes else 0.0,
+            free_ranges=[(self.start_addr + start, self.start_addr + end - 1) for start, end in free],
+        )
+
+    def render_hex_lines(self) -> List[str]:
+        """$readmemh text: an @address line before each contiguous run, then one byte per line."""
+        lines: List[str] = []
+        for start, end in self.occupied_runs():
+            lines.append(f"@{start:04X}")
+            lines.extend(self.data[start:end].hex("\n").upper().split("\n"))
+        return lines
+
+
+class RegionUsage(NamedTuple):
+    """Free-space summary of a region."""
+    name: str
+    size: int
+    used: int
+    free: int
+    free_blocks: int
+    largest_free: int
+    fragmentation: float                # 1 - largest free block / total free bytes
+    free_ranges: List[Tuple[int, int]]  # Absolute (first, last) addresses of each free block
+
+    def describe(self) -> List[str]:
+        lines = [f"Region '{self.name}': {self.used}/{self.size} bytes used ({self.used / self.size:.1%}), "
+                 f"{self.free} free in {self.free_blocks} block(s), largest {self.largest_free}, "
+                 f"fragmentation {self.fragmentation:.2f}"]
+        lines += [f"  free 0x{first:04X}-0x{last:04X} ({last - first + 1} bytes)" for first, last in self.free_ranges]
+        return lines
+
+
+class RegionSegment(NamedTuple):
+    """A maximal run of addresses that all map to the same region (or to none)."""
+    start_addr: int
+    end_addr: int
+    region: Optional[MemoryRegion]
+
+
+def write_region_files(regions: List[MemoryRegion], output_formats: Sequence[str]) -> List[str]:
+    """
+    Write every region that has content, once per output format (used by
+    Assembler.write_output_files and the linker).
+
+    Returns:
+        Paths of the files written
+
+    Raises:
+        AssemblerError: If output directory creation or file writing fails
+    """
+    written: List[str] = []
+    if not regions:
+        logger.warning("No output regions defined. Nothing to write.")
+        return written
+
+    for region in regions:
+        if not region.has_content:
+            logger.info(f"No data assembled for region '{region.name}'. Skipping file write for '{region.output_filename}'.")
+            continue
+
+        output_dir = os.path.dirname(region.output_filename)
+        if output_dir: 
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                logger.debug(f"Ensured directory exists: {output_dir}")
+            except OSError as e:
+                logger.error(f"Could not create directory {output_dir} for region '{region.name}': {e}")
+                raise AssemblerError(f"Failed to create output directory {output_dir}: {e}")
+
+        for format_name in output_formats:
+            # Rendered in bulk from the region image; each file is a single write
+            filename = output_path(region.output_filename, format_name)
+            try:
+                with open(filename, "wb") as f:
+                    f.write(render(region, format_name))
+                logger.info(f"Wrote {format_name} output for region '{region.name}' to '{filename}'.")
+                written.append(filename)
+            except IOError as e:
+                logger.error(f"Could not write to file '{filename}' for region '{region.name}': {e}")
+                raise AssemblerError(f"IOError writing to {filename}: {e}")
+    return written
 
 
 class Assembler:
@@ -67,14 +270,27 @@ class Assembler:
     Supports memory-mapped regions, string literals with escape sequences, arithmetic expressions,
     and functions like LOW_BYTE/HIGH_BYTE for advanced address manipulation.
     """
-    def __init__(self, input_filepath: str, output_specifier: str, region_configs: Optional[List[Tuple[str, str, str]]]) -> None:
+    def __init__(self, input_filepath: str, output_specifier: Optional[str], region_configs: Optional[List[Tuple[str, str, str]]],
+                 cache_dir: Optional[str] = None, output_formats: Optional[List[str]] = None,
+                 source_manager: Optional[SourceManager] = None) -> None:
         self.input_filepath = input_filepath 
-        self.output_specifier = output_specifier 
+        self.output_specifier = output_specifier  # None: in-memory only, no output directories are created
         self.region_configs = region_configs
+        self.cache_dir = cache_dir  # Persistent parse cache directory (None disables it)
+        self.source_manager = source_manager  # Shared source file cache (None: the parser creates its own)
+        try:
+            # Formats written by write_output_files, all from the same memory image
+            self.output_formats: List[str] = validate_formats(list(output_formats or DEFAULT_OUTPUT_FORMATS))
+        except ValueError as e:
+            raise AssemblerError(str(e))
         
         self.regions: List[MemoryRegion] = []
+        # Address -> region index, built once from self.regions (see _build_region_index)
+        self._region_segments: List[RegionSegment] = []
+        self._region_segment_starts: List[int] = []
         self.symbols: Dict[str, int] = {}      
-        self.parsed_tokens: List['Token'] = [] # Use forward reference for Token
+        self.parsed_tokens: TokenStore = TokenStore()
+        self.dependencies: List[str] = []  # Source, include and INCBIN files read, set by assemble()
 
         self._setup_memory_regions()
         logger.info("Assembler initialized.")
@@ -83,7 +299,9 @@ class Assembler:
         output_base_dir = "." 
         if self.region_configs:
             output_base_dir = self.output_specifier
-            if output_base_dir and (not os.path.exists(output_base_dir) or not os.path.isdir(output_base_dir)):
+            if output_base_dir is None:
+                output_base_dir = ""
+            elif output_base_dir and (not os.path.exists(output_base_dir) or not os.path.isdir(output_base_dir)):
                 if os.path.splitext(output_base_dir)[1]: 
                     output_base_dir = os.path.dirname(output_base_dir)
                 if output_base_dir : 
@@ -99,115 +317,42 @@ class Assembler:
                 except ValueError: raise AssemblerError(f"Invalid hex address in region '{name}': start='{start_hex}', end='{end_hex}'")
                 if not (0x0000 <= start_addr <= 0xFFFF and 0x0000 <= end_addr <= 0xFFFF): raise AssemblerError(f"Address for region '{name}' out of 16-bit range.")
                 if start_addr > end_addr: raise AssemblerError(f"Region '{name}': start address 0x{start_addr:X} > end address 0x{end_addr:X}")
-                self.regions.append(MemoryRegion(name=name, start_addr=start_addr, end_addr=end_addr, output_filename=os.path.join(output_base_dir, f"{name}.hex"), lines=[], next_expected_relative_addr=0, has_emitted_any_content=False))
+                self.regions.append(MemoryRegion(name=name, start_addr=start_addr, end_addr=end_addr, output_filename=os.path.join(output_base_dir, f"{name}.hex")))
         else: 
-            output_file_path = self.output_specifier
-            single_output_file_dir = os.path.dirname(output_file_path)
+            output_file_path = self.output_specifier or "DEFAULT_OUTPUT.hex"
+            single_output_file_dir = os.path.dirname(output_file_path) if self.output_specifier is not None else ""
             if single_output_file_dir: os.makedirs(single_output_file_dir, exist_ok=True)
-            self.regions.append(MemoryRegion(name="DEFAULT_OUTPUT", start_addr=0x0000, end_addr=0xFFFF, output_filename=output_file_path, lines=[], next_expected_relative_addr=0, has_emitted_any_content=False))
+            self.regions.append(MemoryRegion(name="DEFAULT_OUTPUT", start_addr=0x0000, end_addr=0xFFFF, output_filename=output_file_path))
         
         if not self.regions: raise AssemblerError("Internal error: No output regions were configured.")
+        self._build_region_index()
         logger.debug(f"Memory regions configured: {len(self.regions)} regions.")
 
-
-    def _resolve_raw_symbol_or_literal(self, value_str: str, context_description: str, current_token: 'Token') -> int:
-        """Resolves a plain symbol, numeric literal, or character literal to an integer."""
-        s = value_str.strip()
-        # err_src_file_basename and err_line_no are available from current_token if needed for errors
-
-        # Check for character literal first (single quotes)
-        if s.startswith("'") and s.endswith("'"):
-            return self._parse_character_literal(s, current_token)
-        
-        # Check for unterminated character literal
-        if s.startswith("'") and not s.endswith("'"):
-            raise AssemblerError(f"Unterminated character literal: '{s}'",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        if s in self.symbols:
-            return self.symbols[s]
-        
-        base_to_use = 10
-        num_str = s
-        if s.startswith('$'):
-            base_to_use = 16
-            num_str = s[1:]
-        elif s.startswith('%'):
-            base_to_use = 2
-            num_str = s[1:]
-        
-        try:
-            val = int(num_str, base_to_use)
-            return val
-        except ValueError:
-            type_str = "hexadecimal" if base_to_use == 16 else "binary" if base_to_use == 2 else "decimal"
-            raise AssemblerError(f"Bad {type_str} value for {context_description}: '{value_str}'. Not a known symbol.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-    def _parse_character_literal(self, char_literal_str: str, current_token: 'Token') -> int:
+    def _build_region_index(self) -> None:
         """
-        Parse a character literal (e.g., 'A', '\\n') and return its ASCII value.
-        
-        Args:
-            char_literal_str: Character literal string including quotes (e.g., "'A'")
-            current_token: Token context for error reporting
-            
-        Returns:
-            ASCII value of the character
-            
-        Raises:
-            AssemblerError: If character literal is malformed
+        Compile self.regions into a sorted table of segments covering 0x0000-0xFFFF,
+        each mapping a run of addresses to one region (or to none, for gaps).
+        Where regions overlap, the one configured first owns the address, as with
+        a linear scan of self.regions.
         """
-        # Remove outer quotes
-        if len(char_literal_str) < 2 or not (char_literal_str.startswith("'") and char_literal_str.endswith("'")):
-            raise AssemblerError(f"Malformed character literal: '{char_literal_str}'",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        char_content = char_literal_str[1:-1]
-        
-        # Check for empty character literal
-        if not char_content:
-            raise AssemblerError(f"Empty character literal: '{char_literal_str}'",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        # Check for unterminated character literal (this case should not occur with our check above, but being thorough)
-        if len(char_literal_str) < 3:
-            raise AssemblerError(f"Unterminated character literal: '{char_literal_str}'",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        # Process escape sequences
-        if char_content.startswith('\\'):
-            if len(char_content) < 2:
-                raise AssemblerError(f"Incomplete escape sequence in character literal: '{char_literal_str}'",
-                                     source_file=current_token.source_file, line_no=current_token.line_no)
-            
-            escape_char = char_content[1]
-            if escape_char == 'n':
-                return ord('\n')  # 10
-            elif escape_char == 't':
-                return ord('\t')  # 9
-            elif escape_char == 'r':
-                return ord('\r')  # 13
-            elif escape_char == '0':
-                return ord('\0')  # 0
-            elif escape_char == '\\':
-                return ord('\\')  # 92
-            elif escape_char == "'":
-                return ord("'")   # 39
+        boundaries = {0x0000, 0x10000}
+        for region in self.regions:
+            boundaries.update((region.start_addr, region.end_addr + 1))
+        ordered = sorted(boundaries)
+
+        self._region_segments = []
+        for start, next_start in zip(ordered, ordered[1:]):
+            owner = next((region for region in self.regions if region.start_addr <= start <= region.end_addr), None)
+            if self._region_segments and self._region_segments[-1].region is owner:
+                self._region_segments[-1] = self._region_segments[-1]._replace(end_addr=next_start - 1)
             else:
-                raise AssemblerError(f"Unknown escape sequence '\\{escape_char}' in character literal: '{char_literal_str}'",
-                                     source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        # Regular character - must be exactly one character
-        if len(char_content) != 1:
-            raise AssemblerError(f"Character literal must contain exactly one character: '{char_literal_str}' (contains {len(char_content)} characters)",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        return ord(char_content[0])
+                self._region_segments.append(RegionSegment(start, next_start - 1, owner))
+        self._region_segment_starts = [segment.start_addr for segment in self._region_segments]
+
 
     def _resolve_expression_to_int(self, expression_str: str, current_token: 'Token') -> int:
         """
-        Recursively resolves an expression string (symbol, literal, arithmetic, logical, functions) to an integer.
+        Resolves an expression string (symbol, literal, arithmetic, logical, functions) to an integer.
         
         Args:
             expression_str: Expression string to resolve (e.g., "LOW_BYTE(SYMBOL)", "A + B", "MASK_A | MASK_B")
@@ -219,342 +364,10 @@ class Assembler:
         Raises:
             AssemblerError: If expression cannot be resolved
         """
-        expr = expression_str.strip()
-
-        # Try function call parsing first (highest precedence)
-        func_result = self._try_parse_function_call(expr, current_token)
-        if func_result is not None:
-            return func_result
-
-        # Try parentheses parsing (grouping)
-        paren_result = self._try_parse_parentheses(expr, current_token)
-        if paren_result is not None:
-            return paren_result
-
-        # Try logical expression parsing (|, ^, &) - lowest precedence
-        logical_result = self._try_parse_logical_expression(expr, current_token)
-        if logical_result is not None:
-            return logical_result
-
-        # Try arithmetic expression parsing (+ -) - higher than logical
-        arith_result = self._try_parse_arithmetic_expression(expr, current_token)
-        if arith_result is not None:
-            return arith_result
-
-        # Try shift expression parsing - higher precedence than arithmetic  
-        shift_result = self._try_parse_shift_expression(expr, current_token)
-        if shift_result is not None:
-            return shift_result
-
-        # Try unary expression parsing (NOT operator) - high precedence
-        unary_result = self._try_parse_unary_expression(expr, current_token)
-        if unary_result is not None:
-            return unary_result
-
-        # Fall back to raw symbol/literal parsing
-        return self._resolve_raw_symbol_or_literal(expr, "expression component", current_token)
-
-    def _try_parse_function_call(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression as a function call (LOW_BYTE/HIGH_BYTE).
-        
-        Args:
-            expr: Expression string to check for function call pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Function result if expression is a function call, None otherwise
-            
-        Raises:
-            AssemblerError: If function call is malformed or argument is invalid
-        """
-        full_func_match = re.fullmatch(r"(LOW_BYTE|HIGH_BYTE)\s*\(\s*(.+)\s*\)", expr, re.IGNORECASE)
-        if not full_func_match:
-            return None
-            
-        func_name = full_func_match.group(1).upper()
-        inner_expr_str = full_func_match.group(2).strip()
-        
-        # Recursively resolve the function argument
-        value = self._resolve_expression_to_int(inner_expr_str, current_token)
-
-        if not (0x0000 <= value <= 0xFFFF):
-            raise AssemblerError(f"Value for {func_name} argument '{inner_expr_str}' (resolved to 0x{value:X}) is out of 16-bit range (0x0000-0xFFFF).",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        if func_name == "LOW_BYTE":
-            return value & 0xFF
-        else:  # HIGH_BYTE
-            return (value >> 8) & 0xFF
-
-    def _try_parse_arithmetic_expression(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression as arithmetic (addition/subtraction).
-        
-        Args:
-            expr: Expression string to check for arithmetic pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Arithmetic result if expression contains operators, None otherwise
-            
-        Raises:
-            AssemblerError: If arithmetic expression is malformed
-        """
-        # Find the rightmost + or - operator for left-to-right evaluation
-        op_char, split_pos = self._find_rightmost_arithmetic_operator(expr)
-        
-        if not op_char or split_pos <= 0:
-            return None
-
-        lhs_str = expr[:split_pos].strip()
-        rhs_str = expr[split_pos+1:].strip()
-
-        if not lhs_str or not rhs_str:
-            raise AssemblerError(f"Malformed arithmetic expression: '{expr}'. Missing operand around '{op_char}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        lhs_val = self._resolve_expression_to_int(lhs_str, current_token)
-        rhs_val = self._resolve_expression_to_int(rhs_str, current_token)
-        
-        if op_char == '+':
-            return lhs_val + rhs_val
-        else:  # op_char == '-'
-            return lhs_val - rhs_val
-
-    def _find_rightmost_arithmetic_operator(self, expr: str) -> Tuple[Optional[str], int]:
-        """
-        Find the rightmost arithmetic operator (+ or -) in an expression.
-        
-        Args:
-            expr: Expression string to search
-            
-        Returns:
-            Tuple of (operator_char, position) or (None, -1) if no operator found
-        """
-        return self._find_rightmost_operator_outside_parens(expr, ['+', '-'])
-
-    def _try_parse_logical_expression(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression as logical operations (|, ^, &) with proper precedence.
-        
-        Args:
-            expr: Expression string to check for logical pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Logical result if expression contains logical operators, None otherwise
-            
-        Raises:
-            AssemblerError: If logical expression is malformed
-        """
-        # Find the rightmost logical operator with proper precedence (| lowest, & highest)
-        op_char, split_pos = self._find_rightmost_logical_operator(expr)
-        
-        if not op_char or split_pos <= 0:
-            return None
-
-        lhs_str = expr[:split_pos].strip()
-        rhs_str = expr[split_pos+len(op_char):].strip()
-
-        if not lhs_str or not rhs_str:
-            raise AssemblerError(f"Malformed logical expression: '{expr}'. Missing operand around '{op_char}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        lhs_val = self._resolve_expression_to_int(lhs_str, current_token)
-        rhs_val = self._resolve_expression_to_int(rhs_str, current_token)
-        
-        if op_char == '|':
-            return lhs_val | rhs_val
-        elif op_char == '^':
-            return lhs_val ^ rhs_val
-        elif op_char == '&':
-            return lhs_val & rhs_val
-        else:
-            # Should not reach here
-            raise AssemblerError(f"Internal error: unknown logical operator '{op_char}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-    def _find_rightmost_operator_outside_parens(self, expr: str, operators: List[str]) -> Tuple[Optional[str], int]:
-        """
-        Find the rightmost occurrence of any operator that is not inside parentheses.
-        
-        Args:
-            expr: Expression string to search
-            operators: List of operators to search for (in order of precedence, lowest first)
-            
-        Returns:
-            Tuple of (operator_string, position) or (None, -1) if no operator found
-        """
-        for op in operators:
-            # Find all occurrences of this operator
-            pos = len(expr)
-            while True:
-                pos = expr.rfind(op, 0, pos)
-                if pos == -1:
-                    break
-                if pos == 0:
-                    break  # Can't have LHS operand at position 0
-                    
-                # Check if this operator is inside parentheses
-                paren_depth = 0
-                for i in range(pos):
-                    if expr[i] == '(':
-                        paren_depth += 1
-                    elif expr[i] == ')':
-                        paren_depth -= 1
-                
-                if paren_depth == 0:  # Not inside parentheses
-                    return op, pos
-                
-                pos -= 1
-                if pos < 0:
-                    break
-                
-        return None, -1
-
-    def _find_rightmost_logical_operator(self, expr: str) -> Tuple[Optional[str], int]:
-        """
-        Find the rightmost logical operator (|, ^, &) with proper precedence.
-        Precedence: | (lowest) > ^ > & (highest)
-        
-        Args:
-            expr: Expression string to search
-            
-        Returns:
-            Tuple of (operator_char, position) or (None, -1) if no operator found
-        """
-        return self._find_rightmost_operator_outside_parens(expr, ['|', '^', '&'])
-
-    def _try_parse_shift_expression(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression as shift operations (<<, >>).
-        
-        Args:
-            expr: Expression string to check for shift pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Shift result if expression contains shift operators, None otherwise
-            
-        Raises:
-            AssemblerError: If shift expression is malformed
-        """
-        # Find the rightmost shift operator
-        op_str, split_pos = self._find_rightmost_shift_operator(expr)
-        
-        if not op_str or split_pos <= 0:
-            return None
-
-        lhs_str = expr[:split_pos].strip()
-        rhs_str = expr[split_pos+len(op_str):].strip()
-
-        if not lhs_str or not rhs_str:
-            raise AssemblerError(f"Malformed shift expression: '{expr}'. Missing operand around '{op_str}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        lhs_val = self._resolve_expression_to_int(lhs_str, current_token)
-        rhs_val = self._resolve_expression_to_int(rhs_str, current_token)
-        
-        if op_str == '<<':
-            # Left shift - limit result to 8-bit for assembler context
-            result = lhs_val << rhs_val
-            return result & 0xFF  # Keep in 8-bit range
-        elif op_str == '>>':
-            # Right shift
-            return lhs_val >> rhs_val
-        else:
-            # Should not reach here
-            raise AssemblerError(f"Internal error: unknown shift operator '{op_str}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-    def _find_rightmost_shift_operator(self, expr: str) -> Tuple[Optional[str], int]:
-        """
-        Find the rightmost shift operator (<<, >>) in an expression.
-        
-        Args:
-            expr: Expression string to search
-            
-        Returns:
-            Tuple of (operator_string, position) or (None, -1) if no operator found
-        """
-        return self._find_rightmost_operator_outside_parens(expr, ['<<', '>>'])
-
-    def _try_parse_unary_expression(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression as unary operation (~).
-        
-        Args:
-            expr: Expression string to check for unary pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Unary result if expression starts with unary operator, None otherwise
-            
-        Raises:
-            AssemblerError: If unary expression is malformed
-        """
-        if not expr.startswith('~'):
-            return None
-            
-        # Extract operand after the ~ operator
-        operand_str = expr[1:].strip()
-        
-        if not operand_str:
-            raise AssemblerError(f"Malformed unary expression: '{expr}'. Missing operand after '~'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-
-        operand_val = self._resolve_expression_to_int(operand_str, current_token)
-        
-        # Bitwise NOT - limit to 8-bit result for assembler context
-        return (~operand_val) & 0xFF
-
-    def _try_parse_parentheses(self, expr: str, current_token: 'Token') -> Optional[int]:
-        """
-        Try to parse expression with parentheses for grouping.
-        
-        Args:
-            expr: Expression string to check for parentheses pattern
-            current_token: Token context for error reporting
-            
-        Returns:
-            Result of parenthesized expression, None if no parentheses found
-            
-        Raises:
-            AssemblerError: If parentheses are malformed or mismatched
-        """
-        expr = expr.strip()
-        
-        # Check if expression is fully wrapped in parentheses
-        if not (expr.startswith('(') and expr.endswith(')')):
-            return None
-            
-        # Check if the outer parentheses actually wrap the entire expression
-        # by ensuring they are balanced when we ignore the outer pair
-        paren_depth = 0
-        for i, char in enumerate(expr[1:-1]):  # Skip first and last char
-            if char == '(':
-                paren_depth += 1
-            elif char == ')':
-                paren_depth -= 1
-                if paren_depth < 0:
-                    # Found a closing paren that doesn't match an opening one
-                    # This means the outer parens don't wrap the entire expression
-                    return None
-        
-        if paren_depth != 0:
-            # Unbalanced parentheses - outer parens don't wrap entire expression
-            return None
-            
-        # Extract content inside parentheses
-        inner_expr = expr[1:-1].strip()
-        
-        if not inner_expr:
-            raise AssemblerError(f"Empty parentheses in expression: '{expr}'.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no)
-        
-        # Recursively evaluate the inner expression
-        return self._resolve_expression_to_int(inner_expr, current_token)
+        try:
+            return evaluate_expression(expression_str, self.symbols.get)
+        except ExpressionError as e:
+            raise AssemblerError(str(e), source_file=current_token.source_file, line_no=current_token.line_no) from e
 
     def _parse_value_or_symbol(self, value_str: Optional[str], context_description: str, current_token: 'Token') -> int:
         """Wrapper to resolve an expression string from an operand to an integer value."""
@@ -621,31 +434,6 @@ class Assembler:
                 
         return ''.join(result)
 
-    def _process_token(self, token: 'Token', current_global_address: int) -> int:
-        """
-        Process a single token during assembly, handling ORG directives and regular instructions.
-        
-        Args:
-            token: The token to process
-            current_global_address: Current assembly address
-            
-        Returns:
-            Updated global address after processing this token
-            
-        Raises:
-            AssemblerError: If token processing fails
-        """
-        # Skip EQU tokens (already processed by parser)
-        if not token.mnemonic or token.mnemonic.upper() == 'EQU':
-            return current_global_address
-
-        # Handle ORG directive
-        if token.mnemonic.upper() == 'ORG':
-            return self._handle_org_directive(token)
-
-        # Handle regular instructions and data directives
-        return self._emit_instruction(token, current_global_address)
-
     def _handle_org_directive(self, token: 'Token') -> int:
         """
         Handle ORG directive processing.
@@ -672,120 +460,144 @@ class Assembler:
             raise AssemblerError(f"ORG address 0x{resolved_org_address:04X} is out of 16-bit range.",
                                  source_file=token.source_file, line_no=token.line_no)
 
-        # Reset region tracking for new origin
-        for region in self.regions:
-            region.next_expected_relative_addr = -1 
-            
         logger.debug(f"ORG encountered. Global address set to 0x{resolved_org_address:04X}", extra={'source_file': os.path.basename(token.source_file), 'line_no': token.line_no})
         return resolved_org_address
 
-    def _emit_instruction(self, token: 'Token', current_global_address: int) -> int:
-        """
-        Emit instruction opcode and operand bytes for a regular instruction or data directive.
-        
-        Args:
-            token: Token containing the instruction/directive
-            current_global_address: Current assembly address
-            
-        Returns:
-            Updated global address after emitting instruction
-            
-        Raises:
-            AssemblerError: If instruction emission fails
-        """
-        instr_info = INSTRUCTION_SET.get(token.mnemonic.upper())
-        if instr_info is None: 
-            raise AssemblerError(f"Unknown mnemonic '{token.mnemonic}' in assembler pass (should have been caught by parser).",
+    # Second-pass encoders, one per token kind. Each takes (token, current address,
+    # INSTRUCTION_SET entry) and returns the address after the token's bytes.
+
+    def _encoders(self) -> Dict[int, Callable[['Token', int, Optional['InstrInfo']], int]]:
+        return {
+            TOKEN_KIND_ORG: self._encode_org,
+            TOKEN_KIND_INCBIN: self._encode_incbin,
+            TOKEN_KIND_IMPLIED: self._encode_implied,
+            TOKEN_KIND_IMM8: self._encode_imm8,
+            TOKEN_KIND_ABS16: self._encode_abs16,
+            TOKEN_KIND_DB: self._encode_db,
+            TOKEN_KIND_DW: self._encode_dw,
+            TOKEN_KIND_UNKNOWN: self._encode_unknown,
+        }
+
+    def _encode_org(self, token: 'Token', current_global_address: int, instr_info: Optional['InstrInfo']) -> int:
+        return self._handle_org_directive(token)
+
+    def _encode_incbin(self, token: 'Token', current_global_address: int, instr_info: Optional['InstrInfo']) -> int:
+        return self._emit_incbin(token, current_global_address)
+
+    def _encode_unknown(self, token: 'Token', current_global_address: int, instr_info: Optional['InstrInfo']) -> int:
+        raise AssemblerError(f"Unknown mnemonic '{token.mnemonic}' in assembler pass (should have been caught by parser).",
+                             source_file=token.source_file, line_no=token.line_no)
+
+    def _encode_implied(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        if token.operand:
+            raise AssemblerError(f"Operand '{token.operand}' provided for {token.mnemonic} which takes no operand.",
                                  source_file=token.source_file, line_no=token.line_no)
+        self._emit_bytes([instr_info.opcode], current_global_address, token, has_opcode=True)
+        return current_global_address + 1
 
-        # Emit opcode if instruction has one
-        if instr_info.opcode is not None:
-            target_region_for_opcode = self._find_region_for_address(current_global_address)
-            if target_region_for_opcode:
-                self._emit_byte_to_region(target_region_for_opcode, instr_info.opcode, current_global_address, token)
-            elif self.regions: 
-                logger.warning(f"Opcode for '{token.mnemonic}' at global address 0x{current_global_address:04X} is outside all defined memory regions. Opcode not emitted.",
-                               extra={'source_file': os.path.basename(token.source_file), 'line_no': token.line_no})
-            current_global_address += 1
-
-        # Emit operand bytes
-        operand_bytes = self._encode_operand(token.operand, instr_info, token)
-        for byte_val in operand_bytes:
-            target_region_for_byte = self._find_region_for_address(current_global_address)
-            if target_region_for_byte:
-                self._emit_byte_to_region(target_region_for_byte, byte_val, current_global_address, token)
-            elif self.regions: 
-                 logger.warning(f"Operand/data byte for '{token.mnemonic}' (value 0x{byte_val:02X}) at global address 0x{current_global_address:04X} is outside all defined memory regions. Byte not emitted.",
-                                extra={'source_file': os.path.basename(token.source_file), 'line_no': token.line_no})
-            current_global_address += 1
-            
-        return current_global_address
+    def _operand_value(self, token: 'Token') -> int:
+        if not token.operand:
+            raise AssemblerError(f"Mnemonic '{token.mnemonic}' expects an operand, but none given.",
+                                 source_file=token.source_file, line_no=token.line_no)
+        return self._parse_value_or_symbol(token.operand.lstrip('#').strip(), f"operand for '{token.mnemonic}'", token)
 
-    def _find_region_for_address(self, global_address: int) -> Optional[MemoryRegion]:
+    def _encode_imm8(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        val = self._operand_value(token)
+        if not (0x00 <= val <= 0xFF):
+            raise AssemblerError(f"Value 0x{val:X} ('{token.operand}') for {token.mnemonic} is out of 8-bit range (0x00-0xFF).",
+                                 source_file=token.source_file, line_no=token.line_no)
+        self._emit_bytes([instr_info.opcode, val], current_global_address, token, has_opcode=True)
+        return current_global_address + 2
+
+    def _encode_abs16(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        val = self._operand_value(token)
+        if not (0x0000 <= val <= 0xFFFF):
+            raise AssemblerError(f"Value 0x{val:X} ('{token.operand}') for {token.mnemonic} is out of 16-bit range (0x0000-0xFFFF).",
+                                 source_file=token.source_file, line_no=token.line_no)
+        self._emit_bytes([instr_info.opcode, val & 0xFF, val >> 8], current_global_address, token, has_opcode=True) # Little-endian
+        return current_global_address + 3
+
+    def _encode_db(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        data_bytes = self._encode_db_operand(token.operand, token)
+        self._emit_bytes(data_bytes, current_global_address, token)
+        return current_global_address + len(data_bytes)
+
+    def _encode_dw(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        data_bytes = self._encode_dw_operand(token.operand, token)
+        self._emit_bytes(data_bytes, current_global_address, token)
+        return current_global_address + len(data_bytes)
+
+    def _emit_incbin(self, token: 'Token', current_global_address: int) -> int:
         """
-        Find the memory region that contains the given global address.
-        
-        Args:
-            global_address: Address to find region for
-            
+        Copy an INCBIN file range from a memory map straight into the region image(s).
+
         Returns:
-            MemoryRegion containing the address, or None if not found
-        """
-        for region in self.regions:
-            if region.start_addr <= global_address <= region.end_addr:
-                return region
-        return None
+            Updated global address after the included bytes
 
-    def _emit_address_directive_to_region(self, region: MemoryRegion, global_addr: int) -> None:
-        relative_addr = global_addr - region.start_addr
-        if not (0 <= relative_addr <= (region.end_addr - region.start_addr)):
-             logger.warning(f"Internal: Emitting @ADDR for relative address 0x{relative_addr:X} (global 0x{global_addr:X}) "
-                            f"which seems outside expected bounds for region '{region.name}' (size {region.end_addr - region.start_addr + 1}).")
-        region.lines.append(f"@{relative_addr:04X}")
-        region.next_expected_relative_addr = relative_addr 
-        region.has_emitted_any_content = True
+        Raises:
+            AssemblerError: If the file can no longer be read
+        """
+        spec = IncbinSpec.from_operand(token.operand)
+        try:
+            with mapped_incbin(spec) as included:
+                self._emit_bytes(included, current_global_address, token)
+        except IncbinError as e:
+            raise AssemblerError(str(e), source_file=token.source_file, line_no=token.line_no) from e
+        return current_global_address + spec.length
 
+    def _emit_bytes(self, byte_values: Sequence[int], global_address: int, token: 'Token', has_opcode: bool = False) -> None:
+        """
+        Emit a contiguous run of bytes starting at global_address, one call per region it spans.
 
-    def _emit_byte_to_region(self, region: MemoryRegion, byte_val: int, global_addr_of_byte: int, token_context: 'Token') -> None:
-        relative_addr_of_byte = global_addr_of_byte - region.start_addr
-        
-        if not (region.start_addr <= global_addr_of_byte <= region.end_addr):
-            logger.warning(f"[{os.path.basename(token_context.source_file)} line {token_context.line_no}] "
-                           f"Byte 0x{byte_val:02X} for '{token_context.mnemonic}' at global address 0x{global_addr_of_byte:04X} "
-                           f"is being considered for region '{region.name}' (0x{region.start_addr:04X}-0x{region.end_addr:04X}) "
-                           f"but is outside its defined range. Emission skipped for this region.")
-            return 
-
-        if not region.has_emitted_any_content or region.next_expected_relative_addr != relative_addr_of_byte:
-            self._emit_address_directive_to_region(region, global_addr_of_byte)
-        
-        region.lines.append(f"{byte_val & 0xFF:02X}")
-        region.next_expected_relative_addr = relative_addr_of_byte + 1 
-        region.has_emitted_any_content = True
+        Args:
+            byte_values: Bytes to emit
+            global_address: Address of the first byte
+            token: Token the bytes belong to (for diagnostics)
+            has_opcode: Whether the first byte is an opcode (for diagnostics)
+        """
+        offset = 0
+        total = len(byte_values)
+        while offset < total:
+            address = global_address + offset
+            segment = self._segment_for_address(address)
+            if segment is None:
+                count = total - offset
+            else:
+                count = min(total - offset, segment.end_addr - address + 1)
+            if segment is not None and segment.region is not None:
+                self._emit_run_to_region(segment.region, byte_values[offset:offset + count], address, token)
+            elif self.regions:
+                for index in range(offset, offset + count):
+                    byte_address = global_address + index
+                    if has_opcode and index == 0:
+                        logger.warning(f"Opcode for '{token.mnemonic}' at global address 0x{byte_address:04X} is outside all defined memory regions. Opcode not emitted.",
+                                       extra={'source_file': os.path.basename(token.source_file), 'line_no': token.line_no})
+                    else:
+                        logger.warning(f"Operand/data byte for '{token.mnemonic}' (value 0x{byte_values[index]:02X}) at global address 0x{byte_address:04X} is outside all defined memory regions. Byte not emitted.",
+                                       extra={'source_file': os.path.basename(token.source_file), 'line_no': token.line_no})
+            offset += count
+
+    def _segment_for_address(self, global_address: int) -> Optional[RegionSegment]:
+        if not (0x0000 <= global_address <= 0xFFFF):
+            return None
+        return self._region_segments[bisect.bisect_right(self._region_segment_starts, global_address) - 1]
 
-    def _encode_operand(self, operand_str: Optional[str], instr_info: 'InstrInfo', current_token: 'Token') -> List[int]:
+    def _emit_run_to_region(self, region: MemoryRegion, byte_values: Sequence[int], global_addr: int, token: 'Token') -> None:
         """
-        Encode operand into byte list for instructions and data directives.
-        
-        Args:
-            operand_str: Operand string from token (may be None)
-            instr_info: Instruction information from constants
-            current_token: Token context for error reporting
-            
-        Returns:
-            List of bytes representing the encoded operand
-            
+        Emit bytes at consecutive addresses, all within region.
+
         Raises:
-            AssemblerError: If operand encoding fails
+            AssemblerError: If any of the addresses was already written (e.g., overlapping ORG blocks)
         """
-        mnemonic_for_error = current_token.mnemonic or "directive"
-        
-        # Handle DB directive separately
-        if mnemonic_for_error.upper() == 'DB':
-            return self._encode_db_operand(operand_str, current_token)
-        
-        # Handle standard operand encoding for other instructions/directives
-        return self._encode_standard_operand(operand_str, instr_info, current_token)
+        relative_addr = global_addr - region.start_addr
+        overlap = region.first_occupied(relative_addr, len(byte_values))
+        if overlap != -1:
+            previous = region.writer_of(overlap)
+            previous_location = f"{os.path.basename(previous[0])} line {previous[1]}" if previous else "an earlier line"
+            raise AssemblerError(f"Address 0x{region.start_addr + overlap:04X} in region '{region.name}' is already occupied "
+                                 f"by code from {previous_location}; '{token.mnemonic}' would overwrite it.",
+                                 source_file=token.source_file, line_no=token.line_no)
+        region.store(relative_addr, byte_values, (token.source_file, token.line_no))
 
     def _encode_db_operand(self, operand_str: Optional[str], current_token: 'Token') -> List[int]:
         """
@@ -804,14 +616,14 @@ class Assembler:
         if not operand_str:
             raise AssemblerError(f"DB directive requires operand(s).", source_file=current_token.source_file, line_no=current_token.line_no)
         
+        # Plain numeric tables: converted in one batch (cached since pass 1 sized the line)
+        table_bytes = numeric_data(operand_str, 1)
+        if table_bytes is not None:
+            return list(table_bytes)
+
         output_bytes: List[int] = []
-        items = CSV_SPLIT_REGEX.split(operand_str)
         
-        for item_text_raw in items:
-            item_text = item_text_raw.strip()
-            if not item_text: 
-                continue
-
+        for item_text in split_data_items(operand_str):
             if item_text.startswith('"') and item_text.endswith('"'): 
                 # String literal processing
                 if len(item_text) < 2:
@@ -836,53 +648,33 @@ class Assembler:
                 
         return output_bytes
 
-    def _encode_standard_operand(self, operand_str: Optional[str], instr_info: 'InstrInfo', current_token: 'Token') -> List[int]:
+    def _encode_dw_operand(self, operand_str: Optional[str], current_token: 'Token') -> List[int]:
         """
-        Encode standard instruction operand into byte list.
+        Encode DW directive operand: one little-endian 16-bit word per comma-separated value.
         
-        Args:
-            operand_str: Operand string from token (may be None)
-            instr_info: Instruction information from constants
-            current_token: Token context for error reporting
-            
-        Returns:
-            List of bytes representing the encoded operand
-            
         Raises:
-            AssemblerError: If operand encoding fails
+            AssemblerError: If DW operand encoding fails
         """
-        mnemonic_for_error = current_token.mnemonic or "directive"
-        expected_operand_bytes = instr_info.size - (1 if instr_info.opcode is not None else 0)
-
-        # No operand string provided
         if not operand_str:
-            if expected_operand_bytes > 0:
-                raise AssemblerError(f"Mnemonic '{mnemonic_for_error}' expects an operand, but none given.",
-                                     source_file=current_token.source_file, line_no=current_token.line_no)
-            return []
-
-        # Operand string provided but none expected
-        if expected_operand_bytes == 0: 
-            raise AssemblerError(f"Operand '{operand_str}' provided for {mnemonic_for_error} which takes no operand.",
+            raise AssemblerError(f"Mnemonic 'DW' expects an operand, but none given.",
                                  source_file=current_token.source_file, line_no=current_token.line_no)
 
-        # Parse and encode operand value
-        cleaned_operand_str = operand_str.lstrip('#').strip()
-        val = self._parse_value_or_symbol(cleaned_operand_str, f"operand for '{mnemonic_for_error}'", current_token)
-        
-        if expected_operand_bytes == 1: 
-            if not (0x00 <= val <= 0xFF): 
-                raise AssemblerError(f"Value 0x{val:X} ('{operand_str}') for {mnemonic_for_error} is out of 8-bit range (0x00-0xFF).",
-                                     source_file=current_token.source_file, line_no=current_token.line_no)
-            return [val & 0xFF]
-        elif expected_operand_bytes == 2: 
-            if not (0x0000 <= val <= 0xFFFF): 
-                raise AssemblerError(f"Value 0x{val:X} ('{operand_str}') for {mnemonic_for_error} is out of 16-bit range (0x0000-0xFFFF).",
+        table_bytes = numeric_data(operand_str, 2)
+        if table_bytes is not None:
+            return list(table_bytes)
+
+        output_bytes: List[int] = []
+        for item_text in split_data_items(operand_str):
+            word_val = self._parse_value_or_symbol(item_text.lstrip('#').strip(), f"operand for '{current_token.mnemonic}'", current_token)
+            if not (0x0000 <= word_val <= 0xFFFF):
+                raise AssemblerError(f"Value 0x{word_val:X} ('{item_text}') for {current_token.mnemonic} is out of 16-bit range (0x0000-0xFFFF).",
                                      source_file=current_token.source_file, line_no=current_token.line_no)
-            return [val & 0xFF, (val >> 8) & 0xFF] # Little-endian: LSB first
-        else:
-            raise AssemblerError(f"Internal error or unsupported operand size ({expected_operand_bytes} bytes) for {mnemonic_for_error}.",
-                                 source_file=current_token.source_file, line_no=current_token.line_no) 
+            output_bytes.extend((word_val & 0xFF, (word_val >> 8) & 0xFF)) # Little-endian: LSB first
+        return output_bytes
+
+    def _create_parser(self) -> Parser:
+        """First pass over the input: the Parser holding its symbols and tokens."""
+        return Parser(self.input_filepath, source_manager=self.source_manager, cache_dir=self.cache_dir)
 
     def assemble(self) -> None:
         """
@@ -895,9 +687,10 @@ class Assembler:
         
         # Parse input file and build symbol table
         try:
-            parser_instance = Parser(self.input_filepath)
+            parser_instance = self._create_parser()
             self.symbols = parser_instance.symbol_table
             self.parsed_tokens = parser_instance.tokens
+            self.dependencies = list(parser_instance.dependencies)
         except ParserError as e:
             logger.error(f"Parsing failed: {e}") 
             raise AssemblerError(f"Parser error: {e.base_message}", source_file=e.source_file, line_no=e.line_no) from e
@@ -906,7 +699,7 @@ class Assembler:
             raise AssemblerError(f"Unexpected parser error: {e_gen}")
 
         logger.info(f"Parsing phase complete. Symbols defined: {len(self.symbols)}, Tokens generated: {len(self.parsed_tokens)}")
-        if DEBUG:
+        if DEBUG and logger.isEnabledFor(logging.DEBUG):
             logger.debug("Symbol Table from Parser:")
             for s, v in sorted(self.symbols.items()): 
                 logger.debug(f"  {s}: 0x{v:04X}")
@@ -915,50 +708,308 @@ class Assembler:
         logger.info("Starting code generation (second pass)...")
         current_global_address = 0 
 
-        for token in self.parsed_tokens:
-            current_global_address = self._process_token(token, current_global_address)
+        # Each distinct mnemonic was resolved to its encoder kind and INSTRUCTION_SET entry
+        # when the parser stored the tokens; the encoders are bound once per mnemonic here,
+        # and EQU and label-only tokens are not even materialized
+        for token, encode, instr_info in self.parsed_tokens.dispatched(self._encoders()):
+            current_global_address = encode(token, current_global_address, instr_info)
         
         logger.info("Code generation (second pass) complete.")
 
-    def write_output_files(self) -> None:
+    def write_dependency_file(self, path: str, targets: Sequence[str]) -> None:
+        """
+        Write a Makefile-style dependency file (as with a C compiler's -MD/-MP): one
+        rule making the targets depend on every source, include and INCBIN file read,
+        plus an empty rule per dependency so make does not fail once one is deleted.
+
+        Raises:
+            AssemblerError: If the file cannot be written
+        """
+        lines = [f"{' '.join(_escape_make_path(target) for target in targets)}: "
+                 + " \\\n  ".join(_escape_make_path(dependency) for dependency in self.dependencies)]
+        lines += [f"\n{_escape_make_path(dependency)}:" for dependency in self.dependencies]
+        try:
+            dependency_dir = os.path.dirname(path)
+            if dependency_dir:
+                os.makedirs(dependency_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            logger.info(f"Wrote dependency file '{path}' ({len(self.dependencies)} dependencies).")
+        except OSError as e:
+            raise AssemblerError(f"IOError writing dependency file {path}: {e}")
+
+    def default_dependency_file(self) -> str:
+        """Where -MD puts the dependency file: next to the outputs, named after the input file."""
+        output_dir = os.path.dirname(self.regions[0].output_filename)
+        return os.path.join(output_dir, os.path.splitext(os.path.basename(self.input_filepath))[0] + ".d")
+
+    def memory_usage(self) -> List[RegionUsage]:
+        """Free-space/fragmentation summary of every configured region."""
+        return [region.usage() for region in self.regions]
+
+    def write_output_files(self) -> List[str]:
         """
         Write assembled output to files for each configured memory region.
         
-        Creates output directories as needed and writes hex format files containing
-        the assembled machine code for each memory region that has content.
+        Creates output directories as needed and writes one file per requested output
+        format (see output_formats.py) for each memory region that has content.
+
+        Returns:
+            Paths of the files written
         
         Raises:
             AssemblerError: If output directory creation or file writing fails
         """
-        if not self.regions:
-            logger.warning("No output regions defined. Nothing to write.")
+        return write_region_files(self.regions, self.output_formats)
+
+
+# How the low or high byte of a relocatable address is relocated
+_BYTE_RELOCATION_KINDS = {'LOW_BYTE': RELOC_LO8, 'HIGH_BYTE': RELOC_HI8}
+
+
+class _ObjectParser(Parser):
+    """
+    Parser for ObjectAssembler. The symbol table holds the labels before the
+    first ORG as offsets into the relocatable section; symbol_values also records
+    which values move with it (labels, and EQUs computed from them).
+    """
+    def __init__(self, main_input_filepath: str, source_manager: Optional[SourceManager] = None,
+                 cache_dir: Optional[str] = None) -> None:
+        # Symbol -> absolute value, or its value relative to the relocatable section
+        self.symbol_values: Dict[str, Union[int, RelocatableValue]] = {}
+        # Symbol -> why its value cannot be relocated (an error only if an operand uses it)
+        self.unrelocatable: Dict[str, str] = {}
+        self._equ_expressions: Dict[str, str] = {}
+        self._in_relocatable_section = True  # Until the first ORG
+        super().__init__(main_input_filepath, source_manager=source_manager, cache_dir=cache_dir)
+
+    def relocatable_value(self, name: str) -> Optional[Union[int, RelocatableValue]]:
+        """
+        Value of a symbol for evaluate_relocatable_expression, None if it is not defined.
+
+        Raises:
+            RelocationError: If the symbol's definition cannot be relocated
+        """
+        if name in self.unrelocatable:
+            raise RelocationError(f"the value of '{name}' cannot be relocated: {self.unrelocatable[name]}")
+        return self.symbol_values.get(name)
+
+    def _update_symbol_table_and_address(self, label_name_for_symbol_table: Optional[str],
+                                         final_mnemonic: str, final_operand: Optional[str],
+                                         effective_address: int, normalized_filepath: str, line_no_in_file: int) -> int:
+        mnem_upper = final_mnemonic.upper()
+        if mnem_upper == 'EQU' and label_name_for_symbol_table and final_operand:
+            self._equ_expressions.setdefault(label_name_for_symbol_table, final_operand)
+        effective_address = super()._update_symbol_table_and_address(
+            label_name_for_symbol_table, final_mnemonic, final_operand,
+            effective_address, normalized_filepath, line_no_in_file)
+        if mnem_upper == 'ORG':
+            self._in_relocatable_section = False
+        return effective_address
+
+    def _add_symbol_to_table(self, label: str, value: int, source_file: str, line_no: int) -> None:
+        super()._add_symbol_to_table(label, value, source_file, line_no)
+        if label in self.symbol_values or label in self.unrelocatable:
             return
+        expression = self._equ_expressions.get(label)
+        if expression is not None:
+            self._evaluate_relocatable_equ(label, expression)  # A literal or another symbol's name
+        elif self._in_relocatable_section:
+            self.symbol_values[label] = RelocatableValue(None, value)
+        else:
+            self.symbol_values[label] = value
 
-        for region in self.regions:
-            if not region.has_emitted_any_content:
-                logger.info(f"No data assembled for region '{region.name}'. Skipping file write for '{region.output_filename}'.")
+    def _evaluate_equ(self, label: str, pending: PendingEqu) -> int:
+        # The symbol table gets the value with the section at 0, like the labels
+        self._evaluate_relocatable_equ(label, pending.expression)
+        value = self.symbol_values.get(label)
+        if value is None:
+            return super()._evaluate_equ(label, pending)
+        return value.at(0) if isinstance(value, RelocatableValue) else value
+
+    def _evaluate_relocatable_equ(self, label: str, expression: str) -> None:
+        try:
+            self.symbol_values[label] = evaluate_relocatable_expression(expression, self.relocatable_value)
+        except RelocationError as e:
+            self.unrelocatable[label] = str(e)
+        except ExpressionError:
+            pass  # Reported by the Parser's own evaluation
+
+
+class ObjectAssembler(Assembler):
+    """
+    Assembles a module into a relocatable object file (see object_file.py) instead
+    of region images, for linking with linker.py.
+
+    Code and data before the module's first ORG form the relocatable section,
+    assembled at offset 0; each ORG starts an absolute section. The module is
+    parsed once, and its labels in the relocatable section (and EQUs computed
+    from them) are RelocatableValues; so are the symbols it uses but does not
+    define, which are imported. Operands are evaluated with those values carried
+    through the expression (evaluate_relocatable_expression): one that reduces to
+    a RelocatableValue becomes a relocation, and its field is assembled as zero.
+    """
+    def __init__(self, input_filepath: str, output_specifier: Optional[str], region_configs: Optional[List[Tuple[str, str, str]]] = None,
+                 cache_dir: Optional[str] = None, output_formats: Optional[List[str]] = None,
+                 source_manager: Optional[SourceManager] = None) -> None:
+        if region_configs:
+            raise AssemblerError("Memory regions are chosen when linking; --region cannot be combined with --object.")
+        super().__init__(input_filepath, output_specifier, None, cache_dir, output_formats, source_manager)
+        self.object_file = ObjectFile(os.path.normpath(input_filepath))
+        self._parser: Optional[_ObjectParser] = None
+        self._section_start = 0
+        # Relocatable value of each operand value resolved for the current token, None if absolute
+        self._operand_relocations: List[Optional[RelocatableValue]] = []
+
+    def _create_parser(self) -> Parser:
+        self._parser = _ObjectParser(self.input_filepath, source_manager=self.source_manager, cache_dir=self.cache_dir)
+        return self._parser
+
+    def _operand_symbol(self, name: str) -> Union[int, RelocatableValue]:
+        """Value of a symbol used in an operand; a symbol the module does not define is imported."""
+        value = self._parser.relocatable_value(name)
+        if value is not None:
+            return value
+        if name not in self.object_file.imports:
+            self.object_file.imports.append(name)
+        return RelocatableValue(name, 0)
+
+    def _resolve_expression_to_int(self, expression_str: str, current_token: 'Token') -> int:
+        """
+        Resolve an operand, recording the relocation it needs (if any) for the
+        encoder to place; relocated values are returned as 0.
+
+        Raises:
+            AssemblerError: If the expression is malformed or cannot be relocated
+        """
+        try:
+            value = evaluate_relocatable_expression(expression_str, self._operand_symbol)
+        except RelocationError as e:
+            raise AssemblerError(f"Operand '{expression_str}' cannot be relocated: {e}",
+                                 source_file=current_token.source_file, line_no=current_token.line_no) from e
+        except ExpressionError as e:
+            raise AssemblerError(str(e), source_file=current_token.source_file, line_no=current_token.line_no) from e
+        if isinstance(value, RelocatableValue):
+            self._operand_relocations.append(value)
+            return 0
+        self._operand_relocations.append(None)
+        return value
+
+    def _add_relocations(self, token: 'Token', fields: Sequence[Tuple[int, int]]) -> None:
+        """Record the relocations resolved for a token's operand fields, given as (address, size)."""
+        for value, (address, size) in zip(self._operand_relocations, fields):
+            if value is None:
                 continue
+            if value.byte is not None:
+                kind = _BYTE_RELOCATION_KINDS[value.byte]
+            else:
+                kind = RELOC_WORD if size == 2 else RELOC_BYTE
+            self.object_file.relocations.append(Relocation(len(self.object_file.sections) - 1, address - self._section_start,
+                                                           kind, value.base, value.offset, token.source_file, token.line_no))
+        self._operand_relocations = []
+
+    def _encode_org(self, token: 'Token', current_global_address: int, instr_info: Optional['InstrInfo']) -> int:
+        self._operand_relocations = []
+        address = super()._encode_org(token, current_global_address, instr_info)
+        if any(self._operand_relocations):
+            raise AssemblerError(f"ORG operand '{token.operand}' must be absolute in a relocatable module.",
+                                 source_file=token.source_file, line_no=token.line_no)
+        self.object_file.sections.append(ObjectSection(f"ORG_{address:04X}", address))
+        self._section_start = address
+        return address
+
+    def _encode_imm8(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        self._operand_relocations = []
+        next_address = super()._encode_imm8(token, current_global_address, instr_info)
+        self._add_relocations(token, [(current_global_address + 1, 1)])
+        return next_address
+
+    def _encode_abs16(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        self._operand_relocations = []
+        next_address = super()._encode_abs16(token, current_global_address, instr_info)
+        self._add_relocations(token, [(current_global_address + 1, 2)])
+        return next_address
+
+    def _encode_dw(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        self._operand_relocations = []
+        next_address = super()._encode_dw(token, current_global_address, instr_info)
+        self._add_relocations(token, [(current_global_address + 2 * index, 2)
+                                      for index in range(len(self._operand_relocations))])
+        return next_address
+
+    def _encode_db(self, token: 'Token', current_global_address: int, instr_info: 'InstrInfo') -> int:
+        if not token.operand:
+            return super()._encode_db(token, current_global_address, instr_info)
+        # Item by item, to know where each relocated byte goes
+        data_bytes: List[int] = []
+        for item_text in split_data_items(token.operand):
+            self._operand_relocations = []
+            item_bytes = self._encode_db_operand(item_text, token)
+            self._add_relocations(token, [(current_global_address + len(data_bytes), 1)])
+            data_bytes.extend(item_bytes)
+        self._emit_bytes(data_bytes, current_global_address, token)
+        return current_global_address + len(data_bytes)
+
+    def _emit_bytes(self, byte_values: Sequence[int], global_address: int, token: 'Token', has_opcode: bool = False) -> None:
+        if global_address + len(byte_values) > 0x10000:
+            raise AssemblerError(f"'{token.mnemonic}' at 0x{global_address:04X} extends past address $FFFF.",
+                                 source_file=token.source_file, line_no=token.line_no)
+        offset = global_address - self._section_start
+        self.object_file.sections[-1].data[offset:offset + len(byte_values)] = bytes(byte_values)
 
-            output_dir = os.path.dirname(region.output_filename)
-            if output_dir: 
-                try:
-                    os.makedirs(output_dir, exist_ok=True)
-                    logger.debug(f"Ensured directory exists: {output_dir}")
-                except OSError as e:
-                    logger.error(f"Could not create directory {output_dir} for region '{region.name}': {e}")
-                    raise AssemblerError(f"Failed to create output directory {output_dir}: {e}")
+    def assemble(self) -> None:
+        """
+        Assemble the module into self.object_file.
 
-            try:
-                with open(region.output_filename, "w") as f:
-                    f.write("\n".join(region.lines))
-                    if region.lines and not region.lines[-1].endswith("\n"):
-                         f.write("\n") 
-                logger.info(f"Wrote output for region '{region.name}' to '{region.output_filename}' ({len(region.lines)} lines).")
-            except IOError as e:
-                logger.error(f"Could not write to file '{region.output_filename}' for region '{region.name}': {e}")
-                raise AssemblerError(f"IOError writing to {region.output_filename}: {e}")
-                
-def main(input_filepath: str, output_specifier: str, region_definitions: Optional[List[Tuple[str,str,str]]]) -> None:
+        Raises:
+            AssemblerError: If parsing or assembly fails, or an operand cannot be relocated
+        """
+        self.object_file.sections.append(ObjectSection(RELOCATABLE_SECTION_NAME, None))
+        self._section_start = 0
+        super().assemble()
+        kept = [index for index, section in enumerate(self.object_file.sections) if section.data]
+        new_index = {old: new for new, old in enumerate(kept)}
+        self.object_file.sections = [self.object_file.sections[index] for index in kept]
+        self.object_file.relocations = [relocation._replace(section=new_index[relocation.section])
+                                        for relocation in self.object_file.relocations]
+        for name, value in self._parser.symbol_values.items():
+            if '.' in name:
+                continue  # Local labels stay private
+            if not isinstance(value, RelocatableValue):
+                self.object_file.exports[name] = ObjectSymbol(value, False)
+            elif value.byte is None:  # A byte of an address cannot be linked as a symbol
+                self.object_file.exports[name] = ObjectSymbol(value.offset, True)
+        logger.info(f"Object for '{self.input_filepath}': {len(self.object_file.sections)} section(s), "
+                    f"{len(self.object_file.relocations)} relocation(s), {len(self.object_file.exports)} export(s), "
+                    f"{len(self.object_file.imports)} import(s).")
+
+    def memory_usage(self) -> List[RegionUsage]:
+        return []  # Regions are filled by the linker
+
+    def write_output_files(self) -> List[str]:
+        """
+        Write the object file to the output path.
+
+        Returns:
+            The path written (none without an output path)
+
+        Raises:
+            AssemblerError: If the file cannot be written
+        """
+        if not self.output_specifier:
+            return []
+        try:
+            self.object_file.save(self.output_specifier)
+        except OSError as e:
+            raise AssemblerError(f"IOError writing object file {self.output_specifier}: {e}")
+        logger.info(f"Wrote object file '{self.output_specifier}'.")
+        return [self.output_specifier]
+
+
+def main(input_filepath: str, output_specifier: str, region_definitions: Optional[List[Tuple[str,str,str]]],
+         cache_dir: Optional[str] = None, output_formats: Optional[List[str]] = None,
+         memory_report: bool = False, source_manager: Optional[SourceManager] = None,
+         dependency_file: Optional[str] = None, object_output: bool = False) -> List[str]:
     """
     Main assembly function that orchestrates the complete assembly process.
     
@@ -966,6 +1017,17 @@ def main(input_filepath: str, output_specifier: str, region_definitions: Optiona
         input_filepath: Path to the input assembly file
         output_specifier: Output file path or directory for assembled output
         region_definitions: Optional list of memory region definitions (name, start_hex, end_hex)
+        cache_dir: Optional directory for the persistent parse cache shared between runs
+        output_formats: Output formats to write (default: readmemh only)
+        memory_report: Log each region's used/free space and fragmentation after assembly
+        source_manager: Source file cache shared with earlier assemblies (default: a fresh one)
+        dependency_file: Path of a Makefile-style dependency file to write for the outputs,
+                         or "" for the default next to them (None: no dependency file)
+        object_output: Write a relocatable object file to output_specifier instead of
+                       region images (see ObjectAssembler)
+
+    Returns:
+        Paths of the output files written
         
     Raises:
         ParserError: If parsing the assembly file fails
@@ -973,27 +1035,255 @@ def main(input_filepath: str, output_specifier: str, region_definitions: Optiona
         ValueError: If unexpected value errors occur during processing
     """
     try:
-        asm = Assembler(input_filepath, output_specifier, region_definitions)
-        asm.assemble()
-        asm.write_output_files()
+        return _assemble_and_write(input_filepath, output_specifier, region_definitions, cache_dir, output_formats,
+                                   memory_report, source_manager, dependency_file, object_output)[1]
     except (ParserError, AssemblerError, ValueError) as e: 
-        if isinstance(e, ValueError) and not isinstance(e, (ParserError, AssemblerError)):
-             logger.error(f"Assembly failed due to unexpected value error: {e}", exc_info=True)
-        else:
-            logger.error(f"Assembly failed: {e}") 
+        _log_assembly_failure(e)
         raise 
 
-if __name__ == "__main__":
-    default_input = "prog.asm" 
-    default_output = "prog.hex"
 
-    argp = argparse.ArgumentParser(description="Custom 8-bit CPU Assembler")
-    argp.add_argument("input", nargs="?", default=default_input, help=f"Input assembly file (default: {default_input})")
+def _assemble_and_write(input_filepath: str, output_specifier: str, region_definitions: Optional[List[Tuple[str,str,str]]],
+                        cache_dir: Optional[str], output_formats: Optional[List[str]], memory_report: bool,
+                        source_manager: Optional[SourceManager], dependency_file: Optional[str],
+                        object_output: bool = False) -> Tuple['Assembler', List[str]]:
+    """main() without its error logging; also returns the Assembler (for its dependencies)."""
+    assembler_class = ObjectAssembler if object_output else Assembler
+    asm = assembler_class(input_filepath, output_specifier, region_definitions, cache_dir, output_formats, source_manager)
+    asm.assemble()
+    written = asm.write_output_files()
+    if dependency_file is not None:
+        if written:
+            asm.write_dependency_file(dependency_file or asm.default_dependency_file(), written)
+        else:
+            logger.info("No output files were written; no dependency file either.")
+    if memory_report:
+        for usage in asm.memory_usage():
+            for line in usage.describe():
+                logger.info(line)
+    return asm, written
+
+
+def _log_assembly_failure(e: Exception) -> None:
+    if isinstance(e, ValueError) and not isinstance(e, (ParserError, AssemblerError)):
+        logger.error(f"Assembly failed due to unexpected value error: {e}", exc_info=True)
+    else:
+        logger.error(f"Assembly failed: {e}")
+
+
+# Seconds between two polls of the watched files' mtime/size
+DEFAULT_WATCH_INTERVAL_S = 0.25
+
+
+class SourceWatcher:
+    """
+    Reassembles a program whenever a file of its closure (main file, INCLUDEs,
+    INCBINs) changes, for --watch.
+
+    Files are polled by mtime/size. One SourceManager is kept for the whole
+    session, so a reassembly only reloads and rescans the files that changed;
+    untouched includes keep their scanned lines and macro definitions in memory.
+    A failed assembly keeps watching the files read so far, so fixing the error
+    triggers the next attempt.
+    """
+    def __init__(self, input_filepath: str, output_specifier: str, region_definitions: Optional[List[Tuple[str,str,str]]],
+                 cache_dir: Optional[str] = None, output_formats: Optional[List[str]] = None,
+                 memory_report: bool = False, dependency_file: Optional[str] = None,
+                 poll_interval: float = DEFAULT_WATCH_INTERVAL_S, object_output: bool = False) -> None:
+        self.input_filepath = input_filepath
+        self.output_specifier = output_specifier
+        self.region_definitions = region_definitions
+        self.cache_dir = cache_dir
+        self.output_formats = output_formats
+        self.memory_report = memory_report
+        self.dependency_file = dependency_file
+        self.poll_interval = poll_interval
+        self.object_output = object_output
+        self.source_manager = SourceManager(ParseCache(cache_dir) if cache_dir else None)
+        # Watched path -> (mtime_ns, size) when last assembled, None if it did not exist
+        self.watched: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.build_count = 0
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def build(self) -> bool:
+        """
+        Assemble and write the outputs once, then take the new set of watched files
+        with their signatures from before the assembly read them.
+        Failures are logged, never raised.
+
+        Returns:
+            True if the assembly succeeded
+        """
+        start = time.perf_counter()
+        loads_before = self.source_manager.load_count
+        # Signatures are taken before assembling, so a save made during the build is still seen as a change
+        known = [os.path.normpath(self.input_filepath), *self.watched, *self.source_manager.paths()]
+        signatures = {path: self._signature(path) for path in known}
+        try:
+            asm, _ = _assemble_and_write(self.input_filepath, self.output_specifier, self.region_definitions,
+                                         self.cache_dir, self.output_formats, self.memory_report,
+                                         self.source_manager, self.dependency_file, self.object_output)
+            succeeded = True
+            closure = list(asm.dependencies)
+            # Files no longer included are not kept in memory for the rest of the session
+            for path in self.source_manager.paths():
+                if path not in closure:
+                    self.source_manager.invalidate(path)
+        except (ParserError, AssemblerError, ValueError) as e:
+            _log_assembly_failure(e)
+            succeeded = False
+            closure = list(dict.fromkeys([os.path.normpath(self.input_filepath), *self.watched,
+                                          *self.source_manager.paths()]))
+        # Sources first loaded by this build keep the signature recorded when they were read
+        signatures.update((path, signature) for path, signature in self.source_manager.signatures().items()
+                          if path not in signatures)
+        self.watched = {path: signatures[path] if path in signatures else self._signature(path) for path in closure}
+        self.build_count += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Assembly {self.build_count} {'succeeded' if succeeded else 'FAILED'} in {elapsed_ms:.1f} ms "
+                    f"({self.source_manager.load_count - loads_before} of {len(self.watched)} watched file(s) reloaded)")
+        return succeeded
+
+    def changed_files(self) -> List[str]:
+        """Watched files whose mtime/size differs from when they were last assembled."""
+        return [path for path, signature in self.watched.items() if self._signature(path) != signature]
+
+    def run(self) -> None:
+        """Assemble, then reassemble on every change until KeyboardInterrupt."""
+        self.build()
+        logger.info(f"Watching {len(self.watched)} file(s) for changes (Ctrl+C to stop)...")
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                changed = self.changed_files()
+                if changed:
+                    logger.info(f"Changed: {', '.join(os.path.basename(path) for path in changed)}")
+                    self.build()
+        except KeyboardInterrupt:
+            logger.info(f"Watch stopped after {self.build_count} assembly(ies).")
+
+
+class Diagnostic(NamedTuple):
+    """A warning logged while assembling, with its source location when known."""
+    level: str                  # Logging level name, e.g. "WARNING"
+    message: str
+    source_file: Optional[str]
+    line_no: Optional[int]
+
+
+@dataclass
+class AssemblyResult:
+    """In-memory outcome of assemble_source: region images, symbols and diagnostics."""
+    regions: List[MemoryRegion]
+    symbols: Dict[str, int]
+    diagnostics: List[Diagnostic]
+
+    def region(self, name: str) -> MemoryRegion:
+        """
+        Raises:
+            KeyError: If no region has that name
+        """
+        for region in self.regions:
+            if region.name == name:
+                return region
+        raise KeyError(name)
+
+    def image(self, name: str) -> bytes:
+        """Raw image of a region, one byte per address (0x00 where nothing was emitted)."""
+        return bytes(self.region(name).data)
+
+    def render(self, name: str, format_name: str = "readmemh") -> bytes:
+        """A region's content in one of the output formats (see output_formats.py), without writing it."""
+        return render(self.region(name), format_name)
+
+
+class _DiagnosticCollector(logging.Handler):
+    """Collects WARNING and above records logged by the calling thread."""
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.thread_id = threading.get_ident()
+        self.diagnostics: List[Diagnostic] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.thread != self.thread_id:
+            return
+        self.diagnostics.append(Diagnostic(record.levelname, record.getMessage(),
+                                           getattr(record, "source_file", None), getattr(record, "line_no", None)))
+
+
+@contextmanager
+def collect_diagnostics() -> Iterator[List[Diagnostic]]:
+    """
+    Collect the warnings and errors the assembler and parser log in the calling thread
+    while the block runs; the yielded list is filled in place. Records are not passed
+    on to Python's last-resort stderr handler, but still propagate to any configured ones.
+    """
+    collector = _DiagnosticCollector()
+    loggers = [logger, logging.getLogger(Parser.__module__)]
+    for module_logger in loggers:
+        module_logger.addHandler(collector)
+    try:
+        yield collector.diagnostics
+    finally:
+        for module_logger in loggers:
+            module_logger.removeHandler(collector)
+
+
+def assemble_source(source: Union[str, os.PathLike], regions: Optional[List[Tuple[str, str, str]]] = None,
+                    source_name: str = "<source>.asm", source_manager: Optional[SourceManager] = None) -> AssemblyResult:
+    """
+    Assemble a program in-process and return the result in memory.
+
+    Nothing is written to disk and no logging configuration is installed: the
+    assembler's warnings for this call are returned as diagnostics rather than
+    printed (errors raise, as with main()).
+
+    Args:
+        source: Assembly source text (str), or the path of the main source file (os.PathLike)
+        regions: Memory region definitions (name, start_hex, end_hex) as for --region
+                 (default: a single DEFAULT_OUTPUT region covering 0x0000-0xFFFF)
+        source_name: Path the source text is assembled as; relative INCLUDE/INCBIN paths
+                     start from its directory (ignored when source is a path)
+        source_manager: Source file cache to reuse across calls (default: a fresh one)
+
+    Returns:
+        AssemblyResult with the region images, the symbol table and the diagnostics
+
+    Raises:
+        AssemblerError: If parsing or assembly fails
+    """
+    if source_manager is None:
+        source_manager = SourceManager()
+    if isinstance(source, os.PathLike):
+        input_filepath = os.fspath(source)
+    else:
+        input_filepath = os.path.normpath(os.path.abspath(source_name))
+        source_manager.add_text(input_filepath, source)
+
+    with collect_diagnostics() as diagnostics:
+        asm = Assembler(input_filepath, None, regions, source_manager=source_manager)
+        asm.assemble()
+    return AssemblyResult(regions=asm.regions, symbols=asm.symbols, diagnostics=diagnostics)
+
+DEFAULT_INPUT = "prog.asm"
+DEFAULT_OUTPUT = "prog.hex"
+
+
+def build_argument_parser(parser_class: type = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """Command-line interface of assembler.py (also used to parse assembler server jobs)."""
+    argp = parser_class(description="Custom 8-bit CPU Assembler")
+    argp.add_argument("input", nargs="?", default=DEFAULT_INPUT, help=f"Input assembly file (default: {DEFAULT_INPUT})")
     argp.add_argument(
         "output_specifier", 
         nargs="?",
-        default=default_output,
-        help=f"Default output file if no --region is specified, OR the output directory if --region is used (default: {default_output})."
+        default=DEFAULT_OUTPUT,
+        help=f"Default output file if no --region is specified, OR the output directory if --region is used (default: {DEFAULT_OUTPUT})."
     )
     argp.add_argument(
         "--region",
@@ -1003,19 +1293,130 @@ if __name__ == "__main__":
         dest="regions_arg", 
         help="Define a memory region: NAME START_ADDR_HEX END_ADDR_HEX. Output file will be NAME.hex. Example: --region ROM F000 FFFF"
     )
-    args = argp.parse_args()
+    argp.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        help="Directory for a persistent parse cache of source/include files, reused by later runs (disabled by default)"
+    )
+    argp.add_argument(
+        "--format",
+        action="extend",
+        nargs="+",
+        choices=list(OUTPUT_FORMATS),
+        dest="formats",
+        help="Output format(s) to write from the same assembly, e.g. --format readmemh bin ihex srec. "
+             "Files are NAME.hex, NAME.bin, NAME.ihx and NAME.srec (default: readmemh)"
+    )
+    argp.add_argument(
+        "--memory-report",
+        action="store_true",
+        dest="memory_report",
+        help="After assembly, report each region's used and free bytes, its free blocks and their fragmentation"
+    )
+    argp.add_argument(
+        "-MD",
+        action="store_true",
+        dest="write_dependencies",
+        help="Also write a Makefile-style dependency file listing every source, include and INCBIN file "
+             "the outputs were built from: INPUT_NAME.d next to the outputs, unless -MF is given"
+    )
+    argp.add_argument(
+        "-MF",
+        dest="dependency_file",
+        metavar="FILE",
+        help="Write the dependency file to FILE (implies -MD)"
+    )
+    argp.add_argument(
+        "--object",
+        action="store_true",
+        dest="object_output",
+        help="Assemble the input as a module into a relocatable object file written to output_specifier, "
+             "for linking with linker.py (asm-link); --region is chosen at link time instead"
+    )
+    argp.add_argument(
+        "--no-log-file",
+        action="store_false",
+        dest="log_file",
+        help="Log to the console only, without (over)writing assembler.log; for batch tools running "
+             "several assemblies at once, which capture each one's console output"
+    )
+    argp.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay running and reassemble whenever the input or any file it includes changes, "
+             "reporting each reassembly's latency (Ctrl+C to stop)"
+    )
+    argp.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL_S,
+        dest="watch_interval",
+        metavar="SECONDS",
+        help=f"Seconds between two checks of the watched files (default: {DEFAULT_WATCH_INTERVAL_S})"
+    )
+    return argp
+
+
+def _escape_make_path(file_path: str) -> str:
+    return file_path.replace("$", "$$").replace(" ", "\\ ").replace("#", "\\#")
+
+
+def _unescape_make_path(word: str) -> str:
+    return word.replace("\\#", "#").replace("\\ ", " ").replace("$$", "$")
+
+
+def read_dependency_file(path: str) -> Tuple[List[str], List[str]]:
+    """
+    Read back a dependency file written by Assembler.write_dependency_file.
+
+    Returns:
+        (targets, dependencies): the files the assembly wrote and the files it read
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it does not start with a dependency rule
+    """
+    with open(path) as f:
+        rule = f.read().split("\n\n", 1)[0].replace("\\\n", " ")
+    words = [word for word in re.split(r'(?<!\\) ', rule.strip()) if word]
+    colon = next((index for index, word in enumerate(words) if word.endswith(":")), None)
+    if colon is None:
+        raise ValueError(f"'{path}' is not a dependency file.")
+    words[colon] = words[colon][:-1]
+    return ([_unescape_make_path(word) for word in words[:colon + 1]],
+            [_unescape_make_path(word) for word in words[colon + 1:]])
+
+
+def dependency_file_argument(args: argparse.Namespace) -> Optional[str]:
+    """main()'s dependency_file argument for parsed -MD/-MF options."""
+    if args.dependency_file:
+        return args.dependency_file
+    return "" if args.write_dependencies else None
+
+
+if __name__ == "__main__":
+    args = build_argument_parser().parse_args()
 
     SCRIPT_DIR_ASM = os.path.dirname(os.path.abspath(__file__)) 
     ASSEMBLER_BASE_DIR = os.path.dirname(SCRIPT_DIR_ASM)      
     LOG_FILE_PATH = os.path.join(ASSEMBLER_BASE_DIR, "assembler.log")
 
+    log_handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if args.log_file:
+        log_handlers.insert(0, logging.FileHandler(LOG_FILE_PATH, mode='w'))
     logging.basicConfig(
         level=logging.DEBUG if DEBUG else logging.INFO,
         format="%(levelname)-8s [%(filename)s:%(lineno)d %(funcName)s] %(message)s" if DEBUG else "%(levelname)s: %(message)s",
-        handlers=[logging.FileHandler(LOG_FILE_PATH, mode='w'), logging.StreamHandler()],
+        handlers=log_handlers,
     )
 
+    if args.watch:
+        SourceWatcher(args.input, args.output_specifier, args.regions_arg, args.cache_dir, args.formats,
+                      args.memory_report, dependency_file_argument(args), args.watch_interval,
+                      args.object_output).run()
+        exit(0)
     try:
-        main(args.input, args.output_specifier, args.regions_arg)
+        main(args.input, args.output_specifier, args.regions_arg, args.cache_dir, args.formats, args.memory_report,
+             dependency_file=dependency_file_argument(args), object_output=args.object_output)
     except Exception: 
         exit(1)
\ No newline at end of file
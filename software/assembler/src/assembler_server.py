@@ -0,0 +1,226 @@
+# software/assembler/src/assembler_server.py
+"""
+Long-lived assembler server: assembles jobs sent over a local Unix socket, so
+callers such as test_manager.py skip the interpreter startup per program and
+reuse the source files, scanned lines and macro definitions already held by the
+server (files are revalidated against their mtime/size on every job).
+
+Run:
+    python software/assembler/src/assembler_server.py [--socket PATH]
+
+Protocol: one JSON object per line in each direction, one request per connection.
+
+  {"command": "assemble", "argv": [<assembler.py arguments>], "cwd": "<dir>"}
+      -> {"ok": true|false, "outputs": [<files written>], "error": <message or null>,
+          "diagnostics": [{"level", "message", "source_file", "line_no"}, ...],
+          "elapsed_ms": <assembly time>}
+  {"command": "ping"}      -> {"ok": true, "pid": <server pid>, "jobs": <jobs served>}
+  {"command": "shutdown"}  -> {"ok": true}, then the server exits
+
+Relative input, output, --cache-dir and -MF paths in argv are taken relative to cwd.
+Jobs are served one at a time, in arrival order.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from assembler import (build_argument_parser, collect_diagnostics, dependency_file_argument,
+                           main as assemble_main, AssemblerError)
+    from parser import ParserError
+    from parse_cache import ParseCache
+    from source_manager import SourceManager
+except ImportError:
+    from .assembler import (build_argument_parser, collect_diagnostics, dependency_file_argument,
+                            main as assemble_main, AssemblerError)
+    from .parser import ParserError
+    from .parse_cache import ParseCache
+    from .source_manager import SourceManager
+
+logger = logging.getLogger(__name__)
+
+ASSEMBLER_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOCKET_ENV_VAR = "ASSEMBLER_SERVER_SOCKET"
+DEFAULT_SOCKET_PATH = os.path.join(ASSEMBLER_BASE_DIR, ".assembler_server.sock")
+
+# Seconds a client waits for a job's response
+CLIENT_TIMEOUT_S = 120.0
+
+
+def server_socket_path() -> str:
+    """Socket path used by default: $ASSEMBLER_SERVER_SOCKET, else DEFAULT_SOCKET_PATH."""
+    return os.environ.get(SOCKET_ENV_VAR) or DEFAULT_SOCKET_PATH
+
+
+class _ArgumentError(Exception):
+    """Raised instead of argparse exiting the server on a malformed job."""
+
+
+class _JobArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str) -> None:
+        raise _ArgumentError(message)
+
+
+class AssemblerServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server running assembler jobs in-process. One SourceManager is kept
+    per parse cache directory, so every job with the same --cache-dir shares it.
+    """
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+        self.job_count = 0
+        self._source_managers: Dict[Optional[str], SourceManager] = {}
+        self._job_parser = build_argument_parser(_JobArgumentParser)
+        super().__init__(socket_path, _JobHandler)
+
+    def source_manager_for(self, cache_dir: Optional[str]) -> SourceManager:
+        if cache_dir not in self._source_managers:
+            self._source_managers[cache_dir] = SourceManager(ParseCache(cache_dir) if cache_dir else None)
+        return self._source_managers[cache_dir]
+
+    def run_job(self, argv: List[str], cwd: str) -> Dict[str, Any]:
+        """Assemble one job; failures are reported in the response, never raised."""
+        start = time.perf_counter()
+        response: Dict[str, Any] = {"ok": False, "outputs": [], "diagnostics": [], "error": None}
+        try:
+            args = self._job_parser.parse_args(argv)
+        except _ArgumentError as e:
+            response["error"] = f"Invalid assembler arguments: {e}"
+            return response
+
+        input_path = os.path.join(cwd, args.input)
+        output_specifier = os.path.join(cwd, args.output_specifier)
+        cache_dir = os.path.normpath(os.path.join(cwd, args.cache_dir)) if args.cache_dir else None
+        dependency_file = dependency_file_argument(args)
+        if dependency_file:
+            dependency_file = os.path.join(cwd, dependency_file)
+        with collect_diagnostics() as diagnostics:
+            try:
+                response["outputs"] = assemble_main(input_path, output_specifier, args.regions_arg, cache_dir,
+                                                    args.formats, args.memory_report, self.source_manager_for(cache_dir),
+                                                    dependency_file, args.object_output)
+                response["ok"] = True
+            except (ParserError, AssemblerError, ValueError) as e:
+                response["error"] = str(e)
+            except Exception as e:
+                logger.error(f"Unexpected error in job for '{input_path}': {e}", exc_info=True)
+                response["error"] = f"Unexpected assembler error: {e}"
+        response["diagnostics"] = [diagnostic._asdict() for diagnostic in diagnostics]
+        response["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        self.job_count += 1
+        logger.info(f"Job {self.job_count}: {input_path} {'ok' if response['ok'] else 'FAILED'} "
+                    f"in {response['elapsed_ms']:.1f} ms")
+        return response
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    server: AssemblerServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as e:
+            self._respond({"ok": False, "error": f"Malformed request: {e}"})
+            return
+
+        command = request.get("command", "assemble")
+        if command == "ping":
+            self._respond({"ok": True, "pid": os.getpid(), "jobs": self.server.job_count})
+        elif command == "shutdown":
+            self._respond({"ok": True})
+            # shutdown() waits for serve_forever, which is running this handler
+            threading.Thread(target=self.server.shutdown).start()
+        elif command == "assemble":
+            self._respond(self.server.run_job([str(arg) for arg in request.get("argv", [])],
+                                              request.get("cwd") or os.getcwd()))
+        else:
+            self._respond({"ok": False, "error": f"Unknown command: {command}"})
+
+    def _respond(self, response: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+def send_request(request: Dict[str, Any], socket_path: Optional[str] = None,
+                 timeout: float = CLIENT_TIMEOUT_S) -> Dict[str, Any]:
+    """
+    Send one request to a running server and return its response.
+
+    Raises:
+        OSError: If no server is listening on the socket (FileNotFoundError /
+                 ConnectionRefusedError) or the connection fails
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path or server_socket_path())
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("Assembler server closed the connection without a response")
+    return json.loads(line)
+
+
+def assemble_via_server(argv: List[str], cwd: Optional[str] = None,
+                        socket_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run an assembly job (assembler.py command-line arguments) on the server.
+
+    Raises:
+        OSError: If the server is not running
+    """
+    return send_request({"command": "assemble", "argv": list(argv), "cwd": cwd or os.getcwd()}, socket_path)
+
+
+def server_running(socket_path: Optional[str] = None) -> bool:
+    try:
+        return send_request({"command": "ping"}, socket_path, timeout=2.0).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+def serve(socket_path: str) -> None:
+    """
+    Serve jobs until a shutdown request or KeyboardInterrupt.
+
+    Raises:
+        OSError: If another server is already listening on socket_path
+    """
+    if os.path.exists(socket_path):
+        if server_running(socket_path):
+            raise OSError(f"An assembler server is already listening on {socket_path}")
+        os.unlink(socket_path)  # Left behind by a server that did not exit cleanly
+
+    with AssemblerServer(socket_path) as server:
+        logger.info(f"Assembler server listening on {socket_path} (pid {os.getpid()})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+    logger.info(f"Assembler server stopped after {server.job_count} job(s)")
+
+
+if __name__ == "__main__":
+    argp = argparse.ArgumentParser(description="Assembler server: runs assembler.py jobs sent over a Unix socket")
+    argp.add_argument("--socket", default=server_socket_path(),
+                      help=f"Socket path (default: ${SOCKET_ENV_VAR} or {DEFAULT_SOCKET_PATH})")
+    args = argp.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    # Per-job progress from the assembler and parser would drown the job log; their
+    # warnings and errors still reach each job's diagnostics
+    for module_name in (assemble_main.__module__, ParserError.__module__):
+        logging.getLogger(module_name).setLevel(logging.WARNING)
+    try:
+        serve(args.socket)
+    except OSError as e:
+        logger.error(str(e))
+        exit(1)
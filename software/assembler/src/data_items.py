@@ -0,0 +1,55 @@
+# software/assembler/src/data_items.py
+"""
+Shared, cached handling of DB/DW operands for the parser (sizing) and the
+assembler (encoding).
+
+Both passes see the same operand strings, so the item split and the batch
+conversion of plain numeric tables are cached by operand text: a data line is
+split (and, if it is all literals, converted) once, in pass 1, and pass 2
+reuses the result.
+"""
+import re
+import struct
+from functools import lru_cache
+from typing import Optional, Tuple
+
+try:
+    from .lexer import split_operands
+except ImportError:
+    from lexer import split_operands
+
+# Upper bound on distinct DB/DW operand strings kept cached
+DATA_CACHE_SIZE = 16384
+
+# One plain numeric literal: $hex, %binary or decimal, optionally '#'-prefixed
+_LITERAL = r'#?(?:\$([0-9A-Fa-f]+)|%([01]+)|(\d+))'
+_LITERAL_ITEM = re.compile(_LITERAL)
+_LITERAL_LIST = re.compile(rf'\s*{_LITERAL}(?:\s*,\s*{_LITERAL})*\s*')
+
+
+@lru_cache(maxsize=DATA_CACHE_SIZE)
+def split_data_items(operand: str) -> Tuple[str, ...]:
+    """Non-empty comma-separated items of a DB/DW operand (strings kept quoted)."""
+    return tuple(item.text for item in split_operands(operand) if item.text)
+
+
+@lru_cache(maxsize=DATA_CACHE_SIZE)
+def numeric_data(operand: str, item_size: int) -> Optional[bytes]:
+    """
+    Encode a DB (item_size 1) or DW (item_size 2, little-endian) operand that
+    consists only of plain numeric literals, converting all items in one batch.
+
+    Returns:
+        The encoded bytes, or None if any item is not a plain literal or is out of
+        range (the caller's per-item path then handles it, including errors)
+    """
+    if not _LITERAL_LIST.fullmatch(operand):
+        return None
+    values = [int(hex_digits, 16) if hex_digits else int(bin_digits, 2) if bin_digits else int(dec_digits)
+              for hex_digits, bin_digits, dec_digits in _LITERAL_ITEM.findall(operand)]
+    try:
+        if item_size == 1:
+            return bytes(values)
+        return struct.pack(f"<{len(values)}H", *values)
+    except (ValueError, struct.error):
+        return None
@@ -0,0 +1,507 @@
+# software/assembler/src/expressions.py
+"""
+Expression engine shared by the Parser (EQU values) and the Assembler (operands).
+
+An expression string is tokenized once and compiled by a precedence-climbing
+(Pratt) parser into an evaluator closure, which is cached; evaluating it only
+needs a symbol-lookup callable, so callers never copy their symbol tables.
+Constant subexpressions are folded at compile time.
+
+Syntax: numeric literals ($hex, %binary, decimal), character literals, symbols,
+LOW_BYTE()/HIGH_BYTE(), parentheses, unary ~ - +, and the binary operators
+below, from loosest to tightest binding (all left-associative):
+
+    |    ^    &    + -    << >>
+
+'<<' and '~' produce 8-bit results, as before.
+
+For relocatable object files, evaluate_relocatable_expression() also accepts
+symbols whose address is only fixed when linking (RelocatableValue) and carries
+that base through the operators the linker can reproduce: adding or subtracting
+a constant, the difference of two addresses with the same base (a constant),
+and LOW_BYTE/HIGH_BYTE (or '& $FF' / '>> 8'). Anything else raises
+RelocationError.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Returns a symbol's value, or None if the symbol is not defined
+SymbolLookup = Callable[[str], Optional[int]]
+# A compiled expression
+Evaluator = Callable[[SymbolLookup], int]
+
+# Upper bound on distinct expression strings kept compiled
+COMPILED_CACHE_SIZE = 8192
+
+# Binary operator -> (binding power, kind used in error messages)
+_BINARY_OPERATORS = {
+    '|': (1, "logical"), '^': (2, "logical"), '&': (3, "logical"),
+    '+': (4, "arithmetic"), '-': (4, "arithmetic"),
+    '<<': (5, "shift"), '>>': (5, "shift"),
+}
+_UNARY_BINDING_POWER = 6
+
+_FUNCTIONS = {'LOW_BYTE': 0, 'HIGH_BYTE': 8}  # Name -> right shift applied to the 16-bit argument
+
+# One token per match at a given position; character literals are scanned by hand
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>[$%]\w*|\d\w*)
+      | (?P<name>[A-Za-z_.][\w.]*)
+      | (?P<op><<|>>|[|^&+\-~()])
+      | (?P<quote>')
+      | (?P<other>\S)
+    )""", re.VERBOSE)
+
+_CHARACTER_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\', "'": "'"}
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is malformed or references an unknown symbol."""
+
+
+class RelocationError(ExpressionError):
+    """Raised when a relocatable value is used in a way the linker cannot reproduce."""
+
+
+class RelocatableValue(NamedTuple):
+    """A value relative to an address fixed when linking: base + offset, or one byte of it."""
+    base: Optional[str]         # Imported symbol, or None for the module's relocatable section
+    offset: int
+    byte: Optional[str] = None  # 'LOW_BYTE' or 'HIGH_BYTE' of base + offset, None for the address itself
+
+    def at(self, address: int) -> int:
+        """The value with its base at address."""
+        value = address + self.offset
+        if self.byte is None:
+            return value
+        return ((value & 0xFFFF) >> _FUNCTIONS[self.byte]) & 0xFF
+
+    @property
+    def description(self) -> str:
+        address = "an address in this module" if self.base is None else f"the address of '{self.base}'"
+        if self.byte is None:
+            return address
+        return f"the {'low' if self.byte == 'LOW_BYTE' else 'high'} byte of {address}"
+
+
+Value = Union[int, RelocatableValue]
+# Returns a symbol's value, possibly relocatable, or None if the symbol is not defined
+RelocatableLookup = Callable[[str], Optional[Value]]
+
+
+def evaluate_expression(expression: str, lookup: SymbolLookup) -> int:
+    """
+    Evaluate an expression string.
+
+    Args:
+        expression: Expression text (e.g., "LOW_BYTE(TABLE + 2)")
+        lookup: Symbol lookup callable, e.g. symbol_table.get
+
+    Returns:
+        Integer value of the expression
+
+    Raises:
+        ExpressionError: If the expression is malformed or uses an undefined symbol
+    """
+    return compile_expression(expression)(lookup)
+
+
+def evaluate_relocatable_expression(expression: str, lookup: RelocatableLookup) -> Value:
+    """
+    Evaluate an expression whose symbols may be relocatable.
+
+    Returns:
+        The integer value if the expression does not depend on a relocatable base
+        (e.g. the difference of two labels), else the RelocatableValue it reduces to
+
+    Raises:
+        RelocationError: If a relocatable value is used in any other way
+        ExpressionError: If the expression is malformed or uses an undefined symbol
+    """
+    return _compile_relocatable(expression)(lookup)
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression: str) -> Evaluator:
+    """
+    Compile an expression string into an evaluator, reusing the cached one for
+    strings seen before. Syntax errors (and errors in constant subexpressions)
+    are raised here; unknown symbols and other range errors are raised when the
+    evaluator runs.
+
+    Raises:
+        ExpressionError: If the expression is malformed
+    """
+    return _ExpressionParser(expression.strip(), _INTEGER_OPERATIONS).parse()
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def _compile_relocatable(expression: str) -> Callable[[RelocatableLookup], Value]:
+    return _ExpressionParser(expression.strip(), _RELOCATABLE_OPERATIONS).parse()
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def expression_symbols(expression: str) -> Tuple[str, ...]:
+    """
+    Names of the symbols an expression references (its dependencies), each once,
+    in order of first appearance.
+
+    Raises:
+        ExpressionError: If the expression is malformed
+    """
+    parser = _ExpressionParser(expression.strip(), _INTEGER_OPERATIONS)
+    parser.parse()
+    return tuple(dict.fromkeys(parser.symbols))
+
+
+def parse_character_literal(char_literal_str: str) -> int:
+    """
+    Parse a character literal (e.g., 'A', '\\n') and return its ASCII value.
+
+    Raises:
+        ExpressionError: If the character literal is malformed
+    """
+    # Remove outer quotes
+    if len(char_literal_str) < 2 or not (char_literal_str.startswith("'") and char_literal_str.endswith("'")):
+        raise ExpressionError(f"Malformed character literal: '{char_literal_str}'")
+
+    char_content = char_literal_str[1:-1]
+
+    # Check for empty character literal
+    if not char_content:
+        raise ExpressionError(f"Empty character literal: '{char_literal_str}'")
+
+    # Check for unterminated character literal (this case should not occur with our check above, but being thorough)
+    if len(char_literal_str) < 3:
+        raise ExpressionError(f"Unterminated character literal: '{char_literal_str}'")
+
+    # Process escape sequences
+    if char_content.startswith('\\'):
+        if len(char_content) < 2:
+            raise ExpressionError(f"Incomplete escape sequence in character literal: '{char_literal_str}'")
+        escape_char = char_content[1]
+        if escape_char not in _CHARACTER_ESCAPES:
+            raise ExpressionError(f"Unknown escape sequence '\\{escape_char}' in character literal: '{char_literal_str}'")
+        return ord(_CHARACTER_ESCAPES[escape_char])
+
+    # Regular character - must be exactly one character
+    if len(char_content) != 1:
+        raise ExpressionError(f"Character literal must contain exactly one character: '{char_literal_str}' (contains {len(char_content)} characters)")
+
+    return ord(char_content[0])
+
+
+class _Token(NamedTuple):
+    kind: str    # 'number', 'name', 'op', 'char' or 'end'
+    text: str
+    start: int   # Offsets into the expression, for error messages
+    end: int
+
+
+class _Node(NamedTuple):
+    evaluate: Evaluator
+    constant: Optional[int]  # Value, if the node does not depend on any symbol
+
+
+def _tokenize(expr: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    pos = 0
+    while True:
+        match = _TOKEN.match(expr, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        start = match.start(kind)
+        if kind == 'quote':
+            # Character literal: step over a backslash escape, then find the closing quote
+            search_from = start + 1
+            if expr.startswith('\\', start + 1):
+                search_from = start + 3
+            elif expr.startswith("''", start + 1):
+                search_from = start + 2  # ''' is the quote character itself
+            close = expr.find("'", search_from)
+            if close == -1:
+                raise ExpressionError(f"Unterminated character literal: '{expr[start:]}'")
+            tokens.append(_Token('char', expr[start:close + 1], start, close + 1))
+            pos = close + 1
+            continue
+        if kind == 'other':
+            raise ExpressionError(f"Unexpected character '{match.group(kind)}' in expression: '{expr}'.")
+        tokens.append(_Token(kind, match.group(kind), start, match.end()))
+        pos = match.end()
+    tokens.append(_Token('end', '', len(expr), len(expr)))
+    return tokens
+
+
+def _constant(value: int) -> _Node:
+    return _Node(lambda lookup: value, value)
+
+
+def _parse_number(text: str) -> int:
+    base_to_use = 10
+    num_str = text
+    if text.startswith('$'):
+        base_to_use = 16
+        num_str = text[1:]
+    elif text.startswith('%'):
+        base_to_use = 2
+        num_str = text[1:]
+    try:
+        return int(num_str, base_to_use)
+    except ValueError:
+        type_str = "hexadecimal" if base_to_use == 16 else "binary" if base_to_use == 2 else "decimal"
+        raise ExpressionError(f"Bad {type_str} value for expression component: '{text}'. Not a known symbol.")
+
+
+def _symbol(name: str) -> _Node:
+    error_message = f"Bad decimal value for expression component: '{name}'. Not a known symbol."
+
+    def evaluate(lookup: SymbolLookup) -> int:
+        value = lookup(name)
+        if value is None:
+            raise ExpressionError(error_message)
+        return value
+    return _Node(evaluate, None)
+
+
+def _shift_left(lhs: int, rhs: int) -> int:
+    if rhs < 0:
+        raise ExpressionError(f"Negative shift count {rhs} in expression.")
+    # Left shift - limit result to 8-bit for assembler context
+    return (lhs << rhs) & 0xFF
+
+
+def _shift_right(lhs: int, rhs: int) -> int:
+    if rhs < 0:
+        raise ExpressionError(f"Negative shift count {rhs} in expression.")
+    return lhs >> rhs
+
+
+_BINARY_FUNCTIONS = {
+    '|': lambda lhs, rhs: lhs | rhs,
+    '^': lambda lhs, rhs: lhs ^ rhs,
+    '&': lambda lhs, rhs: lhs & rhs,
+    '+': lambda lhs, rhs: lhs + rhs,
+    '-': lambda lhs, rhs: lhs - rhs,
+    '<<': _shift_left,
+    '>>': _shift_right,
+}
+
+_UNARY_FUNCTIONS = {
+    # Bitwise NOT - limit to 8-bit result for assembler context
+    '~': lambda value: (~value) & 0xFF,
+    '-': lambda value: -value,
+    '+': lambda value: value,
+}
+
+
+def _byte_function(func_name: str, argument_text: str) -> Callable[[int], int]:
+    shift = _FUNCTIONS[func_name]
+
+    def apply(value: int) -> int:
+        if not (0x0000 <= value <= 0xFFFF):
+            raise ExpressionError(f"Value for {func_name} argument '{argument_text}' (resolved to 0x{value:X}) is out of 16-bit range (0x0000-0xFFFF).")
+        return (value >> shift) & 0xFF
+    return apply
+
+
+# What the linker can compute from a relocatable value, for error messages
+_RELOCATION_RULE = "a relocated operand may only add or subtract a constant, or take LOW_BYTE/HIGH_BYTE"
+
+
+def _relocate(op: str, lhs: Value, rhs: Value) -> Value:
+    """Apply a binary operator to operands of which at least one is relocatable."""
+    if isinstance(lhs, RelocatableValue) and isinstance(rhs, RelocatableValue):
+        if lhs.base != rhs.base:
+            raise RelocationError(f"it depends on more than one relocatable address "
+                                  f"({lhs.base or 'this module'}, {rhs.base or 'this module'}).")
+        if op == '-' and lhs.byte is None and rhs.byte is None:
+            return lhs.offset - rhs.offset  # Distance between two addresses with the same base
+        raise RelocationError(f"'{op}' cannot combine {lhs.description} with itself; {_RELOCATION_RULE}.")
+    if isinstance(lhs, RelocatableValue):
+        if lhs.byte is None:
+            if op == '+':
+                return lhs._replace(offset=lhs.offset + rhs)
+            if op == '-':
+                return lhs._replace(offset=lhs.offset - rhs)
+            if op == '>>' and rhs == 8:
+                return lhs._replace(byte='HIGH_BYTE')
+        if op == '&' and rhs == 0xFF:
+            return lhs if lhs.byte is not None else lhs._replace(byte='LOW_BYTE')
+        relocatable = lhs
+    else:
+        if op == '+' and rhs.byte is None:
+            return rhs._replace(offset=lhs + rhs.offset)
+        relocatable = rhs
+    raise RelocationError(f"'{op}' cannot be applied to {relocatable.description}; {_RELOCATION_RULE}.")
+
+
+def _relocatable_binary_function(op: str) -> Callable[[Value, Value], Value]:
+    combine = _BINARY_FUNCTIONS[op]
+
+    def apply(lhs: Value, rhs: Value) -> Value:
+        if isinstance(lhs, RelocatableValue) or isinstance(rhs, RelocatableValue):
+            return _relocate(op, lhs, rhs)
+        return combine(lhs, rhs)
+    return apply
+
+
+def _relocatable_unary_function(op: str) -> Callable[[Value], Value]:
+    apply_to_int = _UNARY_FUNCTIONS[op]
+
+    def apply(value: Value) -> Value:
+        if isinstance(value, RelocatableValue):
+            if op == '+':
+                return value
+            raise RelocationError(f"'{op}' cannot be applied to {value.description}; {_RELOCATION_RULE}.")
+        return apply_to_int(value)
+    return apply
+
+
+def _relocatable_byte_function(func_name: str, argument_text: str) -> Callable[[Value], Value]:
+    apply_to_int = _byte_function(func_name, argument_text)
+
+    def apply(value: Value) -> Value:
+        if isinstance(value, RelocatableValue):
+            if value.byte is not None:
+                raise RelocationError(f"{func_name} cannot be applied to {value.description}; {_RELOCATION_RULE}.")
+            return value._replace(byte=func_name)
+        return apply_to_int(value)
+    return apply
+
+
+class _Operations(NamedTuple):
+    """The functions an expression compiles to: for integers only, or also relocatable values."""
+    binary: Dict[str, Callable[[Any, Any], Any]]
+    unary: Dict[str, Callable[[Any], Any]]
+    function: Callable[[str, str], Callable[[Any], Any]]  # (name, argument text) -> LOW_BYTE/HIGH_BYTE
+
+
+_INTEGER_OPERATIONS = _Operations(_BINARY_FUNCTIONS, _UNARY_FUNCTIONS, _byte_function)
+_RELOCATABLE_OPERATIONS = _Operations(
+    {op: _relocatable_binary_function(op) for op in _BINARY_FUNCTIONS},
+    {op: _relocatable_unary_function(op) for op in _UNARY_FUNCTIONS},
+    _relocatable_byte_function,
+)
+
+
+def _binary(combine: Callable[[Any, Any], Any], left: _Node, right: _Node) -> _Node:
+    if left.constant is not None and right.constant is not None:
+        return _constant(combine(left.constant, right.constant))
+    lhs, rhs = left.evaluate, right.evaluate
+    if right.constant is not None:
+        rhs_value = right.constant
+        return _Node(lambda lookup: combine(lhs(lookup), rhs_value), None)
+    if left.constant is not None:
+        lhs_value = left.constant
+        return _Node(lambda lookup: combine(lhs_value, rhs(lookup)), None)
+    return _Node(lambda lookup: combine(lhs(lookup), rhs(lookup)), None)
+
+
+def _unary(apply: Callable[[Any], Any], operand: _Node) -> _Node:
+    if operand.constant is not None:
+        return _constant(apply(operand.constant))
+    inner = operand.evaluate
+    return _Node(lambda lookup: apply(inner(lookup)), None)
+
+
+def _function_call(apply: Callable[[Any], Any], argument: _Node) -> _Node:
+    if argument.constant is not None:
+        return _constant(apply(argument.constant))
+    inner = argument.evaluate
+    return _Node(lambda lookup: apply(inner(lookup)), None)
+
+
+class _ExpressionParser:
+    """Precedence-climbing parser over the token list of one expression."""
+    def __init__(self, expr: str, operations: _Operations) -> None:
+        self.expr = expr
+        self.operations = operations
+        self.tokens = _tokenize(expr)
+        self.index = 0
+        self.symbols: List[str] = []  # Symbol names referenced, in order of appearance
+
+    def _peek(self) -> _Token:
+        return self.tokens[self.index]
+
+    def _advance(self) -> _Token:
+        token = self.tokens[self.index]
+        if token.kind != 'end':
+            self.index += 1
+        return token
+
+    def parse(self) -> Evaluator:
+        if self._peek().kind == 'end':
+            raise ExpressionError("Empty expression.")
+        node = self._expression(0, None)
+        token = self._peek()
+        if token.kind != 'end':
+            if token.text == ')':
+                raise ExpressionError(f"Unbalanced parentheses in expression: '{self.expr}'.")
+            raise ExpressionError(f"Unexpected '{token.text}' in expression: '{self.expr}'.")
+        return node.evaluate
+
+    def _expression(self, min_binding_power: int, preceding: Optional[_Token]) -> _Node:
+        """Parse operands joined by binary operators that bind tighter than min_binding_power."""
+        left = self._operand(preceding)
+        while True:
+            token = self._peek()
+            operator = _BINARY_OPERATORS.get(token.text) if token.kind == 'op' else None
+            if operator is None or operator[0] <= min_binding_power:
+                return left
+            self._advance()
+            right = self._expression(operator[0], token)
+            left = _binary(self.operations.binary[token.text], left, right)
+
+    def _operand(self, preceding: Optional[_Token]) -> _Node:
+        """Parse a value: literal, symbol, function call, parenthesized or unary expression."""
+        token = self._advance()
+        if token.kind == 'number':
+            return _constant(_parse_number(token.text))
+        if token.kind == 'char':
+            return _constant(parse_character_literal(token.text))
+        if token.kind == 'name':
+            func_name = token.text.upper()
+            if func_name in _FUNCTIONS and self._peek().text == '(':
+                return self._function_call(func_name)
+            self.symbols.append(token.text)
+            return _symbol(token.text)
+        if token.text == '(':
+            if self._peek().text == ')':
+                raise ExpressionError(f"Empty parentheses in expression: '{self.expr[token.start:self._peek().end]}'.")
+            inner = self._expression(0, token)
+            self._expect_closing_paren()
+            return inner
+        if token.text in _UNARY_FUNCTIONS:
+            if self._peek().kind == 'end':
+                raise ExpressionError(f"Malformed unary expression: '{self.expr}'. Missing operand after '{token.text}'.")
+            return _unary(self.operations.unary[token.text], self._expression(_UNARY_BINDING_POWER, token))
+        raise self._missing_operand_error(token, preceding)
+
+    def _function_call(self, func_name: str) -> _Node:
+        open_paren = self._advance()
+        if self._peek().text == ')':
+            raise ExpressionError(f"Empty parentheses in expression: '{self.expr}'.")
+        argument = self._expression(0, open_paren)
+        close_paren = self._expect_closing_paren()
+        argument_text = self.expr[open_paren.end:close_paren.start].strip()
+        return _function_call(self.operations.function(func_name, argument_text), argument)
+
+    def _expect_closing_paren(self) -> _Token:
+        token = self._advance()
+        if token.text != ')':
+            raise ExpressionError(f"Unbalanced parentheses in expression: '{self.expr}'.")
+        return token
+
+    def _missing_operand_error(self, token: _Token, preceding: Optional[_Token]) -> ExpressionError:
+        """Error for a token found where a value was expected."""
+        if preceding is not None and preceding.text in _BINARY_OPERATORS:
+            kind = _BINARY_OPERATORS[preceding.text][1]
+            return ExpressionError(f"Malformed {kind} expression: '{self.expr}'. Missing operand around '{preceding.text}'.")
+        if token.kind == 'end' or token.text == ')':
+            return ExpressionError(f"Unbalanced parentheses in expression: '{self.expr}'.")
+        return ExpressionError(f"Bad value for expression component: '{self.expr[token.start:]}'. "
+                               f"Not a known symbol; missing operand before '{token.text}'.")
+
@@ -0,0 +1,113 @@
+# software/assembler/src/fixture_manifest.py
+"""
+Manifest of generated fixtures, for skipping programs whose output is already
+up to date (used by scripts/ci/build_all_fixtures.py and
+scripts/devtools/test_manager.py assemble-all-sources).
+
+One JSON file holds an entry per fixture (keyed by its output directory name):
+
+  {"source": <main .asm>, "regions": [<region arguments>], "assembler": <hash>,
+   "dependencies": {<file>: <content hash>, ...}, "outputs": {<file written>: <content hash>, ...}}
+
+dependencies is the program's full closure as read by the parser (the main
+file, every INCLUDE and every INCBIN file). A fixture is current when the
+assembler source, the region arguments and every dependency's content are
+unchanged and its outputs still hold what was written. Paths are stored relative to the
+manifest's root directory.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    from .parse_cache import hash_assembler_sources
+except ImportError:
+    from parse_cache import hash_assembler_sources
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_FORMAT_VERSION = 2
+
+_assembler_source_hash: Optional[str] = None
+
+
+def assembler_source_hash() -> str:
+    """Hash of every module of the assembler, so any assembler change makes all fixtures stale."""
+    global _assembler_source_hash
+    if _assembler_source_hash is None:
+        digest = hashlib.sha256(f"format-{MANIFEST_FORMAT_VERSION}".encode())
+        hash_assembler_sources(digest)
+        _assembler_source_hash = digest.hexdigest()
+    return _assembler_source_hash
+
+
+def file_hash(path: str) -> Optional[str]:
+    """Content hash of a file, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class FixtureManifest:
+    def __init__(self, path: str, root_dir: str) -> None:
+        self.path = path
+        self.root_dir = root_dir
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("format") == MANIFEST_FORMAT_VERSION:
+                self.entries = data.get("fixtures", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fixture manifest {path}: {e}")
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root_dir)
+
+    def _absolute(self, path: str) -> str:
+        return os.path.join(self.root_dir, path)
+
+    def is_current(self, key: str, source: str, regions: Sequence[str]) -> bool:
+        """True if the fixture was recorded for the same source, regions and assembler and nothing changed since."""
+        entry = self.entries.get(key)
+        if (entry is None or entry.get("source") != self._relative(source)
+                or entry.get("regions") != list(regions) or entry.get("assembler") != assembler_source_hash()):
+            return False
+        recorded_files = {**entry.get("outputs", {}), **entry.get("dependencies", {})}
+        return all(file_hash(self._absolute(path)) == recorded for path, recorded in recorded_files.items())
+
+    def record(self, key: str, source: str, regions: Sequence[str], dependencies: Sequence[str],
+               outputs: Sequence[str]) -> None:
+        """Record a fixture just assembled (dependency and output contents are hashed now)."""
+        self.entries[key] = {
+            "source": self._relative(source),
+            "regions": list(regions),
+            "assembler": assembler_source_hash(),
+            "dependencies": {self._relative(path): file_hash(path) for path in dependencies},
+            "outputs": {self._relative(path): file_hash(path) for path in outputs},
+        }
+
+    def forget(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def save(self) -> None:
+        """Write the manifest (atomically, via a temporary file and rename)."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"format": MANIFEST_FORMAT_VERSION, "fixtures": self.entries}, f, indent=1, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,105 @@
+# software/assembler/src/incbin.py
+"""
+INCBIN "file"[, offset[, length]]: include a binary file's bytes verbatim.
+
+The parser resolves the operand once (path relative to the including file,
+offset/length defaulting to the rest of the file) and sizes the directive from
+the file's metadata, without reading it. The token then carries the canonical
+operand ("<absolute path>", offset, length), which the assembler maps into
+memory and copies into the region image as one slice.
+"""
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+
+try:
+    from .lexer import split_operands
+except ImportError:
+    from lexer import split_operands
+
+
+class IncbinError(ValueError):
+    """Raised when an INCBIN operand is malformed or does not fit its file."""
+
+
+class IncbinSpec(NamedTuple):
+    path: str     # Absolute, normalized path of the binary file
+    offset: int   # First byte of the file to include
+    length: int   # Number of bytes to include
+
+    def to_operand(self) -> str:
+        return f'"{self.path}", {self.offset}, {self.length}'
+
+    @classmethod
+    def from_operand(cls, operand: str) -> 'IncbinSpec':
+        """Parse the canonical operand produced by to_operand."""
+        path, offset, length = [item.text for item in split_operands(operand)]
+        return cls(path[1:-1], int(offset), int(length))
+
+
+def resolve_incbin(operand: str, including_file: str, evaluate: Callable[[str], int]) -> IncbinSpec:
+    """
+    Resolve an INCBIN operand as written in the source.
+
+    Args:
+        operand: Operand text, e.g. '"font.bin", $10, 64'
+        including_file: File containing the directive (relative paths start from its directory)
+        evaluate: Evaluates the offset/length expressions
+
+    Returns:
+        IncbinSpec with the absolute path and the byte range to include
+
+    Raises:
+        IncbinError: If the operand is malformed, the file is missing, or the range exceeds the file
+    """
+    items = [item.text for item in split_operands(operand or "")]
+    if not items or len(items) > 3:
+        raise IncbinError('INCBIN expects "file"[, offset[, length]].')
+    filename = items[0]
+    if len(filename) < 2 or not (filename.startswith('"') and filename.endswith('"')) or '"' in filename[1:-1]:
+        raise IncbinError(f"INCBIN file name must be a quoted string: {filename}")
+
+    path = os.path.normpath(os.path.join(os.path.dirname(including_file), filename[1:-1]))
+    try:
+        file_size = os.stat(path).st_size
+    except OSError as e:
+        raise IncbinError(f"INCBIN file '{path}' cannot be read: {e.strerror}")
+
+    offset = evaluate(items[1]) if len(items) > 1 else 0
+    if not (0 <= offset <= file_size):
+        raise IncbinError(f"INCBIN offset {offset} is outside '{path}' ({file_size} bytes).")
+    length = evaluate(items[2]) if len(items) > 2 else file_size - offset
+    if length < 0 or offset + length > file_size:
+        raise IncbinError(f"INCBIN range offset {offset}, length {length} exceeds '{path}' ({file_size} bytes).")
+    return IncbinSpec(path, offset, length)
+
+
+@contextmanager
+def mapped_incbin(spec: IncbinSpec) -> Iterator[memoryview]:
+    """
+    Map the file read-only and yield a memoryview of the included range (no copy).
+
+    Raises:
+        IncbinError: If the file can no longer provide the range
+    """
+    if spec.length == 0:
+        yield memoryview(b"")
+        return
+    try:
+        # The map keeps its own handle on the file
+        with open(spec.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError as e:
+        raise IncbinError(f"INCBIN file '{spec.path}' cannot be read: {e.strerror}")
+    with mapped:
+        if spec.offset + spec.length > len(mapped):
+            raise IncbinError(f"INCBIN file '{spec.path}' is shorter than when it was parsed ({len(mapped)} bytes).")
+        view = memoryview(mapped)
+        included = view[spec.offset:spec.offset + spec.length]
+        try:
+            yield included
+        finally:
+            # The map cannot be closed while views of it exist
+            included.release()
+            view.release()
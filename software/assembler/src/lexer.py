@@ -0,0 +1,314 @@
+# software/assembler/src/lexer.py
+"""
+Single-pass line lexer for SAP2 assembly source.
+
+Each line is scanned once, left to right, into label / mnemonic / operand /
+comment spans with their column positions. Quoted strings and character
+literals are respected, so commas and semicolons inside them neither split
+operands nor start a comment.
+
+Well-formed lines are matched by a single anchored regex; lines it rejects
+go through the hand-written scanner, which reports where the line is wrong.
+"""
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class LexError(ValueError):
+    """Raised when a line cannot be split into label/mnemonic/operand/comment."""
+    def __init__(self, message: str, column: int) -> None:
+        self.column = column
+        super().__init__(message)
+
+
+class Span(NamedTuple):
+    """A piece of source text and the 0-based column where it starts in the raw line."""
+    text: str
+    column: int
+
+
+class LexedLine(NamedTuple):
+    """
+    Result of lexing one source line. Absent parts are None. The comma-split
+    operand list is produced on access, since most consumers only need the
+    whole operand field.
+    """
+    label: Optional[Span]     # Label without its trailing ':'
+    mnemonic: Optional[Span]
+    operand: Optional[Span]   # Whole operand field, stripped
+    comment: Optional[Span]   # Comment including the leading ';'
+
+    @property
+    def operands(self) -> List[Span]:
+        """Operand field split on top-level commas, each item stripped."""
+        operand = self.operand
+        if operand is None:
+            return []
+        if ',' not in operand.text:
+            return [operand]
+        return split_operands(operand.text, operand.column)
+
+    @property
+    def is_empty(self) -> bool:
+        """True for blank and comment-only lines."""
+        return self.label is None and self.mnemonic is None
+
+
+_EMPTY_LINE = LexedLine(None, None, None, None)
+
+# Character-class scanners. Each is an anchored match used as a fast "advance
+# while" primitive at a known position; the line structure itself is decided
+# by the hand-written scanner below, never by backtracking.
+_IDENTIFIER_RUN = re.compile(r'[A-Za-z_]\w*')
+_WORD_RUN = re.compile(r'\w+')
+_WHITESPACE_RUN = re.compile(r'\s*')
+
+
+# Span and LexedLine construction bypassing the NamedTuple __new__ wrapper (hot path)
+_new_span = _new_lexed_line = tuple.__new__
+
+# Every line _scan_line accepts, with the same spans: label, mnemonic, operand
+# (up to the first ';' outside a quoted literal, trailing whitespace included)
+# and comment. An unterminated quote is an ordinary character, as in the scanner.
+_LINE = re.compile(r"""
+    \s*
+    (?:([A-Za-z_]\w*|\.\w+):\s*)?
+    (?:([A-Za-z_]\w*)
+       (?:(?:\s*,\s*|\s+)((?:[^;"']+|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|["'])*))?
+    )?
+    (;.*)?
+    \Z""", re.VERBOSE | re.DOTALL)
+_line_match = _LINE.match
+
+_identifier_end = _IDENTIFIER_RUN.match
+_word_end = _WORD_RUN.match
+_whitespace_end = _WHITESPACE_RUN.match
+
+
+def _scan_identifier(line: str, pos: int) -> int:
+    """Return the index just past an identifier starting at pos (pos itself if there is none)."""
+    m = _IDENTIFIER_RUN.match(line, pos)
+    return m.end() if m else pos
+
+
+def _skip_whitespace(line: str, pos: int) -> int:
+    return _WHITESPACE_RUN.match(line, pos).end()
+
+
+def _find_closing_quote(text: str, pos: int) -> int:
+    """
+    Given text[pos] is a quote character, return the index of its closing quote,
+    honouring backslash escapes. Returns -1 if the literal is unterminated.
+    """
+    quote = text[pos]
+    n = len(text)
+    i = pos + 1
+    while i < n:
+        ch = text[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote:
+            return i
+        i += 1
+    return -1
+
+
+def _find_comment_start(line: str, pos: int) -> int:
+    """Index of the first ';' at or after pos that is outside a quoted literal, or -1."""
+    if '"' not in line and "'" not in line:
+        return line.find(';', pos)
+    n = len(line)
+    i = pos
+    while i < n:
+        ch = line[i]
+        if ch == ';':
+            return i
+        if ch == '"' or ch == "'":
+            close = _find_closing_quote(line, i)
+            if close != -1:
+                i = close + 1
+                continue
+        i += 1
+    return -1
+
+
+def split_operands(text: str, column: int = 0, maxsplit: int = -1) -> List[Span]:
+    """
+    Split an operand field on commas that are not inside quoted literals.
+
+    Args:
+        text: Operand text
+        column: Column of text[0] in the raw line, used for the returned spans
+        maxsplit: Maximum number of splits (-1 for no limit)
+
+    Returns:
+        List of stripped item spans; empty items (e.g. from a trailing comma) are kept
+    """
+    if '"' not in text and "'" not in text:
+        items = []
+        start = column
+        for piece in text.split(',', maxsplit):
+            stripped = piece.strip()
+            if stripped:
+                items.append(_new_span(Span, (stripped, start + piece.find(stripped[0]))))
+            else:
+                items.append(_new_span(Span, ("", start + len(piece))))
+            start += len(piece) + 1
+        return items
+
+    items: List[Span] = []
+    n = len(text)
+    start = 0
+    i = 0
+    splits = 0
+    while i < n:
+        ch = text[i]
+        if ch == ',' and splits != maxsplit:
+            items.append(_stripped_span(text, start, i, column))
+            splits += 1
+            start = i + 1
+        elif ch == '"' or ch == "'":
+            close = _find_closing_quote(text, i)
+            if close != -1:
+                i = close
+        i += 1
+    items.append(_stripped_span(text, start, n, column))
+    return items
+
+
+def _stripped_span(text: str, start: int, end: int, column: int) -> Span:
+    piece = text[start:end]
+    stripped = piece.strip()
+    if not stripped:
+        return Span("", column + end)
+    return Span(stripped, column + start + piece.find(stripped[0]))
+
+
+def leading_word(line: str) -> Optional[Tuple[str, int]]:
+    """
+    Return the first identifier on a line and the index just past it, or None
+    if the line does not start (after whitespace) with an identifier.
+    """
+    start = _skip_whitespace(line, 0)
+    end = _scan_identifier(line, start)
+    if end == start:
+        return None
+    return line[start:end], end
+
+
+def leading_keyword(line: str) -> Optional[str]:
+    """
+    Upper-cased first word of a line if it stands on its own, i.e. is followed by
+    whitespace, a comment or the end of the line. Cheap enough to call on lines
+    that are otherwise skipped (macro bodies, false conditional blocks).
+    """
+    word = leading_word(line)
+    if word is None:
+        return None
+    text, end = word
+    if end < len(line) and not (line[end].isspace() or line[end] == ';'):
+        return None
+    return text.upper()
+
+
+def is_bare_keyword(line: str, keyword: str) -> bool:
+    """True if the line holds only the given keyword, optionally followed by a comment."""
+    word = leading_word(line)
+    if word is None or word[0].upper() != keyword:
+        return False
+    rest = _skip_whitespace(line, word[1])
+    return rest == len(line) or line[rest] == ';'
+
+
+def lex_line(line: str) -> LexedLine:
+    """
+    Lex one source line.
+
+    Grammar: [label:] [mnemonic [(',' | whitespace) operand]] [; comment]
+    where a label is an identifier or '.'-prefixed local name.
+
+    Args:
+        line: Raw source line (may include the trailing newline)
+
+    Returns:
+        LexedLine with spans for every part present
+
+    Raises:
+        LexError: If the line does not follow the grammar above
+    """
+    # Blank and comment-only lines (about half of a typical source) skip the regex
+    text = line.lstrip()
+    if not text:
+        return _EMPTY_LINE
+    if text[0] == ';':
+        return _new_lexed_line(LexedLine, (None, None, None, _new_span(Span, (text.rstrip(), len(line) - len(text)))))
+    m = _line_match(line)
+    if m is None:
+        return _scan_line(line)
+    label, mnemonic, operand, comment = m.groups()
+    if mnemonic is not None:
+        mnemonic = _new_span(Span, (mnemonic, m.start(2)))
+        if operand:
+            operand_text = operand.rstrip()
+            operand = _new_span(Span, (operand_text, m.start(3))) if operand_text else None
+        else:
+            operand = None
+    elif label is None and comment is None:
+        return _EMPTY_LINE
+    if label is not None:
+        label = _new_span(Span, (label, m.start(1)))
+    if comment is not None:
+        comment = _new_span(Span, (comment.rstrip(), m.start(4)))
+    return _new_lexed_line(LexedLine, (label, mnemonic, operand, comment))
+
+
+def _scan_line(line: str) -> LexedLine:
+    """Hand-written lex_line, for the lines _LINE does not match (it reports where they are malformed)."""
+    n = len(line)
+    pos = _whitespace_end(line).end()
+    if pos == n:
+        return _EMPTY_LINE
+    first = line[pos]
+    if first == ';':
+        return LexedLine(None, None, None, _new_span(Span, (line[pos:].rstrip(), pos)))
+
+    label = None
+    if first == '.':
+        word = _word_end(line, pos + 1)
+        label_end = word.end() if word else pos  # A lone '.' is not a label
+    else:
+        word = _identifier_end(line, pos)
+        label_end = word.end() if word else pos
+    if label_end > pos and label_end < n and line[label_end] == ':':
+        label = _new_span(Span, (line[pos:label_end], pos))
+        pos = _whitespace_end(line, label_end + 1).end()
+
+    mnemonic = None
+    operand = None
+    word = _identifier_end(line, pos)
+    if word:
+        mnemonic_end = word.end()
+        mnemonic = _new_span(Span, (line[pos:mnemonic_end], pos))
+        pos = _whitespace_end(line, mnemonic_end).end()
+        if pos < n:
+            ch = line[pos]
+            if ch == ',':
+                pos = _whitespace_end(line, pos + 1).end()
+            elif pos == mnemonic_end and ch != ';':
+                raise LexError(f"Unexpected character '{ch}' after mnemonic", pos)
+
+            if pos < n and line[pos] != ';':
+                operand_end = _find_comment_start(line, pos)
+                if operand_end == -1:
+                    operand_end = n
+                operand_text = line[pos:operand_end].rstrip()
+                if operand_text:
+                    operand = _new_span(Span, (operand_text, pos))
+                pos = operand_end
+
+    if pos == n:
+        return LexedLine(label, mnemonic, operand, None)
+    if line[pos] != ';':
+        raise LexError(f"Unexpected character '{line[pos]}'", pos)
+    return LexedLine(label, mnemonic, operand, _new_span(Span, (line[pos:].rstrip(), pos)))
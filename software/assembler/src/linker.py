@@ -0,0 +1,290 @@
+# software/assembler/src/linker.py
+"""
+asm-link: links relocatable object files (assembler.py --object) into the same
+region images assembler.py writes.
+
+Run:
+    python software/assembler/src/linker.py main.o routines_uart.o routines_delay.o -o OUTPUT_DIR
+        [--region NAME START_ADDR_HEX END_ADDR_HEX]... [--code-region NAME] [--format ...]
+
+Absolute sections (a module's ORG blocks) go where they were assembled.
+Relocatable sections are then placed in the code region (default ROM), in
+command-line order, each at the lowest free address it fits. Every export
+becomes a global symbol, and every relocation is patched into the images.
+Without --region, the regions are those of docs/hardware/1_memory_map.md that
+hold memory: RAM, VRAM and ROM.
+"""
+import argparse
+import logging
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from assembler import AssemblerError, MemoryRegion, RegionUsage, write_region_files
+    from object_file import ObjectFile, ObjectFileError, ObjectSection, relocated_field
+    from output_formats import DEFAULT_OUTPUT_FORMATS, OUTPUT_FORMATS, validate_formats
+except ImportError:
+    from .assembler import AssemblerError, MemoryRegion, RegionUsage, write_region_files
+    from .object_file import ObjectFile, ObjectFileError, ObjectSection, relocated_field
+    from .output_formats import DEFAULT_OUTPUT_FORMATS, OUTPUT_FORMATS, validate_formats
+
+logger = logging.getLogger(__name__)
+
+# Memory regions of docs/hardware/1_memory_map.md (MMIO holds no memory image)
+DEFAULT_LINK_REGIONS: List[Tuple[str, str, str]] = [("RAM", "0000", "1FFF"), ("VRAM", "D000", "DFFF"), ("ROM", "F000", "FFFF")]
+DEFAULT_CODE_REGION = "ROM"
+
+
+class LinkError(Exception):
+    """Custom exception for link errors, includes the object or source location when known."""
+    def __init__(self, message: str, source_file: Optional[str] = None, line_no: Optional[int] = None) -> None:
+        self.source_file = source_file
+        self.line_no = line_no
+        self.base_message = message
+        super().__init__(message)
+
+    def __str__(self) -> str:
+        context = ""
+        if self.source_file and self.line_no is not None:
+            context = f"[{os.path.basename(self.source_file)} line {self.line_no}] "
+        elif self.source_file:
+            context = f"[{os.path.basename(self.source_file)}] "
+        return f"LinkError: {context}{self.base_message}"
+
+
+class Placement(NamedTuple):
+    object_path: str
+    section: str
+    address: int
+    size: int
+    region: str
+
+
+class Linker:
+    """
+    Places the sections of a list of object files into memory regions, resolves
+    their symbols and applies their relocations.
+    """
+    def __init__(self, object_paths: List[str], output_dir: Optional[str],
+                 region_configs: Optional[List[Tuple[str, str, str]]] = None,
+                 code_region: str = DEFAULT_CODE_REGION, output_formats: Optional[List[str]] = None) -> None:
+        self.object_paths = object_paths
+        self.output_dir = output_dir  # None: link in memory only
+        self.code_region = code_region
+        try:
+            self.output_formats: List[str] = validate_formats(list(output_formats or DEFAULT_OUTPUT_FORMATS))
+        except ValueError as e:
+            raise LinkError(str(e))
+        self.regions: List[MemoryRegion] = [self._make_region(*config) for config in region_configs or DEFAULT_LINK_REGIONS]
+        self.objects: List[ObjectFile] = []
+        self.symbols: Dict[str, int] = {}
+        self.placements: List[Placement] = []
+        self._definitions: Dict[str, Tuple[str, bool]] = {}  # Symbol -> (object path, relocatable)
+
+    def _make_region(self, name: str, start_hex: str, end_hex: str) -> MemoryRegion:
+        try:
+            start_addr = int(start_hex, 16)
+            end_addr = int(end_hex, 16)
+        except ValueError:
+            raise LinkError(f"Invalid hex address in region '{name}': start='{start_hex}', end='{end_hex}'")
+        if not (0x0000 <= start_addr <= end_addr <= 0xFFFF):
+            raise LinkError(f"Region '{name}' (0x{start_addr:X}-0x{end_addr:X}) is not a 16-bit address range.")
+        return MemoryRegion(name=name, start_addr=start_addr, end_addr=end_addr,
+                            output_filename=os.path.join(self.output_dir or "", f"{name}.hex"))
+
+    def _region_for(self, address: int, size: int) -> Optional[MemoryRegion]:
+        """The region holding all of [address, address + size), if any."""
+        return next((region for region in self.regions
+                     if region.start_addr <= address and address + size - 1 <= region.end_addr), None)
+
+    def _place(self, object_path: str, section: ObjectSection, address: int) -> None:
+        """
+        Raises:
+            LinkError: If the section is outside the regions or overlaps one placed before
+        """
+        size = len(section.data)
+        region = self._region_for(address, size)
+        if region is None:
+            raise LinkError(f"Section {section.name} at 0x{address:04X}-0x{address + size - 1:04X} is not inside "
+                            f"any one memory region.", source_file=object_path)
+        overlap = region.first_occupied(address - region.start_addr, size)
+        if overlap != -1:
+            overlap += region.start_addr
+            other = next(placement for placement in self.placements
+                         if placement.address <= overlap < placement.address + placement.size)
+            raise LinkError(f"Section {section.name} at 0x{address:04X} overlaps section {other.section} of "
+                            f"{os.path.basename(other.object_path)} at address 0x{overlap:04X}.", source_file=object_path)
+        region.store(address - region.start_addr, section.data)
+        self.placements.append(Placement(object_path, section.name, address, size, region.name))
+        logger.info(f"Placed {section.name} of {os.path.basename(object_path)} at 0x{address:04X}-0x{address + size - 1:04X} "
+                    f"({size} bytes) in region '{region.name}'.")
+
+    def _allocate(self, object_path: str, section: ObjectSection) -> int:
+        """
+        Place a relocatable section at the lowest free address of the code region that fits it.
+
+        Returns:
+            The section's address
+
+        Raises:
+            LinkError: If there is no code region or no free block large enough
+        """
+        region = next((region for region in self.regions if region.name == self.code_region), None)
+        if region is None:
+            raise LinkError(f"Code region '{self.code_region}' is not one of the memory regions "
+                            f"({', '.join(region.name for region in self.regions)}).")
+        size = len(section.data)
+        free = region.free_ranges()
+        start = next((start for start, end in free if end - start >= size), None)
+        if start is None:
+            largest = max((end - start for start, end in free), default=0)
+            raise LinkError(f"No room for section {section.name} ({size} bytes) in region '{region.name}' "
+                            f"(largest free block {largest} bytes).", source_file=object_path)
+        address = region.start_addr + start
+        self._place(object_path, section, address)
+        return address
+
+    def _define(self, object_path: str, name: str, value: int, relocatable: bool) -> None:
+        """
+        Raises:
+            LinkError: If another object exports the symbol, unless both define the same absolute value
+        """
+        earlier = self._definitions.get(name)
+        if earlier is not None:
+            if relocatable or earlier[1] or self.symbols[name] != value:
+                raise LinkError(f"Symbol '{name}' is exported by both {os.path.basename(earlier[0])} "
+                                f"and {os.path.basename(object_path)}.", source_file=object_path)
+            return
+        self._definitions[name] = (object_path, relocatable)
+        self.symbols[name] = value
+
+    def link(self) -> None:
+        """
+        Load the objects, place their sections, resolve symbols and apply relocations.
+
+        Raises:
+            LinkError: If an object cannot be loaded or placed, a symbol is undefined or
+                       exported twice, or a relocated value does not fit its field
+        """
+        self.objects = []
+        for path in self.object_paths:
+            try:
+                self.objects.append(ObjectFile.load(path))
+            except ObjectFileError as e:
+                raise LinkError(str(e), source_file=path) from e
+
+        # Absolute sections first, so relocatable ones fill the space around them
+        addresses: List[List[Optional[int]]] = [[section.address for section in obj.sections] for obj in self.objects]
+        for path, obj in zip(self.object_paths, self.objects):
+            for section in obj.sections:
+                if section.address is not None:
+                    self._place(path, section, section.address)
+        for path, obj, section_addresses in zip(self.object_paths, self.objects, addresses):
+            for index, section in enumerate(obj.sections):
+                if section.address is None:
+                    section_addresses[index] = self._allocate(path, section)
+
+        for path, obj, section_addresses in zip(self.object_paths, self.objects, addresses):
+            base = section_addresses[obj.relocatable_section] if obj.relocatable_section is not None else 0
+            for name, symbol in obj.exports.items():
+                self._define(path, name, base + symbol.value if symbol.relocatable else symbol.value, symbol.relocatable)
+
+        relocation_count = 0
+        for path, obj, section_addresses in zip(self.object_paths, self.objects, addresses):
+            for relocation in obj.relocations:
+                if relocation.symbol is None:
+                    target = section_addresses[obj.relocatable_section]
+                elif relocation.symbol in self.symbols:
+                    target = self.symbols[relocation.symbol]
+                else:
+                    raise LinkError(f"Undefined symbol '{relocation.symbol}' (imported by {os.path.basename(path)}).",
+                                    source_file=relocation.source_file, line_no=relocation.line_no)
+                try:
+                    field_bytes = relocated_field(relocation.kind, target + relocation.addend)
+                except ObjectFileError as e:
+                    raise LinkError(f"Relocated {relocation.kind} field against "
+                                    f"'{relocation.symbol or obj.sections[obj.relocatable_section].name}': {e}",
+                                    source_file=relocation.source_file, line_no=relocation.line_no) from e
+                field_address = section_addresses[relocation.section] + relocation.offset
+                region = self._region_for(field_address, len(field_bytes))
+                region.store(field_address - region.start_addr, field_bytes)
+                relocation_count += 1
+        logger.info(f"Linked {len(self.objects)} object(s): {len(self.placements)} section(s), "
+                    f"{len(self.symbols)} symbol(s), {relocation_count} relocation(s) applied.")
+
+    def memory_usage(self) -> List[RegionUsage]:
+        """Free-space/fragmentation summary of every region."""
+        return [region.usage() for region in self.regions]
+
+    def write_output_files(self) -> List[str]:
+        """
+        Write each region with content, in every output format.
+
+        Returns:
+            Paths of the files written (none when linking in memory)
+
+        Raises:
+            AssemblerError: If output directory creation or file writing fails
+        """
+        if self.output_dir is None:
+            return []
+        return write_region_files(self.regions, self.output_formats)
+
+
+def main(object_paths: List[str], output_dir: str, region_definitions: Optional[List[Tuple[str, str, str]]] = None,
+         code_region: str = DEFAULT_CODE_REGION, output_formats: Optional[List[str]] = None,
+         memory_report: bool = False) -> List[str]:
+    """
+    Link object files and write the region images.
+
+    Returns:
+        Paths of the output files written
+
+    Raises:
+        LinkError: If linking fails
+        AssemblerError: If writing the outputs fails
+    """
+    try:
+        linker = Linker(object_paths, output_dir, region_definitions, code_region, output_formats)
+        linker.link()
+        written = linker.write_output_files()
+        if memory_report:
+            for usage in linker.memory_usage():
+                for line in usage.describe():
+                    logger.info(line)
+        return written
+    except (LinkError, AssemblerError) as e:
+        logger.error(f"Link failed: {e}")
+        raise
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    argp = argparse.ArgumentParser(prog="asm-link", description="Link relocatable object files (assembler.py --object)")
+    argp.add_argument("objects", nargs="+", help="Object files, placed in this order")
+    argp.add_argument("-o", "--output", dest="output_dir", required=True,
+                      help="Output directory for the region files (NAME.hex, ...)")
+    argp.add_argument(
+        "--region",
+        action="append",
+        nargs=3,
+        metavar=("NAME", "START_ADDR_HEX", "END_ADDR_HEX"),
+        dest="regions_arg",
+        help="Define a memory region (default: "
+             + ", ".join(f"{name} {start} {end}" for name, start, end in DEFAULT_LINK_REGIONS) + ")"
+    )
+    argp.add_argument("--code-region", default=DEFAULT_CODE_REGION,
+                      help=f"Region relocatable sections are placed in (default: {DEFAULT_CODE_REGION})")
+    argp.add_argument("--format", action="extend", nargs="+", choices=list(OUTPUT_FORMATS), dest="formats",
+                      help="Output format(s), as for assembler.py (default: readmemh)")
+    argp.add_argument("--memory-report", action="store_true", dest="memory_report",
+                      help="After linking, report each region's used and free bytes")
+    return argp
+
+
+if __name__ == "__main__":
+    args = build_argument_parser().parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    try:
+        main(args.objects, args.output_dir, args.regions_arg, args.code_region, args.formats, args.memory_report)
+    except Exception:
+        exit(1)
@@ -0,0 +1,167 @@
+# software/assembler/src/object_file.py
+"""
+Relocatable object files, for assembling modules separately and linking them
+(assembler.py --object, then linker.py).
+
+An object holds the bytes a module assembled to, in sections, plus what the
+linker needs to place them anywhere:
+
+  sections     A relocatable section (address None) holding the code and data
+               before any ORG, and one absolute section per ORG block
+  relocations  Fields whose value depends on where the relocatable section is
+               placed, or on a symbol imported from another object:
+               field = KIND(target address + addend)
+  exports      Every non-local symbol the module defines, as an offset into its
+               relocatable section or as an absolute value
+  imports      Symbols the module uses but does not define
+
+Relocation kinds:
+
+  word  16-bit little-endian field (JMP/JSR/LDA operands, DW items)
+  byte  8-bit field holding the whole value, which must fit in 8 bits
+  lo8   8-bit field holding the low byte (LOW_BYTE(...), value & $FF)
+  hi8   8-bit field holding the high byte (HIGH_BYTE(...), value >> 8)
+
+Files are JSON, section bytes as hex strings.
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+
+OBJECT_FORMAT_VERSION = 1
+
+RELOC_WORD = "word"
+RELOC_BYTE = "byte"
+RELOC_LO8 = "lo8"
+RELOC_HI8 = "hi8"
+
+# Name of an object's relocatable section
+RELOCATABLE_SECTION_NAME = "CODE"
+
+
+class ObjectFileError(ValueError):
+    """Raised when an object file cannot be read or a relocation cannot be applied."""
+
+
+class Relocation(NamedTuple):
+    section: int           # Index of the section holding the field
+    offset: int            # Offset of the field within that section
+    kind: str              # RELOC_WORD, RELOC_BYTE, RELOC_LO8 or RELOC_HI8
+    symbol: Optional[str]  # Imported symbol, or None for the object's relocatable section
+    addend: int
+    source_file: str       # Where the field was assembled from (for link errors)
+    line_no: int
+
+
+class ObjectSymbol(NamedTuple):
+    value: int
+    relocatable: bool  # value is an offset into the object's relocatable section
+
+
+@dataclass
+class ObjectSection:
+    name: str
+    address: Optional[int]  # None: relocatable, placed by the linker
+    data: bytearray = field(default_factory=bytearray, repr=False)
+
+
+@dataclass
+class ObjectFile:
+    source: str  # Main file of the module
+    sections: List[ObjectSection] = field(default_factory=list)
+    relocations: List[Relocation] = field(default_factory=list)
+    exports: Dict[str, ObjectSymbol] = field(default_factory=dict)
+    imports: List[str] = field(default_factory=list)
+
+    @property
+    def relocatable_section(self) -> Optional[int]:
+        """Index of the relocatable section, if the object has one."""
+        return next((index for index, section in enumerate(self.sections) if section.address is None), None)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "format": OBJECT_FORMAT_VERSION,
+            "source": self.source,
+            "sections": [{"name": section.name, "address": section.address, "data": section.data.hex()}
+                         for section in self.sections],
+            "relocations": [relocation._asdict() for relocation in self.relocations],
+            "exports": {name: symbol._asdict() for name, symbol in sorted(self.exports.items())},
+            "imports": self.imports,
+        }, indent=1) + "\n"
+
+    @classmethod
+    def from_json(cls, text: str) -> 'ObjectFile':
+        """
+        Raises:
+            ObjectFileError: If the text is not an object file of this format version
+        """
+        try:
+            data = json.loads(text)
+            if data.get("format") != OBJECT_FORMAT_VERSION:
+                raise ObjectFileError(f"Unsupported object file format {data.get('format')!r} "
+                                      f"(expected {OBJECT_FORMAT_VERSION}).")
+            return cls(
+                source=data["source"],
+                sections=[ObjectSection(section["name"], section["address"], bytearray.fromhex(section["data"]))
+                          for section in data["sections"]],
+                relocations=[Relocation(**relocation) for relocation in data["relocations"]],
+                exports={name: ObjectSymbol(**symbol) for name, symbol in data["exports"].items()},
+                imports=list(data["imports"]),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            if isinstance(e, ObjectFileError):
+                raise
+            raise ObjectFileError(f"Malformed object file: {e}")
+
+    def save(self, path: str) -> None:
+        """Write the object file (atomically, via a temporary file and rename)."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_json())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'ObjectFile':
+        """
+        Raises:
+            ObjectFileError: If the file cannot be read or is not an object file
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_json(f.read())
+        except OSError as e:
+            raise ObjectFileError(f"Cannot read object file '{path}': {e.strerror}")
+
+
+def relocated_field(kind: str, value: int) -> bytes:
+    """
+    Bytes a field of a given relocation kind holds for a final value.
+
+    Raises:
+        ObjectFileError: If the value does not fit the field
+    """
+    if kind == RELOC_WORD:
+        if not (0x0000 <= value <= 0xFFFF):
+            raise ObjectFileError(f"Value 0x{value:X} is out of 16-bit range (0x0000-0xFFFF).")
+        return bytes((value & 0xFF, value >> 8))
+    if kind == RELOC_BYTE:
+        if not (0x00 <= value <= 0xFF):
+            raise ObjectFileError(f"Value 0x{value:X} is out of 8-bit range (0x00-0xFF).")
+        return bytes((value,))
+    if kind == RELOC_LO8:
+        return bytes((value & 0xFF,))
+    if kind == RELOC_HI8:
+        return bytes(((value >> 8) & 0xFF,))
+    raise ObjectFileError(f"Unknown relocation kind '{kind}'.")
+
+
+def field_size(kind: str) -> int:
+    return 2 if kind == RELOC_WORD else 1
@@ -0,0 +1,106 @@
+# software/assembler/src/output_formats.py
+"""
+Output file formats rendered from a MemoryRegion's in-memory image.
+
+  readmemh  Verilog $readmemh text: region-relative @address lines and one byte
+            per line (NAME.hex, the original format)
+  bin       Raw image of the whole region, one byte per address; addresses
+            never emitted are 0x00 (NAME.bin)
+  ihex      Intel HEX with absolute CPU addresses (NAME.ihx)
+  srec      Motorola S-record (S1/S9) with absolute CPU addresses (NAME.srec)
+
+Every format is rendered from the same image, so requesting several costs one
+assembly.
+"""
+import os
+from typing import Callable, Dict, Iterator, List, Tuple
+
+DEFAULT_OUTPUT_FORMATS: Tuple[str, ...] = ("readmemh",)
+
+# Data bytes per Intel HEX / S-record line
+RECORD_DATA_BYTES = 16
+
+
+def _readmemh_text(region: 'MemoryRegion') -> bytes:
+    lines = region.render_hex_lines()
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def _bin_image(region: 'MemoryRegion') -> bytes:
+    # The region image is already the file content: written in one call
+    return region.data
+
+
+def _records(region: 'MemoryRegion') -> Iterator[Tuple[int, bytes]]:
+    """(absolute address, data) chunks of at most RECORD_DATA_BYTES, from the occupied runs."""
+    for start, end in region.occupied_runs():
+        for chunk_start in range(start, end, RECORD_DATA_BYTES):
+            chunk_end = min(chunk_start + RECORD_DATA_BYTES, end)
+            yield region.start_addr + chunk_start, bytes(region.data[chunk_start:chunk_end])
+
+
+def _ihex_record(record_type: int, address: int, data: bytes) -> str:
+    body = bytes((len(data), address >> 8, address & 0xFF, record_type)) + data
+    checksum = (-sum(body)) & 0xFF
+    return f":{body.hex().upper()}{checksum:02X}"
+
+
+def _ihex_text(region: 'MemoryRegion') -> bytes:
+    lines = [_ihex_record(0x00, address, data) for address, data in _records(region)]
+    lines.append(_ihex_record(0x01, 0x0000, b""))  # End of file
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def _srec_record(record_type: int, address: int, data: bytes) -> str:
+    body = bytes((len(data) + 3, address >> 8, address & 0xFF)) + data
+    checksum = ~sum(body) & 0xFF
+    return f"S{record_type}{body.hex().upper()}{checksum:02X}"
+
+
+def _srec_text(region: 'MemoryRegion') -> bytes:
+    lines = [_srec_record(0, 0x0000, region.name.encode("ascii", "replace"))]  # Header
+    lines.extend(_srec_record(1, address, data) for address, data in _records(region))
+    lines.append(_srec_record(9, 0x0000, b""))  # Termination
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+# Format name -> (file extension, renderer returning the file content)
+OUTPUT_FORMATS: Dict[str, Tuple[str, Callable[['MemoryRegion'], bytes]]] = {
+    "readmemh": (".hex", _readmemh_text),
+    "bin": (".bin", _bin_image),
+    "ihex": (".ihx", _ihex_text),
+    "srec": (".srec", _srec_text),
+}
+
+
+def output_path(region_output_filename: str, format_name: str) -> str:
+    """
+    File a format is written to: the region's output file itself for readmemh,
+    otherwise the same path with the format's extension.
+    """
+    if format_name == "readmemh":
+        return region_output_filename
+    return os.path.splitext(region_output_filename)[0] + OUTPUT_FORMATS[format_name][0]
+
+
+def render(region: 'MemoryRegion', format_name: str) -> bytes:
+    """
+    Render a region's image in the given format.
+
+    Raises:
+        KeyError: If the format is unknown
+    """
+    return OUTPUT_FORMATS[format_name][1](region)
+
+
+def validate_formats(format_names: List[str]) -> List[str]:
+    """
+    Return the requested formats in order without duplicates.
+
+    Raises:
+        ValueError: If a format is unknown
+    """
+    unknown = [name for name in format_names if name not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)}. Choose from: {', '.join(OUTPUT_FORMATS)}")
+    return list(dict.fromkeys(format_names))
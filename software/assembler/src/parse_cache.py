@@ -0,0 +1,132 @@
+# software/assembler/src/parse_cache.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+try:
+    from .source_manager import SourceFile
+except ImportError:
+    from source_manager import SourceFile
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of a cache entry changes
+CACHE_FORMAT_VERSION = 1
+
+_assembler_fingerprint: Optional[str] = None
+
+
+def hash_assembler_sources(digest: Any) -> None:
+    """Feed the name and source of every module of the assembler into a hashlib digest."""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for module_name in sorted(name for name in os.listdir(src_dir) if name.endswith(".py")):
+        digest.update(module_name.encode())
+        with open(os.path.join(src_dir, module_name), 'rb') as f:
+            digest.update(f.read())
+
+
+def assembler_fingerprint() -> str:
+    """
+    Version key for cache entries: a hash of the cache format and of the source of
+    every assembler module (the parser and everything it imports shape the cached
+    data), so any assembler change invalidates them.
+    """
+    global _assembler_fingerprint
+    if _assembler_fingerprint is None:
+        digest = hashlib.sha1(f"format-{CACHE_FORMAT_VERSION}".encode())
+        hash_assembler_sources(digest)
+        _assembler_fingerprint = digest.hexdigest()
+    return _assembler_fingerprint
+
+
+class ParseCache:
+    """
+    Persistent per-file cache of scanned line components and macro definitions,
+    stored as one JSON file per source content hash. Entries written by a different
+    assembler version, or for different content, are ignored and rebuilt.
+    """
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, source: SourceFile) -> str:
+        return os.path.join(self.cache_dir, f"{source.content_hash}.json")
+
+    def load(self, source: SourceFile) -> bool:
+        """
+        Seed a freshly loaded SourceFile from its cache entry, if there is a valid one.
+
+        Returns:
+            True on a cache hit, False if the entry is missing, stale or unreadable
+        """
+        entry_path = self._entry_path(source)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable parse cache entry {entry_path}: {e}")
+            self.misses += 1
+            return False
+
+        if entry.get("assembler") != assembler_fingerprint() or entry.get("line_count") != len(source.lines):
+            logger.debug(f"Stale parse cache entry for {source.path}")
+            self.misses += 1
+            return False
+
+        components: Dict[int, Optional[tuple]] = {
+            int(index): tuple(comps) if comps is not None else None
+            for index, comps in entry["components"].items()
+        }
+        macros = {int(index): macro for index, macro in entry["macros"].items()}
+        source.seed(components, macros)
+        self.hits += 1
+        logger.debug(f"Parse cache hit for {source.path} ({len(components)} lines, {len(macros)} macros)")
+        return True
+
+    def store(self, source: SourceFile) -> None:
+        """
+        Write a SourceFile's scanned state to the cache if it holds anything the
+        current entry does not. Failures are logged and otherwise ignored.
+        """
+        if not source.has_unsaved_scans():
+            return
+
+        components = {}
+        for index, comps in source.scanned_components().items():
+            # A None result for a non-blank line means the scanner warned about it;
+            # leave it out so the warning is repeated on the next run
+            if comps is None:
+                stripped = source.lines[index].strip()
+                if stripped and not stripped.startswith(';'):
+                    continue
+            components[str(index)] = list(comps) if comps is not None else None
+
+        entry = {
+            "assembler": assembler_fingerprint(),
+            "path": source.path,
+            "line_count": len(source.lines),
+            "components": components,
+            "macros": {str(index): macro for index, macro in source.macro_entries.items()},
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file and rename, so concurrent assemblies never
+            # read a half-written entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, self._entry_path(source))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            source.mark_saved()
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry for {source.path}: {e}")
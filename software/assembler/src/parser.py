@@ -2,21 +2,42 @@
 import logging
 import os
 import re
-from typing import List, Dict, Optional, Tuple, NamedTuple
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, NamedTuple, Union
+from dataclasses import dataclass, field
 
 # Assuming constants.py is in the same directory or accessible via PYTHONPATH
 # Adjust if your constants file is located elsewhere relative to parser.py
 try:
     from .constants import INSTRUCTION_SET
+    from .source_manager import SourceManager, SourceFile
+    from .parse_cache import ParseCache
+    from .tokens import Token, TokenStore
+    from .expressions import evaluate_expression, expression_symbols, ExpressionError
+    from .incbin import IncbinSpec, IncbinError, resolve_incbin
+    from .data_items import split_data_items, numeric_data
+    from .lexer import lex_line, split_operands, leading_word, leading_keyword, is_bare_keyword, LexError
 except ImportError:
     # Fallback for direct execution or different project structure
     from constants import INSTRUCTION_SET
+    from source_manager import SourceManager, SourceFile
+    from parse_cache import ParseCache
+    from tokens import Token, TokenStore
+    from expressions import evaluate_expression, expression_symbols, ExpressionError
+    from incbin import IncbinSpec, IncbinError, resolve_incbin
+    from data_items import split_data_items, numeric_data
+    from lexer import lex_line, split_operands, leading_word, leading_keyword, is_bare_keyword, LexError
 
 
 logger = logging.getLogger(__name__)
 
 
+# Directives that open, switch or close a conditional assembly block
+CONDITIONAL_DIRECTIVES = frozenset({'IFDEF', 'IFNDEF', 'ELSE', 'ENDIF'})
+
+# Directives the macro collection phase acts on
+MACRO_PHASE_DIRECTIVES = frozenset({'MACRO', 'ENDM', 'INCLUDE'})
+
+
 class ConditionalBlock(NamedTuple):
     """Represents a conditional assembly block state."""
     directive_type: str  # 'IFDEF' or 'IFNDEF'
@@ -28,14 +49,86 @@ class ConditionalBlock(NamedTuple):
     line_no: int         # Line number where directive was defined
 
 
+class PendingEqu(NamedTuple):
+    """An EQU whose value depends on symbols not yet defined when it was read."""
+    expression: str      # Operand expression
+    source_file: str     # File where the EQU was defined
+    line_no: int         # Line number where the EQU was defined
+
+
+# Slot index used in macro templates for the per-expansion unique ID (@@label mangling).
+# Parameters use slots 0..n-1; -1 addresses the ID appended after the arguments.
+EXPANSION_ID_SLOT = -1
+
+# Matches an @@local label inside a macro body line (group 1: label name)
+_MACRO_LOCAL_LABEL = r'@@([A-Za-z_]\w*)'
+
+
 @dataclass(frozen=True)
-class Token:
-    """Represents a tokenized piece of an assembly line, with source context."""
-    line_no: int         # Line number within its original source_file
-    source_file: str     # The original file path this token came from
-    label:   Optional[str] # Original label, e.g., "MY_LABEL" or ".loop"
-    mnemonic: Optional[str]
-    operand:  Optional[str] # Operand string, local labels may be mangled here by parser
+class MacroLineTemplate:
+    """
+    One macro body line compiled into literal fragments and slots.
+    An int part is a slot index into the expansion values (arguments, then the
+    expansion ID); a str part is copied verbatim.
+    """
+    parts: Tuple[Union[str, int], ...]
+    call_name: Optional[str]     # Upper-cased literal mnemonic; the line is a nested call site if this names a macro
+    needs_scan: bool             # Mnemonic comes from a parameter (or line only lexes after expansion): re-scan when expanding
+
+    def render(self, values: List[str]) -> str:
+        """Join literal fragments and slot values into the expanded line."""
+        return ''.join([part if part.__class__ is str else values[part] for part in self.parts])
+
+
+def compile_macro_body(parameters: List[str], body_lines: List[str]) -> Tuple[MacroLineTemplate, ...]:
+    """
+    Compile macro body lines into templates. Parameter names are matched as whole
+    words and @@local labels become '__MACRO_<id>_<name>', exactly once per
+    definition instead of once per invocation.
+    """
+    if parameters:
+        pattern = re.compile(_MACRO_LOCAL_LABEL + r'|\b(' + '|'.join(re.escape(p) for p in parameters) + r')\b')
+    else:
+        pattern = re.compile(_MACRO_LOCAL_LABEL)
+    param_slots = {param: index for index, param in enumerate(parameters)}
+
+    templates: List[MacroLineTemplate] = []
+    for body_line in body_lines:
+        parts: List[Union[str, int]] = []
+        analysis_text: List[str] = []  # Line with parameters left as their own names, for lexing
+        pos = 0
+        for m in pattern.finditer(body_line):
+            literal = body_line[pos:m.start()]
+            if m.group(1) is not None:  # @@local label
+                parts.extend((literal + "__MACRO_", EXPANSION_ID_SLOT, f"_{m.group(1)}"))
+                analysis_text.append(f"{literal}__MACRO_0_{m.group(1)}")
+            else:
+                parts.extend((literal, param_slots[m.group(2)]))
+                analysis_text.append(literal + m.group(2))
+            pos = m.end()
+        parts.append(body_line[pos:])
+        analysis_text.append(body_line[pos:])
+        merged: List[Union[str, int]] = []
+        for part in parts:
+            if part.__class__ is str and merged and merged[-1].__class__ is str:
+                merged[-1] += part
+            elif part != "":
+                merged.append(part)
+
+        call_name: Optional[str] = None
+        needs_scan = False
+        try:
+            lexed = lex_line(''.join(analysis_text))
+            if lexed.mnemonic:
+                if lexed.mnemonic.text in param_slots:
+                    needs_scan = True
+                else:
+                    call_name = lexed.mnemonic.text.upper()
+        except LexError:
+            needs_scan = True
+        templates.append(MacroLineTemplate(tuple(merged), call_name, needs_scan))
+    return tuple(templates)
+
 
 @dataclass(frozen=True)
 class MacroDefinition:
@@ -45,6 +138,11 @@ class MacroDefinition:
     body_lines: List[str]        # Raw body lines (before expansion)
     source_file: str             # File where macro was defined
     line_no: int                 # Line number where macro was defined
+    template: Tuple[MacroLineTemplate, ...] = field(default=(), compare=False, repr=False)  # Compiled body
+
+    def __post_init__(self) -> None:
+        if not self.template and self.body_lines:
+            object.__setattr__(self, 'template', compile_macro_body(self.parameters, self.body_lines))
 
 class ParserError(Exception):
     """Custom exception for parsing errors, includes context."""
@@ -68,45 +166,32 @@ class ParserError(Exception):
         return f"ParserError: {context}{self.base_message}"
 
 
-# Updated LINE_PATTERN to support local labels (starting with '.')
-# Group 1: Label (e.g., GLOBAL_LABEL:, .local_label:)
-# Group 2: Mnemonic
-# Group 3: Operand
-LINE_PATTERN = re.compile(
-    r'^\s*'                                 # leading whitespace
-    r'(?:((?:[a-zA-Z_]\w*|\.\w+):))?'       # group 1: optional label (global or local)
-    r'\s*'                                  # separator
-    r'(?:'                                  # start main optional instruction part
-        r'([A-Z_a-z]\w*)'                   # group 2: mnemonic
-        r'(?:'                              # start OPTIONAL "delimiter and operand" subgroup
-            r'(?:\s*,\s*|\s+)'              #   REQUIRED delimiter
-            r'(.*?)'                        #   group 3: operand (lazy)
-        r')?'                               # end OPTIONAL "delimiter and operand" subgroup
-    r')?'                                   # end main optional instruction part
-    r'\s*(?:;.*)?$'                         # optional trailing comment
-)
-
-# Regex to split comma-separated arguments, respecting strings
-# Splits by comma, but not if comma is inside double quotes
-# Example: DB "string, with comma", 10, "another"
-# Will yield: ['"string, with comma"', ' 10', ' "another"'] (stripping needed later)
-CSV_SPLIT_REGEX = re.compile(r',(?=(?:[^"]*"[^"]*")*[^"]*$)')
-
-
 class Parser:
     """
     First-pass parser: tokenizes assembly lines, handles INCLUDE directives,
     builds symbol table (mangling local labels), and records a flat list of tokens
     (with local label references in operands also mangled).
     """
-    def __init__(self, main_input_filepath: str) -> None:
+    def __init__(self, main_input_filepath: str, source_manager: Optional[SourceManager] = None,
+                 cache_dir: Optional[str] = None) -> None:
         self.main_input_filepath: str = os.path.normpath(main_input_filepath)
+        # Shared file cache: both the macro collection phase and the main parse
+        # phase read each file (and scan each line) only once per assembly.
+        # With cache_dir, scan results and macro definitions also persist across runs.
+        if source_manager is None:
+            source_manager = SourceManager(ParseCache(cache_dir) if cache_dir else None)
+        self.source_manager: SourceManager = source_manager
         self.symbol_table: Dict[str, int] = {}
-        self.tokens: List[Token] = []
+        self.tokens: TokenStore = TokenStore()  # Iterates/indexes as Token objects
         self.macros: Dict[str, MacroDefinition] = {}  # Macro storage
         self._files_in_recursion_stack: List[str] = []
         self._macro_expansion_counter: int = 0  # For unique local label generation
         self._conditional_stack: List[ConditionalBlock] = []
+        self._assembling: bool = True  # Cached: False while inside any false conditional block
+        # EQUs waiting on forward references, in definition order; resolved after the parse phase
+        self._pending_equs: Dict[str, PendingEqu] = {}
+        # Every source, include and INCBIN file the program read, in first-use order (keys only)
+        self.dependencies: Dict[str, None] = {}
 
         logger.info(f"Parser initialized for main file: {self.main_input_filepath}")
         
@@ -116,9 +201,13 @@ class Parser:
         # Then: process all files with macro expansion
         self._parse_and_process_file(self.main_input_filepath, 0, None) 
 
+        # Then: evaluate forward-referencing EQUs in dependency order
+        self._resolve_pending_equs()
+
         logger.info("Parsing complete. Final symbol table:")
-        for sym, val in sorted(self.symbol_table.items()): # Sort for consistent logging
-            logger.info(f"  {sym!r} -> 0x{val:04X}")
+        if logger.isEnabledFor(logging.INFO):
+            for sym, val in sorted(self.symbol_table.items()): # Sort for consistent logging
+                logger.info(f"  {sym!r} -> 0x{val:04X}")
         logger.info(f"Total tokens collected for assembler: {len(self.tokens)}")
         
         # Check for unmatched conditional directives at end of parsing
@@ -127,16 +216,7 @@ class Parser:
             raise ParserError(f"Unmatched {unmatched_block.directive_type} directive - missing ENDIF", 
                               unmatched_block.source_file, unmatched_block.line_no)
 
-    def _should_assemble_line(self) -> bool:
-        """Determine if the current line should be assembled based on conditional stack."""
-        if not self._conditional_stack:
-            return True
-        
-        # If any level in the stack says don't assemble, then don't assemble
-        for block in self._conditional_stack:
-            if not block.should_assemble:
-                return False
-        return True
+        self.source_manager.flush()
 
     def _handle_conditional_directive(self, mnemonic: str, operand: Optional[str], 
                                       source_file: str, line_no: int) -> bool:
@@ -154,7 +234,7 @@ class Parser:
                 raise ParserError(f"{mnemonic_upper} directive requires a symbol name", source_file, line_no)
             
             symbol_name = operand.strip()
-            is_defined = symbol_name in self.symbol_table
+            is_defined = symbol_name in self.symbol_table or symbol_name in self._pending_equs
             
             # Determine if condition is met
             if mnemonic_upper == 'IFDEF':
@@ -164,7 +244,7 @@ class Parser:
             
             # Determine if this block should be assembled
             # Consider parent blocks - if any parent says don't assemble, we inherit that
-            parent_should_assemble = self._should_assemble_line()
+            parent_should_assemble = self._assembling
             should_assemble = parent_should_assemble and condition_met
             
             # Push new conditional block
@@ -178,6 +258,7 @@ class Parser:
                 line_no=line_no
             )
             self._conditional_stack.append(new_block)
+            self._assembling = should_assemble
             
             logger.debug(f"{mnemonic_upper} {symbol_name}: symbol_defined={is_defined}, "
                         f"condition_met={condition_met}, should_assemble={should_assemble}")
@@ -192,13 +273,10 @@ class Parser:
                 raise ParserError("Multiple ELSE directives in same conditional block", source_file, line_no)
             
             # Switch to else block - invert the assembly condition
+            # (the enclosing block's should_assemble already reflects every outer level)
             parent_should_assemble = True
             if len(self._conditional_stack) > 1:
-                # Check if parent blocks allow assembly
-                for block in self._conditional_stack[:-1]:
-                    if not block.should_assemble:
-                        parent_should_assemble = False
-                        break
+                parent_should_assemble = self._conditional_stack[-2].should_assemble
             
             # In ELSE block, assemble if parent allows AND original condition was NOT met
             should_assemble = parent_should_assemble and not current_block.condition_met
@@ -209,6 +287,7 @@ class Parser:
                 should_assemble=should_assemble
             )
             self._conditional_stack[-1] = updated_block
+            self._assembling = should_assemble
             
             logger.debug(f"ELSE: switching to else block, should_assemble={should_assemble}")
             return True
@@ -218,11 +297,48 @@ class Parser:
                 raise ParserError("ENDIF directive without matching IFDEF or IFNDEF", source_file, line_no)
             
             closed_block = self._conditional_stack.pop()
+            self._assembling = self._conditional_stack[-1].should_assemble if self._conditional_stack else True
             logger.debug(f"ENDIF: closed {closed_block.directive_type} block for '{closed_block.symbol_name}'")
             return True
             
         return False
 
+    def _check_macro_not_defined(self, macro_name: str, source_file: str, line_no: int) -> None:
+        """Raise ParserError if a macro with this name was already collected."""
+        if macro_name in self.macros:
+            raise ParserError(f"Macro '{macro_name}' already defined at {self.macros[macro_name].source_file}:{self.macros[macro_name].line_no}", 
+                              source_file, line_no)
+
+    def _macro_definition_at(self, source: SourceFile, line_index: int) -> Tuple[MacroDefinition, int]:
+        """
+        Return the macro defined by the MACRO line at line_index, reusing the source
+        file's recorded entry (from this run or the persistent cache) when there is one.
+        
+        Returns:
+            Tuple of (macro_definition, endm_line_index)
+        """
+        entry = source.macro_entries.get(line_index)
+        if entry is None:
+            macro_def, end_index = self._parse_macro_definition(source.lines[line_index], source.lines, line_index, source.path)
+            source.macro_entries[line_index] = {
+                "name": macro_def.name,
+                "parameters": macro_def.parameters,
+                "body_lines": macro_def.body_lines,
+                "line_no": macro_def.line_no,
+                "end_index": end_index,
+            }
+            return macro_def, end_index
+
+        self._check_macro_not_defined(entry["name"], source.path, entry["line_no"])
+        macro_def = MacroDefinition(
+            name=entry["name"],
+            parameters=list(entry["parameters"]),
+            body_lines=list(entry["body_lines"]),
+            source_file=source.path,
+            line_no=entry["line_no"]
+        )
+        return macro_def, entry["end_index"]
+
     def _parse_macro_definition(self, macro_line: str, lines: List[str], line_index: int, 
                                 source_file: str) -> Tuple[MacroDefinition, int]:
         """
@@ -242,18 +358,22 @@ class Parser:
         """
         line_no = line_index + 1  # Convert to 1-based
         
-        # Parse MACRO line
-        macro_match = re.match(r'^\s*MACRO\s+([A-Za-z_]\w*)(?:\s+(.+?))?\s*(?:;.*)?$', macro_line, re.IGNORECASE)
-        if not macro_match:
+        # Parse MACRO line: "MACRO name [param, ...]"
+        try:
+            lexed = lex_line(macro_line)
+        except LexError:
+            raise ParserError("Malformed MACRO directive", source_file, line_no)
+        header = lexed.operand.text if lexed.operand else ""
+        name_word = leading_word(header)
+        if (lexed.label or not lexed.mnemonic or lexed.mnemonic.text.upper() != 'MACRO'
+                or name_word is None or (name_word[1] < len(header) and not header[name_word[1]].isspace())):
             raise ParserError("Malformed MACRO directive", source_file, line_no)
         
-        macro_name = macro_match.group(1).upper()
-        params_str = macro_match.group(2)
+        macro_name = name_word[0].upper()
+        params_str = header[name_word[1]:].strip()
         
         # Check for duplicate macro definition
-        if macro_name in self.macros:
-            raise ParserError(f"Macro '{macro_name}' already defined at {self.macros[macro_name].source_file}:{self.macros[macro_name].line_no}", 
-                              source_file, line_no)
+        self._check_macro_not_defined(macro_name, source_file, line_no)
         
         # Parse parameters
         parameters: List[str] = []
@@ -276,7 +396,7 @@ class Parser:
             current_line_no = current_line_index + 1
             
             # Check for ENDM
-            if re.match(r'^\s*ENDM\s*(?:;.*)?$', current_line, re.IGNORECASE):
+            if is_bare_keyword(current_line, 'ENDM'):
                 # Found end of macro
                 macro_def = MacroDefinition(
                     name=macro_name,
@@ -329,27 +449,19 @@ class Parser:
         self._macro_expansion_counter += 1
         expansion_id = self._macro_expansion_counter
         
-        # Create parameter substitution map
-        param_map = dict(zip(macro_def.parameters, args))
+        # Slot values: arguments by parameter index, then the expansion ID (EXPANSION_ID_SLOT)
+        slot_values = list(args)
+        slot_values.append(str(expansion_id))
         
-        # Expand macro body
+        # Expand macro body from its compiled template
         expanded_lines: List[str] = []
-        for body_line in macro_def.body_lines:
-            expanded_line = body_line
-            
-            # Substitute parameters
-            for param, arg in param_map.items():
-                # Use word boundaries to avoid partial matches
-                pattern = r'\b' + re.escape(param) + r'\b'
-                expanded_line = re.sub(pattern, arg, expanded_line)
-            
-            # Handle local labels (@@label -> unique label)
-            local_label_pattern = r'@@([A-Za-z_]\w*)'
-            expanded_line = re.sub(local_label_pattern, 
-                                   rf'__MACRO_{expansion_id}_\1', 
-                                   expanded_line)
-            
-            # Check if the expanded line contains another macro invocation
+        for line_template in macro_def.template:
+            expanded_line = line_template.render(slot_values)
+            
+            # Only lines marked as possible call sites are re-scanned for nested macro invocations
+            if not (line_template.needs_scan or line_template.call_name in self.macros):
+                expanded_lines.append(expanded_line)
+                continue
             nested_parsed = self._parse_line_components(expanded_line, source_file, line_no)
             if nested_parsed:
                 nested_label, nested_mnemonic, nested_operand = nested_parsed
@@ -357,8 +469,7 @@ class Parser:
                     # Parse nested macro arguments
                     nested_args: List[str] = []
                     if nested_operand:
-                        nested_args = [arg.strip() for arg in CSV_SPLIT_REGEX.split(nested_operand)]
-                        nested_args = [arg for arg in nested_args if arg]
+                        nested_args = [arg.text for arg in split_operands(nested_operand) if arg.text]
                     
                     # Recursively expand nested macro
                     nested_expanded = self._expand_macro(nested_mnemonic.upper(), nested_args, source_file, line_no)
@@ -378,6 +489,12 @@ class Parser:
         logger.debug(f"Expanded macro '{macro_name}' with {len(args)} args into {len(expanded_lines)} lines")
         return expanded_lines
 
+    @staticmethod
+    def _is_line_directive(parsed_comps: Optional[Tuple[Optional[str], Optional[str], Optional[str]]], directive: str) -> bool:
+        """Check if scanned line components are an unlabelled directive (e.g. MACRO, ENDM)."""
+        return bool(parsed_comps and parsed_comps[0] is None and parsed_comps[1]
+                    and parsed_comps[1].upper() == directive)
+
     def _is_macro_invocation(self, mnemonic: str) -> bool:
         """Check if a mnemonic is a macro invocation."""
         return mnemonic.upper() in self.macros
@@ -474,15 +591,17 @@ class Parser:
         processed_string = self._process_string_escapes(string_content, source_file, line_no)
         return len(processed_string)
 
-    def _load_and_validate_file(self, filepath_to_process: str) -> Tuple[str, List[str]]:
+    def _load_and_validate_file(self, filepath_to_process: str) -> Tuple[str, SourceFile]:
         """
         Load and validate a file for parsing, handling recursion detection.
+        The file is fetched through the source manager, so repeated visits reuse
+        the same lines and scanned components.
         
         Args:
             filepath_to_process: Path to the file to load and validate
             
         Returns:
-            Tuple of (normalized_filepath, lines_from_file)
+            Tuple of (normalized_filepath, source_file)
             
         Raises:
             ParserError: If circular include detected or file cannot be loaded
@@ -497,10 +616,13 @@ class Parser:
         logger.debug(f"Starting processing of file: {normalized_filepath}")
 
         try:
-            lines = self._load_lines_from_physical_file(normalized_filepath, 
-                                                        requesting_file=self._files_in_recursion_stack[-2] if len(self._files_in_recursion_stack) > 1 else self.main_input_filepath, 
-                                                        requesting_line_no=0)
-            return normalized_filepath, lines
+            source = self.source_manager.get(
+                normalized_filepath,
+                lambda: self._load_lines_from_physical_file(normalized_filepath, 
+                                                            requesting_file=self._files_in_recursion_stack[-2] if len(self._files_in_recursion_stack) > 1 else self.main_input_filepath, 
+                                                            requesting_line_no=0))
+            self.dependencies.setdefault(normalized_filepath)
+            return normalized_filepath, source
         except ParserError as e: 
             self._files_in_recursion_stack.pop()
             raise e
@@ -534,6 +656,24 @@ class Parser:
         # Pass current effective_address and current active_global_label to the included file
         return self._parse_and_process_file(abs_path_to_include_file, effective_address, active_global_label)
 
+    def _resolve_incbin_operand(self, operand_candidate: Optional[str], source_file: str, line_no: int) -> str:
+        """
+        Resolve an INCBIN operand to its canonical form ("<absolute path>", offset, length),
+        sized from the file's metadata. Offset and length may use symbols already defined.
+
+        Raises:
+            ParserError: If the operand is malformed or does not fit the file
+        """
+        try:
+            spec = resolve_incbin(operand_candidate, source_file,
+                                  lambda expr: self._parse_simple_expression(expr, source_file, line_no))
+        except IncbinError as e:
+            raise ParserError(str(e), source_file, line_no)
+        self.dependencies.setdefault(spec.path)
+        logger.debug(f"INCBIN '{spec.path}': {spec.length} bytes from offset {spec.offset}",
+                     extra={'source_file': source_file, 'line_no': line_no})
+        return spec.to_operand()
+
     def _update_symbol_table_and_address(self, label_name_for_symbol_table: Optional[str], 
                                          final_mnemonic: str, final_operand: Optional[str],
                                          effective_address: int, normalized_filepath: str, line_no_in_file: int) -> int:
@@ -566,6 +706,8 @@ class Parser:
                 raise ParserError("ORG directive missing address.", normalized_filepath, line_no_in_file)
             # Simplified ORG value resolution for parser pass (as before)
             org_val: int
+            if final_operand in self._pending_equs:
+                self._resolve_pending_equ(final_operand, [])
             if final_operand in self.symbol_table:
                 org_val = self.symbol_table[final_operand]
             else:
@@ -593,14 +735,19 @@ class Parser:
                     # First try simple numeric literal
                     equ_value = self._parse_numeric_literal(final_operand, f"value for EQU '{label_name_for_symbol_table}'", normalized_filepath, line_no_in_file)
                 except ParserError:
-                    # If that fails, try basic expression parsing with currently defined symbols
-                    try:
-                        equ_value = self._parse_simple_expression(final_operand, normalized_filepath, line_no_in_file)
-                    except ParserError as e:
-                        raise ParserError(f"EQU value '{final_operand}' for '{label_name_for_symbol_table}' must be a numeric literal or a pre-defined symbol in parser's pass. Error: {e}",
-                                          normalized_filepath, line_no_in_file)
+                    # If that fails, it is an expression: evaluate it now if everything it
+                    # references is defined, otherwise defer it until the parse phase ends
+                    pending = PendingEqu(final_operand, normalized_filepath, line_no_in_file)
+                    if not self._equ_dependencies_defined(label_name_for_symbol_table, pending):
+                        self._defer_equ(label_name_for_symbol_table, pending)
+                        return effective_address
+                    equ_value = self._evaluate_equ(label_name_for_symbol_table, pending)
             self._add_symbol_to_table(label_name_for_symbol_table, equ_value, normalized_filepath, line_no_in_file)
         
+        elif mnem_upper == 'INCBIN':
+            # Operand was resolved to its canonical form by _resolve_incbin_operand
+            effective_address += IncbinSpec.from_operand(final_operand).length
+
         elif mnem_upper not in ['ORG', 'EQU']: # Regular instruction or DB/DW
             instr_info = INSTRUCTION_SET.get(mnem_upper)
             if instr_info is None:
@@ -618,21 +765,18 @@ class Parser:
         return effective_address
 
     def _parse_line_components(self, raw_line_text: str, source_file: str, line_no: int) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
-        text = raw_line_text.strip()
-        if not text or text.startswith(';'):
+        try:
+            lexed = lex_line(raw_line_text)
+        except LexError:
+            logger.warning(f"Unrecognized syntax on line, skipping: '{raw_line_text.strip()}'", extra={'source_file': source_file, 'line_no': line_no})
             return None
-
-        m = LINE_PATTERN.match(text)
-        if not m:
-            # Check for label-only line with updated pattern (e.g. .label_only:)
-            label_only_match = re.match(r'^\s*((?:[a-zA-Z_]\w*|\.\w+):)\s*(?:;.*)?$', text)
-            if label_only_match:
-                return (label_only_match.group(1).rstrip(':'), None, None) # Strip colon from label
-            logger.warning(f"Unrecognized syntax on line, skipping: '{text}'", extra={'source_file': source_file, 'line_no': line_no})
+        if lexed.is_empty:
             return None
 
-        raw_label, raw_mnem, raw_op = m.groups()
-        label = raw_label.rstrip(':') if raw_label else None
+        text = raw_line_text.strip()
+        label = lexed.label.text if lexed.label else None
+        raw_mnem = lexed.mnemonic.text if lexed.mnemonic else None
+        raw_op = lexed.operand.text if lexed.operand else None
 
         if raw_mnem and raw_op and raw_op.upper().startswith('EQU '):
             parts = raw_op.split(maxsplit=1)
@@ -665,7 +809,7 @@ class Parser:
         final_full_mnem = base_mnem_upper
 
         if base_mnem_upper == 'LDI' and operand: 
-            parts = [p.strip() for p in CSV_SPLIT_REGEX.split(operand, 1)] 
+            parts = [p.text for p in split_operands(operand, maxsplit=1)]
             if len(parts) == 2:
                 reg, imm_val = parts
                 final_full_mnem = f"{base_mnem_upper}_{reg.upper()}"
@@ -673,7 +817,7 @@ class Parser:
             else:
                 raise ParserError(f"Malformed operand for LDI: '{operand}'. Expected 'REG, VALUE'.", source_file, line_no)
         elif base_mnem_upper == 'MOV' and operand: 
-            parts = [p.strip() for p in CSV_SPLIT_REGEX.split(operand, 1)]
+            parts = [p.text for p in split_operands(operand, maxsplit=1)]
             if len(parts) == 2:
                 dst, src = parts
                 final_full_mnem = f"MOV_{dst.upper()}{src.upper()}"
@@ -710,20 +854,85 @@ class Parser:
         self.symbol_table[label] = value
         logger.debug(f"Symbol added: '{label}' = 0x{value:04X}", extra={'source_file': source_file, 'line_no': line_no})
 
+    def _equ_dependencies(self, label: str, pending: PendingEqu) -> Tuple[str, ...]:
+        try:
+            return expression_symbols(pending.expression)
+        except ExpressionError as e:
+            raise ParserError(f"Malformed EQU value '{pending.expression}' for '{label}'. Error: {e}",
+                              pending.source_file, pending.line_no)
+
+    def _equ_dependencies_defined(self, label: str, pending: PendingEqu) -> bool:
+        return all(name in self.symbol_table for name in self._equ_dependencies(label, pending))
+
+    def _evaluate_equ(self, label: str, pending: PendingEqu) -> int:
+        try:
+            return self._parse_simple_expression(pending.expression, pending.source_file, pending.line_no)
+        except ParserError as e:
+            raise ParserError(f"EQU value '{pending.expression}' for '{label}' could not be resolved. Error: {e}",
+                              pending.source_file, pending.line_no)
+
+    def _defer_equ(self, label: str, pending: PendingEqu) -> None:
+        """Record an EQU with forward references; its name counts as defined from here on."""
+        earlier = self._pending_equs.get(label)
+        if earlier is not None and earlier.expression != pending.expression:
+            raise ParserError(f"Duplicate symbol: '{label}' (already defined by EQU '{earlier.expression}' "
+                              f"at {earlier.source_file}:{earlier.line_no}).", pending.source_file, pending.line_no)
+        if earlier is None:
+            self._pending_equs[label] = pending
+        logger.debug(f"EQU '{label}' deferred: '{pending.expression}' has forward references.",
+                     extra={'source_file': pending.source_file, 'line_no': pending.line_no})
+
+    def _resolve_pending_equs(self) -> None:
+        """
+        Evaluate the deferred EQUs in one topological pass over their dependency
+        graph, so each value is computed exactly once, after everything it uses.
+
+        Raises:
+            ParserError: On a circular definition (naming the cycle), or if an EQU
+                references a symbol that is never defined
+        """
+        while self._pending_equs:
+            self._resolve_pending_equ(next(iter(self._pending_equs)), [])
+
+    def _resolve_pending_equ(self, label: str, path: List[str]) -> None:
+        """
+        Resolve one deferred EQU after (depth first) the deferred EQUs it depends on.
+
+        Args:
+            label: Name of the deferred EQU
+            path: Deferred EQUs currently being resolved, outermost first
+        """
+        pending = self._pending_equs[label]
+        if label in path:
+            cycle = " -> ".join(path[path.index(label):] + [label])
+            raise ParserError(f"Circular EQU definition: {cycle}", pending.source_file, pending.line_no)
+        path.append(label)
+        for name in self._equ_dependencies(label, pending):
+            if name in self._pending_equs:
+                self._resolve_pending_equ(name, path)
+        path.pop()
+
+        equ_value = self._evaluate_equ(label, pending)
+        del self._pending_equs[label]
+        self._add_symbol_to_table(label, equ_value, pending.source_file, pending.line_no)
+
     def _calculate_db_dw_size(self, mnemonic_upper: str, operand_str: Optional[str], source_file: str, line_no: int) -> int:
         if not operand_str:
             raise ParserError(f"{mnemonic_upper} directive requires operand(s).", source_file, line_no)
 
-        items = CSV_SPLIT_REGEX.split(operand_str)
-        total_bytes = 0
-        
         item_size = 1 if mnemonic_upper == "DB" else 2 # Default item size for DW
 
+        # Tables of plain numeric literals are converted in one batch; the cached
+        # result is reused when the assembler encodes the same operand
+        table_bytes = numeric_data(operand_str, item_size)
+        if table_bytes is not None:
+            return len(table_bytes)
+
+        items = split_data_items(operand_str)
+        total_bytes = 0
+
         if mnemonic_upper == "DB":
             for item_text in items:
-                item_text = item_text.strip()
-                if not item_text: continue # Skip empty items from trailing commas, etc.
-
                 if item_text.startswith('"') and item_text.endswith('"'):
                     if len(item_text) < 2:
                         raise ParserError(f"Malformed string literal in DB: {item_text}", source_file, line_no)
@@ -733,15 +942,7 @@ class Parser:
                 else: # Assumed numeric or symbol
                     total_bytes += item_size # 1 byte for this item
         elif mnemonic_upper == "DW":
-            # For DW, current implementation expects one value. If multiple allowed in future:
-            if len(items) > 1:
-                logger.warning(f"[{source_file} line {line_no}] DW directive currently supports only one value per line. "
-                               f"'{operand_str}' will be treated as {len(items)} words if assembler supports it, "
-                               f"but parser address advance assumes this for now.")
-            for item_text in items:
-                item_text = item_text.strip()
-                if not item_text: continue
-                total_bytes += item_size # 2 bytes per item
+            total_bytes += item_size * len(items) # 2 bytes per item
         
         if total_bytes == 0 and items: # e.g. DB ""
              pass # allow DB "" to produce 0 bytes
@@ -755,27 +956,34 @@ class Parser:
         This must be done first before any macro expansion.
         """
         # Load and validate file
-        normalized_filepath, lines = self._load_and_validate_file(filepath_to_process)
+        normalized_filepath, source = self._load_and_validate_file(filepath_to_process)
+        lines = source.lines
         
         line_index = 0
         while line_index < len(lines):
-            raw_line = lines[line_index]
             line_no_in_file = line_index + 1
             
+            # Only MACRO, ENDM and INCLUDE lines matter here; the rest are scanned (once)
+            # when phase 2 reaches them, or never if they sit in a false conditional block
+            if self._peek_directive(source, line_index) not in MACRO_PHASE_DIRECTIVES:
+                line_index += 1
+                continue
+
+            parsed_comps = source.components(line_index, self._parse_line_components)
+
             # Check for macro definition
-            if re.match(r'^\s*MACRO\s+', raw_line, re.IGNORECASE):
-                macro_def, end_index = self._parse_macro_definition(raw_line, lines, line_index, normalized_filepath)
+            if self._is_line_directive(parsed_comps, 'MACRO'):
+                macro_def, end_index = self._macro_definition_at(source, line_index)
                 self.macros[macro_def.name] = macro_def
                 logger.debug(f"Collected macro definition: {macro_def.name} with {len(macro_def.parameters)} parameters")
                 line_index = end_index + 1  # Skip to after ENDM
                 continue
             
             # Check for ENDM without MACRO
-            if re.match(r'^\s*ENDM\s*(?:;.*)?$', raw_line, re.IGNORECASE):
+            if self._is_line_directive(parsed_comps, 'ENDM') and not parsed_comps[2]:
                 raise ParserError("ENDM without corresponding MACRO definition", normalized_filepath, line_no_in_file)
             
             # Check for INCLUDE directive to recursively collect macros
-            parsed_comps = self._parse_line_components(raw_line, normalized_filepath, line_no_in_file)
             if parsed_comps:
                 _, mnemonic_candidate, operand_candidate = parsed_comps
                 if mnemonic_candidate and mnemonic_candidate.upper() == "INCLUDE":
@@ -811,128 +1019,188 @@ class Parser:
             ParserError: If file parsing fails or circular includes detected
         """
         # Load and validate file
-        normalized_filepath, lines = self._load_and_validate_file(filepath_to_process)
+        normalized_filepath, source = self._load_and_validate_file(filepath_to_process)
+        lines = source.lines
         
         # Initialize processing state
         active_global_label = current_global_label_scope 
         effective_address = current_address
         logger.debug(f"Starting processing of file: {normalized_filepath} (initial active_global_scope: {active_global_label})")
 
-        # Process lines with macro expansion (macros already collected globally)
+        # Process lines in order, expanding macros (already collected globally) as they are reached
         line_index = 0
-        expanded_lines: List[Tuple[str, int, str]] = []  # (line_content, original_line_no, source_file)
-        
         while line_index < len(lines):
-            raw_line = lines[line_index]
             line_no_in_file = line_index + 1
-            
-            # Skip macro definitions (already processed in global collection phase)
-            if re.match(r'^\s*MACRO\s+', raw_line, re.IGNORECASE):
-                # Find corresponding ENDM and skip
-                while line_index < len(lines) and not re.match(r'^\s*ENDM\s*(?:;.*)?$', lines[line_index], re.IGNORECASE):
-                    line_index += 1
-                line_index += 1  # Skip ENDM line
-                continue
-            
-            # Check for macro invocation
-            parsed_comps = self._parse_line_components(raw_line, normalized_filepath, line_no_in_file)
-            if parsed_comps:
-                original_label_str, mnemonic_candidate, operand_candidate = parsed_comps
-                
-                # Check if mnemonic is a macro
-                if mnemonic_candidate and self._is_macro_invocation(mnemonic_candidate.upper()):
-                    # Parse macro arguments
-                    args: List[str] = []
-                    if operand_candidate:
-                        args = [arg.strip() for arg in CSV_SPLIT_REGEX.split(operand_candidate)]
-                        args = [arg for arg in args if arg]  # Remove empty args
-                    
-                    # Expand macro
-                    macro_lines = self._expand_macro(mnemonic_candidate.upper(), args, normalized_filepath, line_no_in_file)
-                    
-                    # Add label to first expanded line if present
-                    if original_label_str and macro_lines:
-                        macro_lines[0] = f"{original_label_str}: {macro_lines[0]}"
-                    elif original_label_str:
-                        # Label but no macro body - just add the label line
-                        expanded_lines.append((f"{original_label_str}:", line_no_in_file, normalized_filepath))
-                    
-                    # Add all expanded lines
-                    for macro_line in macro_lines:
-                        expanded_lines.append((macro_line, line_no_in_file, normalized_filepath))
-                    
-                    line_index += 1
-                    continue
-            
-            # Regular line - add as-is
-            expanded_lines.append((raw_line, line_no_in_file, normalized_filepath))
-            line_index += 1
 
-        # Process expanded lines
-        for expanded_line, original_line_no, source_file in expanded_lines:
-            parsed_comps = self._parse_line_components(expanded_line, source_file, original_line_no)
-            if not parsed_comps:
+            # Fast-forward through a false conditional block: only lines that can
+            # change conditional nesting (or open a macro body to step over) are scanned
+            if not self._assembling:
+                directive = self._peek_directive(source, line_index)
+                if directive == 'MACRO':
+                    line_index = self._find_macro_end(lines, line_index) + 1
+                    continue
+                if directive in CONDITIONAL_DIRECTIVES:
+                    _, mnemonic_candidate, operand_candidate = source.components(line_index, self._parse_line_components)
+                    self._handle_conditional_directive(mnemonic_candidate, operand_candidate, normalized_filepath, line_no_in_file)
+                line_index += 1
                 continue
-            
-            original_label_str, mnemonic_candidate, operand_candidate = parsed_comps
 
-            # Handle conditional assembly directives first
-            if mnemonic_candidate and self._handle_conditional_directive(
-                mnemonic_candidate, operand_candidate, normalized_filepath, line_no_in_file):
-                continue
+            # Components were scanned (and cached) by the macro collection phase
+            parsed_comps = source.components(line_index, self._parse_line_components)
 
-            # Skip processing if we're in a conditional block that shouldn't be assembled
-            if not self._should_assemble_line():
+            # Skip macro definitions (already processed in global collection phase)
+            if self._is_line_directive(parsed_comps, 'MACRO'):
+                line_index = self._find_macro_end(lines, line_index) + 1  # Skip ENDM line
                 continue
-
-            # Handle INCLUDE directive
-            if mnemonic_candidate and mnemonic_candidate.upper() == "INCLUDE":
-                effective_address, active_global_label = self._process_include_directive(
-                    operand_candidate, source_file, original_line_no, 
-                    effective_address, active_global_label)
+            
+            if not parsed_comps:
+                line_index += 1
                 continue
 
-            # Normalize components with current scope
-            _, final_mnemonic, final_operand = self._normalize_token_components(
-                original_label_str, mnemonic_candidate, operand_candidate, 
-                active_global_label, source_file, original_line_no
-            )
+            original_label_str, mnemonic_candidate, operand_candidate = parsed_comps
+            
+            # Check if mnemonic is a macro
+            if mnemonic_candidate and self._is_macro_invocation(mnemonic_candidate.upper()):
+                # Parse macro arguments
+                args: List[str] = []
+                if operand_candidate:
+                    args = [arg.text for arg in split_operands(operand_candidate) if arg.text]  # Remove empty args
+                
+                # Expand macro
+                macro_lines = self._expand_macro(mnemonic_candidate.upper(), args, normalized_filepath, line_no_in_file)
+                
+                # Add label to first expanded line if present
+                if original_label_str and macro_lines:
+                    macro_lines[0] = f"{original_label_str}: {macro_lines[0]}"
+                elif original_label_str:
+                    # Label but no macro body - just add the label line
+                    macro_lines = [f"{original_label_str}:"]
+                
+                # Process expanded lines immediately, so conditionals inside them take effect in order
+                for macro_line in macro_lines:
+                    macro_comps = self._parse_line_components(macro_line, normalized_filepath, line_no_in_file)
+                    if macro_comps:
+                        effective_address, active_global_label = self._process_line_components(
+                            macro_comps, normalized_filepath, line_no_in_file, effective_address, active_global_label)
+                
+                line_index += 1
+                continue
             
-            # Determine label name for symbol table and update global scope
-            label_name_for_symbol_table: Optional[str] = None
-            
-            if original_label_str:
-                if original_label_str.startswith('.'): # Local label
-                    if not active_global_label:
-                        raise ParserError(f"Local label '{original_label_str}' defined without a preceding global label.", source_file, original_line_no)
-                    label_name_for_symbol_table = f"{active_global_label}{original_label_str}"
-                else: # Global label
-                    label_name_for_symbol_table = original_label_str
-                    # Update active scope for subsequent lines (unless EQU)
-                    if not (final_mnemonic and final_mnemonic.upper() == 'EQU'):
-                        active_global_label = original_label_str
-            
-            # Handle label-only lines
-            if not final_mnemonic:
-                if label_name_for_symbol_table:
-                    self._add_symbol_to_table(label_name_for_symbol_table, effective_address, source_file, original_line_no)
-                continue 
-
-            # Create and add token
-            token = Token(original_line_no, source_file, original_label_str, final_mnemonic, final_operand)
-            self.tokens.append(token)
-            logger.debug(f"Token created: {token} (current effective_address: 0x{effective_address:04X}, next active_global_label for subsequent lines: {active_global_label})")
-
-            # Update symbol table and calculate new address
-            effective_address = self._update_symbol_table_and_address(
-                label_name_for_symbol_table, final_mnemonic, final_operand,
-                effective_address, source_file, original_line_no)
+            # Regular line, reusing its scanned components
+            effective_address, active_global_label = self._process_line_components(
+                parsed_comps, normalized_filepath, line_no_in_file, effective_address, active_global_label)
+            line_index += 1
 
         # Clean up and return
         self._files_in_recursion_stack.pop()
         logger.debug(f"Finished processing of file: {normalized_filepath}. Returning address: 0x{effective_address:04X}, final active_global_scope for caller: {active_global_label}")
         return effective_address, active_global_label
 
+    def _process_line_components(self, parsed_comps: Tuple[Optional[str], Optional[str], Optional[str]],
+                                 source_file: str, line_no: int, effective_address: int,
+                                 active_global_label: Optional[str]) -> Tuple[int, Optional[str]]:
+        """
+        Process one scanned line: conditional directives, INCLUDE, labels, and token creation.
+        
+        Args:
+            parsed_comps: (label, mnemonic, operand) from _parse_line_components
+            source_file: File the line came from
+            line_no: Line number for error reporting
+            effective_address: Current assembly address
+            active_global_label: Current global label scope
+            
+        Returns:
+            Tuple of (updated_address, updated_global_label_scope)
+            
+        Raises:
+            ParserError: If the line is invalid
+        """
+        original_label_str, mnemonic_candidate, operand_candidate = parsed_comps
+
+        # Handle conditional assembly directives first
+        if mnemonic_candidate and self._handle_conditional_directive(
+            mnemonic_candidate, operand_candidate, source_file, line_no):
+            return effective_address, active_global_label
+
+        # Skip processing if we're in a conditional block that shouldn't be assembled
+        if not self._assembling:
+            return effective_address, active_global_label
+
+        # Handle INCLUDE directive
+        if mnemonic_candidate and mnemonic_candidate.upper() == "INCLUDE":
+            return self._process_include_directive(
+                operand_candidate, source_file, line_no, 
+                effective_address, active_global_label)
+
+        # Normalize components with current scope (an INCBIN operand is a file
+        # reference, so it is resolved instead of scanned for local labels)
+        if mnemonic_candidate and mnemonic_candidate.upper() == "INCBIN":
+            final_mnemonic = "INCBIN"
+            final_operand = self._resolve_incbin_operand(operand_candidate, source_file, line_no)
+        else:
+            _, final_mnemonic, final_operand = self._normalize_token_components(
+                original_label_str, mnemonic_candidate, operand_candidate, 
+                active_global_label, source_file, line_no
+            )
+        
+        # Determine label name for symbol table and update global scope
+        label_name_for_symbol_table: Optional[str] = None
+        
+        if original_label_str:
+            if original_label_str.startswith('.'): # Local label
+                if not active_global_label:
+                    raise ParserError(f"Local label '{original_label_str}' defined without a preceding global label.", source_file, line_no)
+                label_name_for_symbol_table = f"{active_global_label}{original_label_str}"
+            else: # Global label
+                label_name_for_symbol_table = original_label_str
+                # Update active scope for subsequent lines (unless EQU)
+                if not (final_mnemonic and final_mnemonic.upper() == 'EQU'):
+                    active_global_label = original_label_str
+        
+        # Handle label-only lines
+        if not final_mnemonic:
+            if label_name_for_symbol_table:
+                self._add_symbol_to_table(label_name_for_symbol_table, effective_address, source_file, line_no)
+            return effective_address, active_global_label
+
+        # Create and add token
+        self.tokens.add(line_no, source_file, original_label_str, final_mnemonic, final_operand)
+        logger.debug(f"Token created: {final_mnemonic} {final_operand or ''} [{os.path.basename(source_file)} line {line_no}] (current effective_address: 0x{effective_address:04X}, next active_global_label for subsequent lines: {active_global_label})")
+
+        # Update symbol table and calculate new address
+        effective_address = self._update_symbol_table_and_address(
+            label_name_for_symbol_table, final_mnemonic, final_operand,
+            effective_address, source_file, line_no)
+        return effective_address, active_global_label
+
+    def _peek_directive(self, source: SourceFile, line_index: int) -> Optional[str]:
+        """
+        Cheaply identify the mnemonic/directive of a line without scanning it.
+        Only the leading word is examined; a full scan is needed only for labelled
+        lines, where the directive follows the label.
+        
+        Returns:
+            Upper-cased mnemonic/directive, or None if the line has none
+        """
+        raw_line = source.lines[line_index]
+        keyword = leading_keyword(raw_line)
+        if keyword is not None:
+            return keyword
+        stripped = raw_line.lstrip()
+        if ':' in stripped and not stripped.startswith(';'):
+            parsed_comps = source.components(line_index, self._parse_line_components)
+            if parsed_comps and parsed_comps[1]:
+                return parsed_comps[1].upper()
+        return None
+
+    @staticmethod
+    def _find_macro_end(lines: List[str], macro_line_index: int) -> int:
+        """Return the index of the ENDM line closing the macro opened at macro_line_index (len(lines) if none)."""
+        line_index = macro_line_index
+        while line_index < len(lines) and not is_bare_keyword(lines[line_index], 'ENDM'):
+            line_index += 1
+        return line_index
+
     def _parse_simple_expression(self, expression_str: str, source_file: str, line_no: int) -> int:
         """
         Parse simple logical/arithmetic expressions for EQU statements in the parser.
@@ -949,32 +1217,8 @@ class Parser:
         Raises:
             ParserError: If expression cannot be resolved with current symbols
         """
-        # Import assembler functionality temporarily for expression parsing
-        # This creates a minimal assembler-like environment just for expression resolution
-        try:
-            from .assembler import Assembler, AssemblerError
-        except ImportError:
-            # Fallback for direct execution
-            import sys
-            import os
-            sys.path.append(os.path.dirname(__file__))
-            from assembler import Assembler, AssemblerError
-        
+        # Symbols are looked up in place; the compiled expression is cached by the engine
         try:
-            # Create a temporary assembler instance for expression parsing
-            temp_assembler = Assembler.__new__(Assembler)
-            temp_assembler.symbols = self.symbol_table.copy()  # Use current parser symbols
-            
-            # Create a mock token for error context
-            mock_token = Token(line_no=line_no, source_file=source_file, label=None, mnemonic="EQU", operand=expression_str)
-            
-            # Use assembler's expression parsing
-            result = temp_assembler._resolve_expression_to_int(expression_str, mock_token)
-            return result
-            
-        except AssemblerError as e:
-            # Convert assembler error to parser error
-            raise ParserError(f"Cannot resolve expression '{expression_str}': {e.base_message}", source_file, line_no)
-        except Exception as e:
-            # Handle any other unexpected errors
-            raise ParserError(f"Unexpected error parsing expression '{expression_str}': {e}", source_file, line_no) 
\ No newline at end of file
+            return evaluate_expression(expression_str, self.symbol_table.get)
+        except ExpressionError as e:
+            raise ParserError(f"Cannot resolve expression '{expression_str}': {e}", source_file, line_no)
@@ -0,0 +1,152 @@
+# software/assembler/src/source_manager.py
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (label, mnemonic, operand) as produced by Parser._parse_line_components
+LineComponents = Optional[Tuple[Optional[str], Optional[str], Optional[str]]]
+
+# Sentinel marking a line whose components have not been scanned yet
+_NOT_SCANNED = object()
+
+
+class SourceFile:
+    """
+    A loaded source file: its raw lines plus a lazily filled array of scanned
+    line components, shared by every parser phase that visits the file.
+    """
+    def __init__(self, path: str, lines: List[str], signature: Optional[Tuple[int, int]]) -> None:
+        self.path = path
+        self.lines = lines
+        self.signature = signature  # (mtime_ns, size) of the file when loaded, None if not on disk
+        self.content_hash = hashlib.sha1("".join(lines).encode("utf-8", "surrogateescape")).hexdigest()
+        self._components: List[object] = [_NOT_SCANNED] * len(lines)
+        self._scanned_count = 0
+        # Macro definitions found in this file, keyed by the 0-based index of their
+        # MACRO line: {"name", "parameters", "body_lines", "line_no", "end_index"}
+        self.macro_entries: Dict[int, Dict[str, Any]] = {}
+        self._saved_state = (0, 0)  # (scanned lines, macros) already in the persistent cache
+
+    def components(self, line_index: int,
+                   scanner: Callable[[str, str, int], LineComponents]) -> LineComponents:
+        """
+        Return the scanned components of a line, running the scanner only the first
+        time the line is requested.
+
+        Args:
+            line_index: 0-based index of the line
+            scanner: Callable (raw_line, source_file, line_no) -> components
+
+        Returns:
+            Components tuple, or None for blank/comment/unrecognized lines
+        """
+        cached = self._components[line_index]
+        if cached is _NOT_SCANNED:
+            cached = scanner(self.lines[line_index], self.path, line_index + 1)
+            self._components[line_index] = cached
+            self._scanned_count += 1
+        return cached  # type: ignore[return-value]
+
+    def scanned_components(self) -> Dict[int, LineComponents]:
+        """Components of every line scanned so far, keyed by 0-based line index."""
+        return {index: comps for index, comps in enumerate(self._components) if comps is not _NOT_SCANNED}  # type: ignore[misc]
+
+    def seed(self, components: Dict[int, LineComponents], macro_entries: Dict[int, Dict[str, Any]]) -> None:
+        """Pre-fill scanned components and macro entries, e.g. from a persistent cache."""
+        for index, comps in components.items():
+            if self._components[index] is _NOT_SCANNED:
+                self._scanned_count += 1
+            self._components[index] = comps
+        self.macro_entries.update(macro_entries)
+        self.mark_saved()
+
+    def has_unsaved_scans(self) -> bool:
+        """True if lines or macros were scanned since the last seed()/mark_saved()."""
+        return self._saved_state != (self._scanned_count, len(self.macro_entries))
+
+    def mark_saved(self) -> None:
+        self._saved_state = (self._scanned_count, len(self.macro_entries))
+
+
+class SourceManager:
+    """
+    Loads each source file once per assembly and hands out the same SourceFile
+    to every caller. Entries are keyed by normalized path and revalidated against
+    the file's mtime/size, so a manager can also be kept across assemblies.
+
+    An optional persistent cache (see parse_cache.ParseCache) seeds newly loaded
+    files with scan results from earlier runs; flush() writes new results back.
+    """
+    def __init__(self, parse_cache: Optional[Any] = None) -> None:
+        self._files: Dict[str, SourceFile] = {}
+        self.load_count = 0  # Number of physical loads performed (cache misses)
+        self.parse_cache = parse_cache
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, normalized_path: str, loader: Callable[[], List[str]]) -> SourceFile:
+        """
+        Return the SourceFile for a path, calling loader() only on a cache miss or
+        when the file on disk changed since it was cached.
+
+        Args:
+            normalized_path: Normalized path of the file
+            loader: Zero-argument callable returning the file's lines
+
+        Returns:
+            The cached or freshly loaded SourceFile
+        """
+        signature = self._file_signature(normalized_path)
+        cached = self._files.get(normalized_path)
+        if cached is not None and cached.signature == signature:
+            logger.debug(f"Source cache hit: {normalized_path}")
+            return cached
+
+        lines = loader()
+        self.load_count += 1
+        source_file = SourceFile(normalized_path, lines, signature)
+        if self.parse_cache is not None:
+            self.parse_cache.load(source_file)
+        self._files[normalized_path] = source_file
+        return source_file
+
+    def add_text(self, normalized_path: str, text: str) -> SourceFile:
+        """
+        Register in-memory source text under a path, replacing any file held for it.
+        The path need not exist on disk; as long as it does not, get() returns this
+        text for it (relative INCLUDE/INCBIN paths start from its directory).
+        """
+        source_file = SourceFile(normalized_path, text.splitlines(keepends=True), self._file_signature(normalized_path))
+        self._files[normalized_path] = source_file
+        return source_file
+
+    def flush(self) -> None:
+        """Save newly scanned state of every held file to the persistent cache, if any."""
+        if self.parse_cache is None:
+            return
+        for source_file in self._files.values():
+            self.parse_cache.store(source_file)
+
+    def invalidate(self, normalized_path: Optional[str] = None) -> None:
+        """Drop one cached file, or every cached file if no path is given."""
+        if normalized_path is None:
+            self._files.clear()
+        else:
+            self._files.pop(normalized_path, None)
+
+    def paths(self) -> List[str]:
+        """Normalized paths of all files currently held, in load order."""
+        return list(self._files)
+
+    def signatures(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """(mtime_ns, size) of every held file as it was when loaded, keyed by normalized path."""
+        return {path: source_file.signature for path, source_file in self._files.items()}
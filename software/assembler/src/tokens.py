@@ -0,0 +1,169 @@
+# software/assembler/src/tokens.py
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar, Union, overload
+
+try:
+    from .constants import INSTRUCTION_SET, InstrInfo
+except ImportError:
+    from constants import INSTRUCTION_SET, InstrInfo
+
+
+@dataclass(frozen=True)
+class Token:
+    """Represents a tokenized piece of an assembly line, with source context."""
+    line_no: int         # Line number within its original source_file
+    source_file: str     # The original file path this token came from
+    label:   Optional[str] # Original label, e.g., "MY_LABEL" or ".loop"
+    mnemonic: Optional[str]
+    operand:  Optional[str] # Operand string, local labels may be mangled here by parser
+
+
+# Which encoder the assembler's second pass runs for a token, resolved once per distinct mnemonic
+TOKEN_KIND_SKIP = 0          # No mnemonic, or EQU (handled entirely by the parser)
+TOKEN_KIND_ORG = 1           # ORG directive
+TOKEN_KIND_UNKNOWN = 2       # Not in INSTRUCTION_SET; reported as an error in the second pass
+TOKEN_KIND_INCBIN = 3        # INCBIN directive (operand already resolved by the parser)
+TOKEN_KIND_IMPLIED = 4       # Opcode only
+TOKEN_KIND_IMM8 = 5          # Opcode + 8-bit operand
+TOKEN_KIND_ABS16 = 6         # Opcode + 16-bit little-endian operand
+TOKEN_KIND_DB = 7            # DB directive
+TOKEN_KIND_DW = 8            # DW directive
+
+# Operand bytes after the opcode -> encoder kind
+_INSTRUCTION_KINDS_BY_OPERAND_SIZE = {0: TOKEN_KIND_IMPLIED, 1: TOKEN_KIND_IMM8, 2: TOKEN_KIND_ABS16}
+
+
+def _build_encoder_table() -> Dict[str, Tuple[int, Optional[InstrInfo]]]:
+    table: Dict[str, Tuple[int, Optional[InstrInfo]]] = {
+        'EQU': (TOKEN_KIND_SKIP, None),
+        'ORG': (TOKEN_KIND_ORG, None),
+        'INCBIN': (TOKEN_KIND_INCBIN, None),
+        'DB': (TOKEN_KIND_DB, INSTRUCTION_SET['DB']),
+        'DW': (TOKEN_KIND_DW, INSTRUCTION_SET['DW']),
+    }
+    for mnemonic, instr_info in INSTRUCTION_SET.items():
+        if mnemonic in table:
+            continue
+        operand_size = instr_info.size - (1 if instr_info.opcode is not None else 0)
+        kind = _INSTRUCTION_KINDS_BY_OPERAND_SIZE.get(operand_size)
+        if instr_info.opcode is None or kind is None:
+            raise ValueError(f"INSTRUCTION_SET entry '{mnemonic}' has no encoder (opcode {instr_info.opcode}, size {instr_info.size}).")
+        table[mnemonic] = (kind, instr_info)
+    return table
+
+
+# Mnemonic -> (encoder kind, INSTRUCTION_SET entry), built once from constants.INSTRUCTION_SET
+ENCODER_TABLE: Dict[str, Tuple[int, Optional[InstrInfo]]] = _build_encoder_table()
+
+
+def _classify_mnemonic(mnemonic: Optional[str]) -> Tuple[int, Optional[InstrInfo]]:
+    if not mnemonic:
+        return TOKEN_KIND_SKIP, None
+    return ENCODER_TABLE.get(mnemonic.upper(), (TOKEN_KIND_UNKNOWN, None))
+
+
+Handler = TypeVar('Handler')
+
+
+class TokenStore:
+    """
+    Compact, append-only token table (struct of arrays).
+
+    Source files and mnemonics are interned and referenced by integer IDs held in
+    typed arrays, and each distinct mnemonic is resolved to its second-pass kind
+    and INSTRUCTION_SET entry once, when first added. Indexing and iteration
+    still produce Token objects, so the store can be used like a list of Tokens.
+    """
+    def __init__(self) -> None:
+        self.files: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self.mnemonics: List[Optional[str]] = []
+        self._mnemonic_ids: Dict[Optional[str], int] = {}
+        self.mnemonic_kinds: List[int] = []                       # Per mnemonic ID
+        self.mnemonic_instr_infos: List[Optional[InstrInfo]] = []  # Per mnemonic ID
+
+        self._line_nos = array('I')
+        self._file_ids_by_token = array('I')
+        self._mnemonic_ids_by_token = array('I')
+        self._labels: List[Optional[str]] = []
+        self._operands: List[Optional[str]] = []
+
+    def _intern_file(self, source_file: str) -> int:
+        file_id = self._file_ids.get(source_file)
+        if file_id is None:
+            file_id = len(self.files)
+            self._file_ids[source_file] = file_id
+            self.files.append(source_file)
+        return file_id
+
+    def _intern_mnemonic(self, mnemonic: Optional[str]) -> int:
+        mnemonic_id = self._mnemonic_ids.get(mnemonic)
+        if mnemonic_id is None:
+            mnemonic_id = len(self.mnemonics)
+            self._mnemonic_ids[mnemonic] = mnemonic_id
+            self.mnemonics.append(mnemonic)
+            kind, instr_info = _classify_mnemonic(mnemonic)
+            self.mnemonic_kinds.append(kind)
+            self.mnemonic_instr_infos.append(instr_info)
+        return mnemonic_id
+
+    def add(self, line_no: int, source_file: str, label: Optional[str],
+            mnemonic: Optional[str], operand: Optional[str]) -> None:
+        """Append one token given its fields."""
+        self._line_nos.append(line_no)
+        self._file_ids_by_token.append(self._intern_file(source_file))
+        self._mnemonic_ids_by_token.append(self._intern_mnemonic(mnemonic))
+        self._labels.append(label)
+        self._operands.append(operand)
+
+    def append(self, token: Token) -> None:
+        """Append a Token (list-compatible)."""
+        self.add(token.line_no, token.source_file, token.label, token.mnemonic, token.operand)
+
+    def _token_at(self, index: int) -> Token:
+        return Token(self._line_nos[index], self.files[self._file_ids_by_token[index]], self._labels[index],
+                     self.mnemonics[self._mnemonic_ids_by_token[index]], self._operands[index])
+
+    def dispatched(self, handlers: Mapping[int, Handler]) -> Iterator[Tuple[Token, Handler, Optional[InstrInfo]]]:
+        """
+        Iterate (token, handler, instr_info) for the assembler's second pass, where
+        handler is handlers[kind]. Handlers are bound once per distinct mnemonic, so
+        the loop does no per-token lookups; TOKEN_KIND_SKIP tokens are not yielded.
+        """
+        handler_by_mnemonic = [handlers.get(kind) for kind in self.mnemonic_kinds]
+        instr_infos = self.mnemonic_instr_infos
+        mnemonic_ids = self._mnemonic_ids_by_token
+        for index in range(len(self._line_nos)):
+            mnemonic_id = mnemonic_ids[index]
+            handler = handler_by_mnemonic[mnemonic_id]
+            if handler is not None:
+                yield self._token_at(index), handler, instr_infos[mnemonic_id]
+
+    def __len__(self) -> int:
+        return len(self._line_nos)
+
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[Token]: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[Token, List[Token]]:
+        if isinstance(index, slice):
+            return [self._token_at(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        return self._token_at(index)
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self._line_nos)):
+            yield self._token_at(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (TokenStore, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TokenStore({len(self)} tokens, {len(self.files)} files, {len(self.mnemonics)} mnemonics)"
@@ -2,6 +2,8 @@
 import pytest
 import os
 from pathlib import Path # <--- ADD THIS IMPORT
+from src.parser import Token
+from src.tokens import ENCODER_TABLE
 
 # Example of a fixture if needed later:
 # @pytest.fixture
@@ -13,4 +15,18 @@ from pathlib import Path # <--- ADD THIS IMPORT
 def test_files_dir():
     # Use Path for modern path manipulation
     base_dir = Path(os.path.dirname(__file__)) # Path object for the directory of conftest.py
-    return base_dir / "test_files"           # Use / operator to join, returns a Path object
\ No newline at end of file
+    return base_dir / "test_files"           # Use / operator to join, returns a Path object
+
+
+# Encode one instruction or directive the way the assembler's second pass does:
+# through ENCODER_TABLE and the assembler's per-kind encoders. Returns the bytes
+# emitted after the opcode.
+@pytest.fixture
+def encode_token():
+    def encode(assembler, mnemonic, operand):
+        kind, instr_info = ENCODER_TABLE[mnemonic.upper()]
+        emitted = []
+        assembler._emit_bytes = lambda byte_values, address, token, has_opcode=False: emitted.extend(byte_values)
+        assembler._encoders()[kind](Token(1, "test.asm", None, mnemonic, operand), 0, instr_info)
+        return emitted[1:] if instr_info.opcode is not None else emitted
+    return encode
@@ -1,8 +1,7 @@
 # software/assembler/tests/test_assembler_core.py
 import pytest
-from src.assembler import Assembler, AssemblerError
+from src.assembler import Assembler, AssemblerError, MemoryRegion, main, read_dependency_file
 from src.parser import Token # For creating mock tokens
-from src.constants import INSTRUCTION_SET, InstrInfo
 
 class TestAssemblerCore:
     def setup_method(self):
@@ -77,10 +76,7 @@ class TestAssemblerCore:
         ("DW", "$FEDC", None, [0xDC, 0xFE], False),
         ("DW", "SIXTEEN_BIT_CONST", 0xBEEF, [0xEF, 0xBE], True), # Needs SIXTEEN_BIT_CONST
     ])
-    def test_encode_operand_valid(self, mnemonic, operand_str, symbol_val, expected_bytes, is_16bit_val_not_used_now): # Renamed last param
-        instr_info = INSTRUCTION_SET[mnemonic.upper()]
-        token = Token(1, "test.asm", None, mnemonic, operand_str)
-        
+    def test_encode_operand_valid(self, encode_token, mnemonic, operand_str, symbol_val, expected_bytes, is_16bit_val_not_used_now): # Renamed last param
         self.assembler.symbols = {} # Reset for each case
         if symbol_val is not None:
             # Explicitly set up symbols based on the test case's needs
@@ -99,26 +95,24 @@ class TestAssemblerCore:
                 self.assembler.symbols["SIXTEEN_BIT_CONST"] = symbol_val
             # Add more specific setups if other parameterized tests require different symbols from operand_str
 
-        encoded = self.assembler._encode_operand(operand_str, instr_info, token)
+        encoded = encode_token(self.assembler, mnemonic, operand_str)
         assert encoded == expected_bytes
 
-    def test_encode_operand_db_directive(self):
+    def test_encode_operand_db_directive(self, encode_token):
         self.assembler.symbols = {"COUNT": 5, "CHAR_A": 0x41}
         # DB $01, "HI", COUNT, CHAR_A + 1
         #    01,  48, 49, 05,   42
-        instr_info_db = INSTRUCTION_SET["DB"]
         operand_str = "$01, \"HI\", COUNT, CHAR_A + 1"
-        token = Token(1, "test.asm", None, "DB", operand_str)
         expected_bytes = [0x01, ord('H'), ord('I'), 5, 0x41 + 1]
-        encoded = self.assembler._encode_operand(operand_str, instr_info_db, token)
+        encoded = encode_token(self.assembler, "DB", operand_str)
         assert encoded == expected_bytes
 
         # Empty string
-        encoded_empty = self.assembler._encode_operand("\"\"", instr_info_db, token)
+        encoded_empty = encode_token(self.assembler, "DB", "\"\"")
         assert encoded_empty == []
         
         # Just a string
-        encoded_str_only = self.assembler._encode_operand("\"Test\"", instr_info_db, token)
+        encoded_str_only = encode_token(self.assembler, "DB", "\"Test\"")
         assert encoded_str_only == [ord('T'), ord('e'), ord('s'), ord('t')]
 
     @pytest.mark.parametrize("mnemonic, operand_str, symbol_val, error_msg_part, is_16bit_val", [
@@ -131,14 +125,129 @@ class TestAssemblerCore:
         ("DB", "$FF, $100", None, "out of 8-bit range", False),     # DB item too large
         ("DB", "NO_SYM", None, "Not a known symbol", False),        # DB undefined symbol
     ])
-    def test_encode_operand_errors(self, mnemonic, operand_str, symbol_val, error_msg_part, is_16bit_val):
-        instr_info = INSTRUCTION_SET[mnemonic.upper()]
-        token = Token(1, "test.asm", None, mnemonic, operand_str)
+    def test_encode_operand_errors(self, encode_token, mnemonic, operand_str, symbol_val, error_msg_part, is_16bit_val):
         self.assembler.symbols = {} # Reset symbols
         if symbol_val is not None: # For tests that might need a symbol defined
              self.assembler.symbols["SOME_SYM_FOR_ERROR_TEST"] = symbol_val
 
 
         with pytest.raises(AssemblerError) as excinfo:
-            self.assembler._encode_operand(operand_str, instr_info, token)
-        assert error_msg_part.lower() in str(excinfo.value).lower()
\ No newline at end of file
+            encode_token(self.assembler, mnemonic, operand_str)
+        assert error_msg_part.lower() in str(excinfo.value).lower()
+
+class TestRegionIndex:
+    def _assembler(self, tmp_path, region_configs):
+        return Assembler(str(tmp_path / "prog.asm"), str(tmp_path / "out"), region_configs)
+
+    def test_lookup_matches_first_configured_region(self, tmp_path):
+        assembler = self._assembler(tmp_path, [("LOW", "0000", "00FF"), ("WIDE", "0080", "01FF"), ("ROM", "F000", "FFFF")])
+        names = {address: assembler._segment_for_address(address).region
+                 for address in (0x0000, 0x007F, 0x0080, 0x00FF, 0x0100, 0x01FF, 0x0200, 0xEFFF, 0xF000, 0xFFFF)}
+        names = {address: region.name if region else None for address, region in names.items()}
+        assert names == {0x0000: "LOW", 0x007F: "LOW", 0x0080: "LOW", 0x00FF: "LOW", 0x0100: "WIDE",
+                         0x01FF: "WIDE", 0x0200: None, 0xEFFF: None, 0xF000: "ROM", 0xFFFF: "ROM"}
+        assert assembler._segment_for_address(0x10000) is None
+
+    def test_run_spanning_regions_is_split(self, tmp_path):
+        assembler = self._assembler(tmp_path, [("A", "0000", "0001"), ("B", "0002", "0003")])
+        token = Token(line_no=1, source_file="test.asm", label=None, mnemonic="DB", operand=None)
+        assembler._emit_bytes([0x11, 0x22, 0x33, 0x44, 0x55], 0x0001, token)
+
+        region_a, region_b = assembler.regions
+        assert region_a.render_hex_lines() == ["@0001", "11"]
+        assert region_b.render_hex_lines() == ["@0000", "22", "33"]
+
+
+class TestMemoryImage:
+    def test_hex_is_rendered_from_sorted_occupied_runs(self):
+        region = MemoryRegion(name="RAM", start_addr=0x1000, end_addr=0x10FF, output_filename="RAM.hex")
+        assert not region.has_content
+        region.store(0x10, [0xAA, 0xBB])
+        region.store(0x00, [0x01])
+        region.store(0x01, [0x02, 0x03])
+        region.store(0x11, [0xCC])  # store() itself replaces bytes; the assembler checks for overlaps
+
+        assert region.byte_count == 5
+        assert region.occupied_runs() == [(0x00, 0x03), (0x10, 0x12)]
+        assert region.render_hex_lines() == ["@0000", "01", "02", "03", "@0010", "AA", "CC"]
+
+    def test_free_ranges_and_fragmentation(self):
+        region = MemoryRegion(name="ROM", start_addr=0xF000, end_addr=0xF00F, output_filename="ROM.hex")
+        assert region.usage().free_ranges == [(0xF000, 0xF00F)]
+        assert region.usage().fragmentation == 0.0
+
+        region.store(0x00, [0x01] * 4)
+        region.store(0x08, [0x02] * 2)
+        usage = region.usage()
+        assert region.free_ranges() == [(0x04, 0x08), (0x0A, 0x10)]
+        assert usage.free_ranges == [(0xF004, 0xF007), (0xF00A, 0xF00F)]
+        assert (usage.used, usage.free, usage.free_blocks, usage.largest_free) == (6, 10, 2, 6)
+        assert usage.fragmentation == pytest.approx(0.4)
+
+        region.store(0x04, [0x03] * 12)
+        assert region.usage().free == 0 and region.usage().fragmentation == 0.0
+
+
+    def test_writer_is_recorded_per_address(self):
+        region = MemoryRegion(name="ROM", start_addr=0xF000, end_addr=0xF00F, output_filename="ROM.hex")
+        region.store(0x00, [0x01] * 3, ("a.asm", 1))
+        region.store(0x02, [0x02] * 2, ("b.asm", 7))
+        region.store(0x08, [0x03])
+        region.store(0x0A, [0x04], ("a.asm", 1))
+
+        assert [region.writer_of(address) for address in (0x00, 0x02, 0x03, 0x08, 0x0A)] == [
+            ("a.asm", 1), ("b.asm", 7), ("b.asm", 7), None, ("a.asm", 1)]
+        assert region.writer_sources == [("a.asm", 1), ("b.asm", 7)]
+
+
+class TestOverlapDetection:
+    def test_overlapping_org_blocks_report_both_lines(self, tmp_path):
+        source = tmp_path / "prog.asm"
+        source.write_text("    ORG $F000\n    LDI A, #1\n    NOP\n    ORG $F002\n    HLT\n")
+        assembler = Assembler(str(source), str(tmp_path / "out"), [("ROM", "F000", "FFFF")])
+        with pytest.raises(AssemblerError) as excinfo:
+            assembler.assemble()
+        message = str(excinfo.value)
+        assert "Address 0xF002 in region 'ROM' is already occupied by code from prog.asm line 3" in message
+        assert excinfo.value.line_no == 5
+
+    def test_adjacent_org_blocks_are_accepted(self, tmp_path):
+        source = tmp_path / "prog.asm"
+        source.write_text("    ORG $F002\n    HLT\n    ORG $F000\n    NOP\n    NOP\n")
+        assembler = Assembler(str(source), str(tmp_path / "out"), [("ROM", "F000", "FFFF")])
+        assembler.assemble()
+        assert assembler.memory_usage()[0].used == 3
+
+
+class TestDependencyFile:
+    def test_md_lists_sources_includes_and_incbin(self, tmp_path):
+        (tmp_path / "inc dir").mkdir()
+        (tmp_path / "inc dir" / "defs.inc").write_text("VALUE EQU $12\n")
+        (tmp_path / "font.bin").write_bytes(b"\x01\x02")
+        source = tmp_path / "prog.asm"
+        source.write_text('    INCLUDE "inc dir/defs.inc"\n    ORG $F000\n    DB VALUE\n    INCBIN "font.bin"\n')
+        out_dir = tmp_path / "out"
+
+        written = main(str(source), str(out_dir), [("ROM", "F000", "FFFF"), ("RAM", "0000", "1FFF")], dependency_file="")
+
+        assert written == [str(out_dir / "ROM.hex")]
+        include = str(tmp_path / "inc dir" / "defs.inc").replace(" ", "\\ ")
+        assert (out_dir / "prog.d").read_text() == (
+            f"{out_dir / 'ROM.hex'}: {source} \\\n  {include} \\\n  {tmp_path / 'font.bin'}\n"
+            f"\n{source}:\n\n{include}:\n\n{tmp_path / 'font.bin'}:\n")
+
+    def test_dependency_file_reads_back(self, tmp_path):
+        (tmp_path / "inc #1").mkdir()
+        (tmp_path / "inc #1" / "defs.inc").write_text("VALUE EQU $12\n")
+        source = tmp_path / "prog.asm"
+        source.write_text('    INCLUDE "inc #1/defs.inc"\n    ORG $F000\n    DB VALUE\n')
+        written = main(str(source), str(tmp_path / "out $x"), [("ROM", "F000", "FFFF")], output_formats=["readmemh", "bin"],
+                       dependency_file=str(tmp_path / "prog.d"))
+
+        assert read_dependency_file(str(tmp_path / "prog.d")) == (written, [str(source), str(tmp_path / "inc #1" / "defs.inc")])
+
+    def test_no_dependency_file_by_default(self, tmp_path):
+        source = tmp_path / "prog.asm"
+        source.write_text("    ORG $F000\n    NOP\n")
+        main(str(source), str(tmp_path / "out"), [("ROM", "F000", "FFFF")])
+        assert sorted(path.name for path in (tmp_path / "out").iterdir()) == ["ROM.hex"]
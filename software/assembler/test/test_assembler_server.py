@@ -0,0 +1,66 @@
+# software/assembler/test/test_assembler_server.py
+import threading
+
+import pytest
+from src.assembler_server import AssemblerServer, assemble_via_server, send_request, server_running
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "asm.sock")
+    server = AssemblerServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_job_writes_outputs_and_returns_diagnostics(server, tmp_path):
+    (tmp_path / "prog.asm").write_text("    ORG $F000\nSTART: LDI A, #1\n    JMP START\n    ORG $0010\n    NOP\n")
+
+    response = assemble_via_server(["prog.asm", "out", "--region", "ROM", "F000", "FFFF"],
+                                   cwd=str(tmp_path), socket_path=server.socket_path)
+
+    assert response["ok"], response["error"]
+    assert response["outputs"] == [str(tmp_path / "out" / "ROM.hex")]
+    assert (tmp_path / "out" / "ROM.hex").read_text() == "@0000\nB0\n01\n10\n00\nF0\n"
+    assert [(d["level"], d["line_no"]) for d in response["diagnostics"]] == [("WARNING", 5)]
+
+
+def test_source_files_stay_cached_between_jobs(server, tmp_path):
+    (tmp_path / "defs.inc").write_text("VALUE EQU $42\n")
+    (tmp_path / "prog.asm").write_text('    INCLUDE "defs.inc"\n    ORG $F000\n    DB VALUE\n')
+    argv = ["prog.asm", "out", "--region", "ROM", "F000", "FFFF"]
+
+    for _ in range(3):
+        assert assemble_via_server(argv, cwd=str(tmp_path), socket_path=server.socket_path)["ok"]
+    assert server.source_manager_for(None).load_count == 2
+    assert send_request({"command": "ping"}, server.socket_path)["jobs"] == 3
+
+
+def test_failures_are_reported_not_raised(server, tmp_path):
+    (tmp_path / "bad.asm").write_text("    ORG $F000\n    JMP NOWHERE\n")
+
+    response = assemble_via_server(["bad.asm", "out", "--region", "ROM", "F000", "FFFF"],
+                                   cwd=str(tmp_path), socket_path=server.socket_path)
+    assert not response["ok"] and "NOWHERE" in response["error"]
+
+    response = assemble_via_server(["bad.asm", "--region", "ROM"], cwd=str(tmp_path), socket_path=server.socket_path)
+    assert not response["ok"] and response["error"].startswith("Invalid assembler arguments")
+    assert server_running(server.socket_path)
+
+
+def test_no_server_raises_os_error(tmp_path):
+    with pytest.raises(OSError):
+        assemble_via_server(["prog.asm"], socket_path=str(tmp_path / "missing.sock"))
+    assert not server_running(str(tmp_path / "missing.sock"))
+
+
+def test_dependency_file_path_is_relative_to_job_cwd(server, tmp_path):
+    (tmp_path / "prog.asm").write_text("    ORG $F000\n    NOP\n")
+    response = assemble_via_server(["prog.asm", "out", "--region", "ROM", "F000", "FFFF", "-MF", "deps/prog.d"],
+                                   cwd=str(tmp_path), socket_path=server.socket_path)
+    assert response["ok"], response["error"]
+    assert (tmp_path / "deps" / "prog.d").read_text().startswith(f"{tmp_path / 'out' / 'ROM.hex'}: {tmp_path / 'prog.asm'}\n")
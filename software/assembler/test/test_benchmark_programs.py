@@ -0,0 +1,18 @@
+# software/assembler/test/test_benchmark_programs.py
+import pytest
+from benchmarks.programs import PROGRAMS, REGIONS, ROM_SIZE
+from src.assembler import Assembler
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_stress_program_fills_rom(name, tmp_path):
+    program = PROGRAMS[name]()
+    main_file = program.write(str(tmp_path / "src"))
+
+    assembler = Assembler(main_file, str(tmp_path / "out"), REGIONS)
+    assembler.assemble()
+    assembler.write_output_files()
+
+    rom = assembler.regions[0]
+    assert ROM_SIZE * 0.95 <= rom.byte_count <= ROM_SIZE
+    assert (tmp_path / "out" / "ROM.hex").exists()
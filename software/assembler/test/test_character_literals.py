@@ -2,7 +2,6 @@
 import pytest
 from src.assembler import Assembler, AssemblerError
 from src.parser import Token
-from src.constants import INSTRUCTION_SET
 
 
 class TestCharacterLiterals:
@@ -78,12 +77,9 @@ class TestCharacterLiterals:
         ("LDI_A", "#'A' + 1", [0x42]),  # 'A' + 1 = 66
         ("LDI_B", "#'Z' - 'A'", [0x19]),  # 'Z' - 'A' = 25
     ])
-    def test_encode_operand_character_literals_valid(self, mnemonic, operand_str, expected_bytes):
+    def test_encode_operand_character_literals_valid(self, encode_token, mnemonic, operand_str, expected_bytes):
         """Test encoding operands with character literals for applicable instructions"""
-        instr_info = INSTRUCTION_SET[mnemonic.upper()]
-        token = Token(1, "test.asm", None, mnemonic, operand_str)
-        
-        encoded = self.assembler._encode_operand(operand_str, instr_info, token)
+        encoded = encode_token(self.assembler, mnemonic, operand_str)
         assert encoded == expected_bytes
 
     @pytest.mark.parametrize("mnemonic, operand_str, error_msg_part", [
@@ -97,38 +93,30 @@ class TestCharacterLiterals:
         # These would need special high-value characters or expressions that result in > 255
         ("LDI_A", "#'A' + 200", "out of 8-bit range"),  # 65 + 200 = 265 > 255
     ])
-    def test_encode_operand_character_literals_errors(self, mnemonic, operand_str, error_msg_part):
+    def test_encode_operand_character_literals_errors(self, encode_token, mnemonic, operand_str, error_msg_part):
         """Test error cases when encoding operands with character literals"""
-        instr_info = INSTRUCTION_SET[mnemonic.upper()]
-        token = Token(1, "test.asm", None, mnemonic, operand_str)
-        
         with pytest.raises(AssemblerError) as excinfo:
-            self.assembler._encode_operand(operand_str, instr_info, token)
+            encode_token(self.assembler, mnemonic, operand_str)
         assert error_msg_part.lower() in str(excinfo.value).lower()
 
-    def test_character_literals_with_db_directive(self):
+    def test_character_literals_with_db_directive(self, encode_token):
         """Test character literals work with DB directive"""
-        instr_info_db = INSTRUCTION_SET["DB"]
-        
         # Single character literal
         operand_str = "'A'"
-        token = Token(1, "test.asm", None, "DB", operand_str)
         expected_bytes = [0x41]
-        encoded = self.assembler._encode_operand(operand_str, instr_info_db, token)
+        encoded = encode_token(self.assembler, "DB", operand_str)
         assert encoded == expected_bytes
         
         # Mixed character literals and numeric values
         operand_str = "'H', 'e', 'l', 'l', 'o', 0"
-        token = Token(1, "test.asm", None, "DB", operand_str)
         expected_bytes = [0x48, 0x65, 0x6C, 0x6C, 0x6F, 0x00]  # "Hello" + null terminator
-        encoded = self.assembler._encode_operand(operand_str, instr_info_db, token)
+        encoded = encode_token(self.assembler, "DB", operand_str)
         assert encoded == expected_bytes
         
         # Character literals with escape sequences
         operand_str = "'\\n', '\\t', '\\r', '\\0'"
-        token = Token(1, "test.asm", None, "DB", operand_str)
         expected_bytes = [0x0A, 0x09, 0x0D, 0x00]
-        encoded = self.assembler._encode_operand(operand_str, instr_info_db, token)
+        encoded = encode_token(self.assembler, "DB", operand_str)
         assert encoded == expected_bytes
 
     def test_character_literals_not_confused_with_string_literals(self):
@@ -144,18 +132,15 @@ class TestCharacterLiterals:
         "LDI_A", "LDI_B", "LDI_C",  # Load immediate instructions
         "ANI", "ORI", "XRI",        # Immediate logical instructions
     ])
-    def test_all_applicable_instructions_with_character_literals(self, instruction):
+    def test_all_applicable_instructions_with_character_literals(self, encode_token, instruction):
         """Test that character literals work with all applicable instructions"""
-        instr_info = INSTRUCTION_SET[instruction]
         operand_str = "#'A'"
-        token = Token(1, "test.asm", None, instruction, operand_str)
         
-        encoded = self.assembler._encode_operand(operand_str, instr_info, token)
+        encoded = encode_token(self.assembler, instruction, operand_str)
         assert encoded == [0x41]  # ASCII 'A'
         
         # Test with escape sequence
         operand_str = "#'\\n'"
-        token = Token(1, "test.asm", None, instruction, operand_str)
         
-        encoded = self.assembler._encode_operand(operand_str, instr_info, token)
+        encoded = encode_token(self.assembler, instruction, operand_str)
         assert encoded == [0x0A]  # newline
\ No newline at end of file
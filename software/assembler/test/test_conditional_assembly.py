@@ -218,6 +218,118 @@ class TestConditionalAssemblyParser:
         assert ldi_b_token.operand == "#DEBUG_VAL"
 
 
+class TestConditionalSkipMode:
+    """Test that false conditional blocks are fast-forwarded without full processing."""
+
+    @staticmethod
+    def _parse(monkeypatch, asm_content, dummy_filepath):
+        def mock_load(instance_self, filepath_to_load, requesting_file, requesting_line_no):
+            if filepath_to_load == dummy_filepath:
+                return asm_content.splitlines()
+            raise FileNotFoundError(f"[Mock] File not found: {filepath_to_load}")
+
+        scanned_lines = []
+        original_scan = Parser._parse_line_components
+
+        def counting_scan(instance_self, raw_line_text, source_file, line_no):
+            scanned_lines.append(raw_line_text.strip())
+            return original_scan(instance_self, raw_line_text, source_file, line_no)
+
+        monkeypatch.setattr(Parser, "_load_lines_from_physical_file", mock_load)
+        monkeypatch.setattr(Parser, "_parse_line_components", counting_scan)
+        return Parser(main_input_filepath=dummy_filepath), scanned_lines
+
+    def test_false_block_lines_are_not_scanned(self, monkeypatch):
+        """Only conditional directives inside a false block are scanned."""
+        asm_content = """
+        START: NOP
+        IFDEF UNDEFINED_FLAG
+            LDI A, #$10
+            SKIPPED: ADD B
+            .local: DB "never, scanned"
+        ELSE
+            LDI B, #$20
+        ENDIF
+        HLT
+        """
+        parser, scanned_lines = self._parse(monkeypatch, asm_content, "/dummy/test_skip_scan.asm")
+
+        assert [t.mnemonic for t in parser.tokens] == ["NOP", "LDI_B", "HLT"]
+        assert "LDI A, #$10" not in scanned_lines
+        assert "SKIPPED: ADD B" in scanned_lines  # Labelled lines are scanned to find their directive
+        assert "SKIPPED" not in parser.symbol_table
+
+    def test_macro_in_false_block_is_not_expanded(self, monkeypatch):
+        """Macro invocations inside a false block are skipped without expansion."""
+        asm_content = """
+        MACRO LOAD_A value
+            LDI A, #value
+        ENDM
+        IFNDEF START
+            LOAD_A $01
+        ENDIF
+        START: LOAD_A $02
+        HLT
+        """
+        dummy_filepath = "/dummy/test_skip_macro.asm"
+        expanded = []
+        original_expand = Parser._expand_macro
+
+        def recording_expand(instance_self, macro_name, args, source_file, line_no):
+            expanded.append(args)
+            return original_expand(instance_self, macro_name, args, source_file, line_no)
+
+        monkeypatch.setattr(Parser, "_expand_macro", recording_expand)
+        parser, _ = self._parse(monkeypatch, asm_content, dummy_filepath)
+
+        # IFNDEF START is true at that point (START is defined later), so both expand
+        assert expanded == [["$01"], ["$02"]]
+
+        asm_content = asm_content.replace("IFNDEF START", "IFDEF START")
+        expanded.clear()
+        parser, _ = self._parse(monkeypatch, asm_content, dummy_filepath)
+        assert expanded == [["$02"]]
+        assert [t.operand for t in parser.tokens] == ["#$02", None]
+
+    def test_nested_blocks_inside_false_block(self, monkeypatch):
+        """Nested conditionals in a false block are tracked so the right ENDIF closes it."""
+        asm_content = """
+        DEFINED_FLAG EQU 1
+        IFDEF UNDEFINED_FLAG
+            IFDEF DEFINED_FLAG
+                LDI A, #$01
+            ELSE
+                LDI A, #$02
+            ENDIF
+            MACRO INSIDE
+                IFDEF DEFINED_FLAG
+            ENDM
+        ELSE
+            LDI A, #$03
+        ENDIF
+        HLT
+        """
+        parser, _ = self._parse(monkeypatch, asm_content, "/dummy/test_skip_nested.asm")
+
+        operands = [t.operand for t in parser.tokens if t.mnemonic == "LDI_A"]
+        assert operands == ["#$03"]
+        assert parser._conditional_stack == []
+        # Lines after the outer ENDIF are assembled again
+        assert [t.mnemonic for t in parser.tokens] == ["EQU", "LDI_A", "HLT"]
+
+    def test_labelled_endif_closes_false_block(self, monkeypatch):
+        """A conditional directive preceded by a label is still recognized in skip mode."""
+        asm_content = """
+        IFDEF UNDEFINED_FLAG
+            LDI A, #$01
+        DONE: ENDIF
+        HLT
+        """
+        parser, _ = self._parse(monkeypatch, asm_content, "/dummy/test_skip_labelled.asm")
+
+        assert [t.mnemonic for t in parser.tokens] == ["HLT"]
+
+
 class TestConditionalAssemblyErrors:
     """Test error conditions for conditional assembly directives."""
     
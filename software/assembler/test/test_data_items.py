@@ -0,0 +1,48 @@
+# software/assembler/test/test_data_items.py
+import pytest
+from src.assembler import Assembler
+from src.data_items import numeric_data, split_data_items
+from src.parser import Parser
+
+
+class TestNumericTables:
+    @pytest.mark.parametrize("operand, item_size, expected", [
+        ("$3F, 10, %101, #$FF", 1, bytes([0x3F, 10, 5, 0xFF])),
+        ("$1234,$00FF", 2, bytes([0x34, 0x12, 0xFF, 0x00])),
+        ("0", 1, b"\x00"),
+    ])
+    def test_plain_literals_are_converted_in_one_batch(self, operand, item_size, expected):
+        assert numeric_data(operand, item_size) == expected
+
+    @pytest.mark.parametrize("operand, item_size", [
+        ("$01, LABEL", 1),        # Symbol
+        ("$01, 'A'", 1),          # Character literal
+        ('"AB", 0', 1),           # String
+        ("$01, $02,", 1),         # Trailing comma
+        ("$100", 1),              # Out of 8-bit range: per-item path reports it
+        ("$10000", 2),
+        ("-1", 1),
+    ])
+    def test_anything_else_falls_back(self, operand, item_size):
+        assert numeric_data(operand, item_size) is None
+
+    def test_data_lines_are_split_once(self, tmp_path):
+        (tmp_path / "table.asm").write_text(
+            "        ORG $F000\n"
+            "SINE:   DB $00, $31, $5A, $7F\n"
+            "PTRS:   DW SINE, SINE + 2, $FFFF\n"
+            "MSG:    DB \"Hi\", 0\n")
+        split_data_items.cache_clear()
+        numeric_data.cache_clear()
+
+        assembler = Assembler(str(tmp_path / "table.asm"), str(tmp_path / "out"), [("ROM", "F000", "F0FF")])
+        assembler.assemble()
+
+        rom = assembler.regions[0]
+        assert bytes(rom.data[:13]) == bytes([0x00, 0x31, 0x5A, 0x7F, 0x00, 0xF0, 0x02, 0xF0, 0xFF, 0xFF,
+                                             ord("H"), ord("i"), 0x00])
+        assert assembler.symbols["MSG"] == 0xF00A
+        # Pass 1 split/converted each line; pass 2 hit the cache
+        assert split_data_items.cache_info().misses == 2
+        assert split_data_items.cache_info().hits == 2
+        assert numeric_data.cache_info().hits == 3
@@ -48,8 +48,8 @@ E2E_TEST_CASES_ERROR = [
     # Corrected pattern for error_local_label_no_global.asm (from earlier, was passing):
     ("error_local_label_no_global.asm", AssemblerError, re.escape("Parser error: Local label '.first' defined without a preceding global label.")),
     
-    # Corrected pattern for features_test.asm:
-    ("features_test.asm", AssemblerError, re.escape("Parser error: EQU value 'LOW_BYTE(BOOT_MESSAGE)' for 'BOOT_MSG_PTR_LOW' must be a numeric literal or a pre-defined symbol in parser's pass.")),
+    # features_test.asm: the forward-referencing EQUs now resolve; 'DW START - 1' is still out of range
+    ("features_test.asm", AssemblerError, re.escape("Value 0x-1 ('START - 1') for DW is out of 16-bit range (0x0000-0xFFFF).")),
 ]
 
 
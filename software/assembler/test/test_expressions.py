@@ -0,0 +1,116 @@
+# software/assembler/test/test_expressions.py
+import pytest
+from src.expressions import (evaluate_expression, evaluate_relocatable_expression, compile_expression, ExpressionError,
+                             RelocatableValue, RelocationError)
+from src.parser import Parser
+
+
+class TestExpressionEngine:
+    def test_evaluates_with_lookup_callable(self):
+        looked_up = []
+
+        def lookup(name):
+            looked_up.append(name)
+            return {"BASE": 0x1200, "OFFSET": 4}.get(name)
+
+        assert evaluate_expression("(OFFSET << 1) + HIGH_BYTE(BASE)", lookup) == 8 + 0x12
+        assert looked_up == ["OFFSET", "BASE"]
+
+    def test_compiled_form_is_cached_and_reevaluated(self):
+        compiled = compile_expression("COUNT & $0F")
+        assert compile_expression("COUNT & $0F") is compiled
+        assert compiled({"COUNT": 0x1F}.get) == 0x0F
+        assert compiled({"COUNT": 0x23}.get) == 0x03
+
+    def test_syntax_errors_raise_at_compile_time(self):
+        with pytest.raises(ExpressionError, match="Malformed arithmetic expression"):
+            compile_expression("SYM + ")
+        with pytest.raises(ExpressionError, match="Empty parentheses"):
+            compile_expression("()")
+
+    def test_unknown_symbol_raises_at_evaluation(self):
+        compiled = compile_expression("MISSING + 1")
+        with pytest.raises(ExpressionError, match="Not a known symbol"):
+            compiled({}.get)
+        assert compiled({"MISSING": 1}.get) == 2
+
+
+class TestParserEquExpressions:
+    def test_equ_expression_reads_symbols_without_copying(self):
+        class NoCopyDict(dict):
+            def copy(self):
+                raise AssertionError("symbol table must not be copied")
+
+        parser = Parser.__new__(Parser)
+        parser.symbol_table = NoCopyDict({"BASE": 0xF000, "MASK": 0x0F})
+        assert parser._parse_simple_expression("HIGH_BYTE(BASE) | MASK", "test.asm", 3) == 0xFF
+
+
+class TestPrattCompiler:
+    SYMBOLS = {"BASE": 0x1200, "I": 3, "TABLE.entry": 0x40}
+
+    @pytest.mark.parametrize("expr, expected", [
+        ("HIGH_BYTE(BASE + (I << 2))", 0x12),
+        ("LOW_BYTE(BASE) + HIGH_BYTE(BASE)", 0x12),       # Two calls in one expression
+        ("1 + 2 << 1", 5),                               # Shift binds tighter than +
+        ("$F0 | $0F & $3C", 0xFC),                       # & binds tighter than |
+        ("10 - 2 - 3", 5),                               # Left-associative
+        ("TABLE.entry + -1", 0x3F),                      # Mangled local label, unary minus
+        ("~(I | $F0)", 0x0C),
+        ("'''", 39),
+    ])
+    def test_precedence_and_forms(self, expr, expected):
+        assert evaluate_expression(expr, self.SYMBOLS.get) == expected
+
+    def test_constant_expressions_are_folded(self):
+        looked_up = []
+        compiled = compile_expression("HIGH_BYTE($1234) + (2 << 3)")
+        assert compiled(looked_up.append) == 0x12 + 16
+        assert looked_up == []
+
+    @pytest.mark.parametrize("expr, message", [
+        ("(1 + 2", "Unbalanced parentheses"),
+        ("1 + 2)", "Unbalanced parentheses"),
+        ("2 * 3", "Unexpected character '\\*'"),
+        ("$0F || $30", "Malformed logical expression"),
+        ("| $0F", "Bad value.*Not a known symbol"),
+        ("1 << -1", "Negative shift count"),
+    ])
+    def test_errors(self, expr, message):
+        with pytest.raises(ExpressionError, match=message):
+            evaluate_expression(expr, self.SYMBOLS.get)
+
+
+class TestRelocatableExpressions:
+    SYMBOLS = {"START": RelocatableValue(None, 0x10), "END": RelocatableValue(None, 0x30),
+               "PUTC": RelocatableValue("PUTC", 0), "COUNT": 3}
+
+    @pytest.mark.parametrize("expr, expected", [
+        ("START + COUNT - 1", RelocatableValue(None, 0x12)),
+        ("2 + PUTC", RelocatableValue("PUTC", 2)),
+        ("END - START", 0x20),                            # Same base: a constant
+        ("LOW_BYTE(END - 1)", RelocatableValue(None, 0x2F, "LOW_BYTE")),
+        ("HIGH_BYTE(PUTC + COUNT)", RelocatableValue("PUTC", 3, "HIGH_BYTE")),
+        ("(START >> 8) & $FF", RelocatableValue(None, 0x10, "HIGH_BYTE")),
+        ("START & $FF", RelocatableValue(None, 0x10, "LOW_BYTE")),
+        ("COUNT << 1", 6),
+    ])
+    def test_base_is_carried_through(self, expr, expected):
+        assert evaluate_relocatable_expression(expr, self.SYMBOLS.get) == expected
+
+    @pytest.mark.parametrize("expr, message", [
+        ("START + PUTC", r"more than one relocatable address \(this module, PUTC\)"),
+        ("START + END", "'\\+' cannot combine an address in this module"),
+        ("START << 1", "'<<' cannot be applied to an address in this module"),
+        ("COUNT - PUTC", "'-' cannot be applied to the address of 'PUTC'"),
+        ("LOW_BYTE(START) + 1", "the low byte of an address in this module"),
+        ("HIGH_BYTE(LOW_BYTE(PUTC))", "HIGH_BYTE cannot be applied"),
+    ])
+    def test_what_the_linker_cannot_compute_is_rejected(self, expr, message):
+        with pytest.raises(RelocationError, match=message):
+            evaluate_relocatable_expression(expr, self.SYMBOLS.get)
+
+    def test_value_at_an_address(self):
+        assert RelocatableValue(None, 0x11, "HIGH_BYTE").at(0x40FF) == 0x41
+        assert RelocatableValue(None, -1, "LOW_BYTE").at(0) == 0xFF
+        assert RelocatableValue("PUTC", 2).at(0xF000) == 0xF002
@@ -0,0 +1,72 @@
+# software/assembler/test/test_fixture_manifest.py
+import pytest
+from src.assembler import Assembler
+from src.fixture_manifest import FixtureManifest
+
+REGION_ARGS = ["--region", "ROM", "F000", "FFFF"]
+
+
+def _program(tmp_path):
+    (tmp_path / "defs.inc").write_text("VALUE EQU $12\n")
+    (tmp_path / "data.bin").write_bytes(b"\x01\x02")
+    main_file = tmp_path / "prog.asm"
+    main_file.write_text('    INCLUDE "defs.inc"\n    ORG $F000\n    DB VALUE\n    INCBIN "data.bin"\n')
+    return main_file
+
+
+def _assemble_and_record(tmp_path, manifest, main_file):
+    assembler = Assembler(str(main_file), str(tmp_path / "out"), [("ROM", "F000", "FFFF")])
+    assembler.assemble()
+    outputs = assembler.write_output_files()
+    manifest.record("prog", str(main_file), REGION_ARGS, assembler.dependencies, outputs)
+
+
+def test_dependencies_cover_includes_and_incbin(tmp_path):
+    main_file = _program(tmp_path)
+    assembler = Assembler(str(main_file), str(tmp_path / "out"), [("ROM", "F000", "FFFF")])
+    assembler.assemble()
+    assert assembler.dependencies == [str(main_file), str(tmp_path / "defs.inc"), str(tmp_path / "data.bin")]
+
+
+def test_fixture_is_current_until_an_input_changes(tmp_path):
+    main_file = _program(tmp_path)
+    manifest_path = str(tmp_path / "out" / "manifest.json")
+    manifest = FixtureManifest(manifest_path, str(tmp_path))
+    assert not manifest.is_current("prog", str(main_file), REGION_ARGS)
+
+    _assemble_and_record(tmp_path, manifest, main_file)
+    manifest.save()
+    reloaded = FixtureManifest(manifest_path, str(tmp_path))
+    assert reloaded.entries["prog"]["dependencies"].keys() == {"prog.asm", "defs.inc", "data.bin"}
+    assert reloaded.is_current("prog", str(main_file), REGION_ARGS)
+    assert not reloaded.is_current("prog", str(main_file), REGION_ARGS + ["--region", "RAM", "0000", "1FFF"])
+
+    (tmp_path / "data.bin").write_bytes(b"\x01\x03")
+    assert not reloaded.is_current("prog", str(main_file), REGION_ARGS)
+
+
+def test_missing_output_makes_fixture_stale(tmp_path):
+    main_file = _program(tmp_path)
+    manifest = FixtureManifest(str(tmp_path / "manifest.json"), str(tmp_path))
+    _assemble_and_record(tmp_path, manifest, main_file)
+
+    (tmp_path / "out" / "ROM.hex").unlink()
+    assert not manifest.is_current("prog", str(main_file), REGION_ARGS)
+
+
+def test_changed_output_makes_fixture_stale(tmp_path):
+    main_file = _program(tmp_path)
+    manifest = FixtureManifest(str(tmp_path / "manifest.json"), str(tmp_path))
+    _assemble_and_record(tmp_path, manifest, main_file)
+    assert manifest.is_current("prog", str(main_file), REGION_ARGS)
+
+    (tmp_path / "out" / "ROM.hex").write_text("garbage\n")
+    assert not manifest.is_current("prog", str(main_file), REGION_ARGS)
+
+
+def test_failed_save_leaves_no_temporary_file(tmp_path):
+    manifest = FixtureManifest(str(tmp_path / "fixtures" / "manifest.json"), str(tmp_path))
+    manifest.entries["prog"] = {"unserializable": object()}
+    with pytest.raises(TypeError):
+        manifest.save()
+    assert list((tmp_path / "fixtures").iterdir()) == []
@@ -0,0 +1,73 @@
+# software/assembler/test/test_incbin.py
+import pytest
+from src.assembler import Assembler, AssemblerError
+from src.incbin import IncbinSpec, mapped_incbin
+from src.parser import Parser, ParserError
+
+
+def _assemble(tmp_path, source_text):
+    source = tmp_path / "prog.asm"
+    source.write_text(source_text)
+    assembler = Assembler(str(source), str(tmp_path / "out"), [("VRAM", "D000", "D0FF"), ("ROM", "F000", "F0FF")])
+    assembler.assemble()
+    return assembler
+
+
+class TestIncbin:
+    def test_file_range_is_copied_into_region(self, tmp_path):
+        (tmp_path / "assets").mkdir()
+        (tmp_path / "assets" / "font.bin").write_bytes(bytes(range(32)))
+        assembler = _assemble(tmp_path, """
+TILE_SIZE EQU 8
+        ORG $D000
+FONT:   INCBIN "assets/font.bin"
+GLYPH:  INCBIN "assets/font.bin", TILE_SIZE >> 1, TILE_SIZE
+        ORG $F000
+        LDI A, #LOW_BYTE(GLYPH)
+""")
+        vram, rom = assembler.regions
+        assert assembler.symbols["GLYPH"] == 0xD020
+        assert bytes(vram.data[:0x28]) == bytes(range(32)) + bytes(range(4, 12))
+        assert vram.byte_count == 0x28
+        assert bytes(rom.data[:2]) == bytes([0xB0, 0x20])
+
+    def test_path_is_relative_to_including_file(self, tmp_path):
+        (tmp_path / "lib").mkdir()
+        (tmp_path / "lib" / "table.bin").write_bytes(b"\x01\x02\x03")
+        (tmp_path / "lib" / "tables.inc").write_text('TABLE: INCBIN "table.bin", 1\n')
+        assembler = _assemble(tmp_path, '        ORG $F000\n        INCLUDE "lib/tables.inc"\nAFTER:  NOP\n')
+        assert assembler.symbols["AFTER"] == 0xF002
+        token = next(t for t in assembler.parsed_tokens if t.mnemonic == "INCBIN")
+        assert token.operand == f'"{tmp_path / "lib" / "table.bin"}", 1, 2'
+
+    @pytest.mark.parametrize("operand, message", [
+        ('"missing.bin"', "cannot be read"),
+        ('"data.bin", 5', "offset 5 is outside"),
+        ('"data.bin", 2, 3', "exceeds"),
+        ('data.bin', "must be a quoted string"),
+    ])
+    def test_operand_errors(self, tmp_path, operand, message):
+        (tmp_path / "data.bin").write_bytes(b"\x00\x01\x02\x03")
+        (tmp_path / "prog.asm").write_text(f"    INCBIN {operand}\n")
+        with pytest.raises(ParserError, match=message):
+            Parser(str(tmp_path / "prog.asm"))
+
+    def test_file_truncated_after_parsing(self, tmp_path, monkeypatch):
+        data = tmp_path / "data.bin"
+        data.write_bytes(bytes(16))
+        original_parser = Parser.__init__
+
+        def parse_then_truncate(instance_self, *args, **kwargs):
+            original_parser(instance_self, *args, **kwargs)
+            data.write_bytes(bytes(4))
+
+        monkeypatch.setattr(Parser, "__init__", parse_then_truncate)
+        with pytest.raises(AssemblerError, match="shorter than when it was parsed"):
+            _assemble(tmp_path, '        ORG $F000\n        INCBIN "data.bin"\n')
+
+    def test_errors_inside_the_with_body_are_not_relabelled(self, tmp_path):
+        data = tmp_path / "data.bin"
+        data.write_bytes(bytes(4))
+        with pytest.raises(PermissionError, match="region is read-only"):
+            with mapped_incbin(IncbinSpec(str(data), 0, 4)):
+                raise PermissionError("region is read-only")
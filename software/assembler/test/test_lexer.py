@@ -0,0 +1,82 @@
+# software/assembler/test/test_lexer.py
+import pytest
+from src.lexer import lex_line, split_operands, leading_keyword, is_bare_keyword, LexError, Span, _scan_line
+from src.parser import Parser
+
+
+class TestLexLine:
+    def test_full_line_spans_and_columns(self):
+        lexed = lex_line("START:  LDA MY_SYM + 5 ; load it\n")
+        assert lexed.label == Span("START", 0)
+        assert lexed.mnemonic == Span("LDA", 8)
+        assert lexed.operand == Span("MY_SYM + 5", 12)
+        assert lexed.operands == [Span("MY_SYM + 5", 12)]
+        assert lexed.comment == Span("; load it", 23)
+
+    def test_operand_list_columns(self):
+        lexed = lex_line('    DB $01,  "HI", COUNT')
+        assert [s.text for s in lexed.operands] == ["$01", '"HI"', "COUNT"]
+        assert [s.column for s in lexed.operands] == [7, 13, 19]
+
+    @pytest.mark.parametrize("line", ["", "   ", "; only a comment", "   ; indented comment"])
+    def test_empty_lines(self, line):
+        assert lex_line(line).is_empty
+
+    def test_local_label_only(self):
+        lexed = lex_line(".loop:   ; comment")
+        assert lexed.label == Span(".loop", 0)
+        assert lexed.mnemonic is None
+        assert lexed.comment == Span("; comment", 9)
+
+    def test_comma_delimiter_after_mnemonic(self):
+        assert lex_line("MNEM  , x").operand.text == "x"
+
+    def test_quoted_semicolon_and_comma_are_not_special(self):
+        lexed = lex_line('DB "a;b, c", \';\', 2 ; real comment')
+        assert [s.text for s in lexed.operands] == ['"a;b, c"', "';'", "2"]
+        assert lexed.comment.text == "; real comment"
+
+    def test_escaped_quote_inside_string(self):
+        lexed = lex_line('DB "say \\"hi, there\\"", 0')
+        assert [s.text for s in lexed.operands] == ['"say \\"hi, there\\""', "0"]
+
+    @pytest.mark.parametrize("line", ["LDA#5", "LOW_BYTE(X)", "LABEL: 123", ". NOP"])
+    def test_unrecognized_syntax(self, line):
+        with pytest.raises(LexError):
+            lex_line(line)
+
+    @pytest.mark.parametrize("line", [
+        "START:  LDA MY_SYM + 5 ; load it\n", "  DB , 1", "  DB ,", "LABEL:\n", "X: ; c", "  HLT\t\n", "A:B C",
+        '  DB "a;b" ; c', '  DB "unterminated ; c', "  DB '\\'', 1", "  DB ''', 2", '  DB "x\\',
+    ])
+    def test_regex_path_agrees_with_scanner(self, line):
+        assert lex_line(line) == _scan_line(line)
+
+
+class TestLexerHelpers:
+    def test_split_operands_maxsplit(self):
+        assert [s.text for s in split_operands("A, #$10, extra", maxsplit=1)] == ["A", "#$10, extra"]
+
+    def test_split_operands_keeps_empty_items(self):
+        assert [s.text for s in split_operands("1, , 2,")] == ["1", "", "2", ""]
+
+    def test_leading_keyword(self):
+        assert leading_keyword("  macro DELAY count") == "MACRO"
+        assert leading_keyword("MACRO_CALL 1") == "MACRO_CALL"
+        assert leading_keyword("LOW_BYTE(X)") is None
+        assert leading_keyword("  ; comment") is None
+
+    def test_is_bare_keyword(self):
+        assert is_bare_keyword("  endm   ; done", "ENDM")
+        assert not is_bare_keyword("ENDM extra", "ENDM")
+        assert not is_bare_keyword("ENDMX", "ENDM")
+
+
+class TestParserUsesLexer:
+    def test_semicolon_in_char_literal_is_not_a_comment(self):
+        parser = Parser.__new__(Parser)
+        assert parser._parse_line_components("LDI A, #';' ; semicolon", "test.asm", 1) == (None, "LDI", "A, #';'")
+
+    def test_comma_in_char_literal_does_not_split_db(self):
+        parser = Parser.__new__(Parser)
+        assert parser._calculate_db_dw_size("DB", "',', \"a,b\", 3", "f.asm", 1) == 1 + 3 + 1
@@ -0,0 +1,61 @@
+# software/assembler/test/test_library_api.py
+import pytest
+from src.assembler import assemble_source, AssemblerError
+from src.source_manager import SourceManager
+
+ROM = [("ROM", "F000", "FFFF")]
+
+
+def test_source_text_is_assembled_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = assemble_source("    ORG $F000\nSTART: LDI A, #$2A\n    JMP START\n", ROM)
+
+    assert result.symbols == {"START": 0xF000}
+    assert result.image("ROM")[:5] == bytes([0xB0, 0x2A, 0x10, 0x00, 0xF0])
+    assert len(result.image("ROM")) == 0x1000
+    assert result.render("ROM") == b"@0000\nB0\n2A\n10\n00\nF0\n"
+    assert result.diagnostics == []
+    assert list(tmp_path.iterdir()) == []  # No output files, no log file
+
+
+def test_path_source_with_include_and_default_region(tmp_path):
+    (tmp_path / "defs.inc").write_text("VALUE EQU $11\n")
+    main_file = tmp_path / "main.asm"
+    main_file.write_text('    INCLUDE "defs.inc"\n    ORG $0100\n    DB VALUE, VALUE + 1\n')
+
+    result = assemble_source(main_file)
+
+    assert [region.name for region in result.regions] == ["DEFAULT_OUTPUT"]
+    assert result.image("DEFAULT_OUTPUT")[0x100:0x102] == b"\x11\x12"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["defs.inc", "main.asm"]
+
+
+def test_text_source_includes_relative_to_source_name(tmp_path):
+    (tmp_path / "defs.inc").write_text("VALUE EQU $33\n")
+    result = assemble_source('    INCLUDE "defs.inc"\n    ORG $F000\n    DB VALUE\n', ROM,
+                             source_name=str(tmp_path / "virtual.asm"))
+    assert result.image("ROM")[0] == 0x33
+
+
+def test_warnings_are_returned_as_diagnostics(capsys):
+    result = assemble_source("    ORG $0010\n    NOP\n", ROM)
+
+    assert len(result.diagnostics) == 1
+    diagnostic = result.diagnostics[0]
+    assert diagnostic.level == "WARNING"
+    assert "outside all defined memory regions" in diagnostic.message
+    assert diagnostic.line_no == 2
+    assert capsys.readouterr().err == ""
+
+
+def test_errors_raise_assembler_error():
+    with pytest.raises(AssemblerError, match="UNDEFINED_SYMBOL"):
+        assemble_source("    ORG $F000\n    JMP UNDEFINED_SYMBOL\n", ROM)
+
+
+def test_source_manager_is_reused_across_calls():
+    source_manager = SourceManager()
+    first = assemble_source("    ORG $F000\n    DB 1\n", ROM, source_manager=source_manager)
+    second = assemble_source("    ORG $F000\n    DB 2\n", ROM, source_manager=source_manager)
+    assert (first.image("ROM")[0], second.image("ROM")[0]) == (1, 2)
+    assert len(source_manager.paths()) == 1
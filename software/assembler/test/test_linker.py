@@ -0,0 +1,207 @@
+# software/assembler/test/test_linker.py
+import os
+import shutil
+
+import pytest
+from src.assembler import Assembler, AssemblerError, ObjectAssembler, main
+from src.linker import Linker, LinkError
+from src.object_file import ObjectFile, ObjectSymbol, RELOC_BYTE, RELOC_HI8, RELOC_LO8, RELOC_WORD
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "asm", "src", "programs")
+ROM = [("ROM", "F000", "FFFF")]
+
+LIBRARY = """\
+; Relocatable library: no ORG
+COUNT EQU 3
+PRINT:
+    LDI C, #LOW_BYTE(MSG)
+    LDI B, #HIGH_BYTE(MSG + 1)
+.loop:
+    JSR SEND_BYTE
+    XRI #ASCII_CR
+    JNZ .loop
+    LDA BUF + 2
+    RET
+MSG: DB "hi", 0, COUNT, LOW_BYTE(PRINT)
+TABLE: DW PRINT, MSG, END - PRINT, SEND_BYTE + 1
+END:
+"""
+
+MAIN = """\
+ASCII_CR EQU $0D
+BUF EQU $0200
+    ORG $F000
+START:
+    JSR PRINT
+    HLT
+SEND_BYTE:
+    STA $E000
+    RET
+"""
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def assemble_object(path):
+    asm = ObjectAssembler(str(path), str(path) + ".o")
+    asm.assemble()
+    asm.write_output_files()
+    return asm
+
+
+def rom_image(linker_or_assembler):
+    region = next(region for region in linker_or_assembler.regions if region.name == "ROM")
+    return bytes(region.data[:region.occupied.rfind(1) + 1])
+
+
+def test_library_object_records_relocations_exports_and_imports(tmp_path):
+    write(tmp_path / "lib.asm", LIBRARY)
+    asm = assemble_object(tmp_path / "lib.asm")
+    obj = ObjectFile.load(str(tmp_path / "lib.asm.o"))
+
+    assert obj == asm.object_file
+    assert [(section.name, section.address, len(section.data)) for section in obj.sections] == [("CODE", None, 29)]
+    assert obj.imports == ["SEND_BYTE", "ASCII_CR", "BUF"]
+    assert obj.exports == {"COUNT": ObjectSymbol(3, False), "PRINT": ObjectSymbol(0, True), "MSG": ObjectSymbol(16, True),
+                           "TABLE": ObjectSymbol(21, True), "END": ObjectSymbol(29, True)}
+    assert [(r.offset, r.kind, r.symbol, r.addend) for r in obj.relocations] == [
+        (1, RELOC_LO8, None, 16), (3, RELOC_HI8, None, 17), (5, RELOC_WORD, "SEND_BYTE", 0),
+        (8, RELOC_BYTE, "ASCII_CR", 0), (10, RELOC_WORD, None, 4), (13, RELOC_WORD, "BUF", 2),
+        (20, RELOC_LO8, None, 0), (21, RELOC_WORD, None, 0), (23, RELOC_WORD, None, 16),
+        (27, RELOC_WORD, "SEND_BYTE", 1),
+    ]
+    assert obj.sections[0].data[25:27] == bytes([29, 0])  # END - PRINT is absolute
+    assert obj.relocations[3].line_no == 8
+
+
+def test_equ_values_relocate_with_the_labels_they_use(tmp_path):
+    write(tmp_path / "equ.asm", "MSG_HI EQU HIGH_BYTE(MSG)\nMSG_END EQU MSG + 2\nMSG_LEN EQU MSG_END - MSG\n"
+                                "TWICE EQU MSG << 1\nMSG: DB 1, 2\n    LDI A, #MSG_HI\n    DW MSG_END, MSG_LEN\n")
+    asm = assemble_object(tmp_path / "equ.asm")
+    obj = asm.object_file
+    assert asm.dependencies == [str(tmp_path / "equ.asm")]  # Parsed once, without a wrapper file
+    assert [(r.offset, r.kind, r.symbol, r.addend) for r in obj.relocations] == [(3, RELOC_HI8, None, 0), (4, RELOC_WORD, None, 2)]
+    assert obj.sections[0].data[6:8] == bytes([2, 0])
+    assert obj.exports == {"MSG_END": ObjectSymbol(2, True), "MSG_LEN": ObjectSymbol(2, False), "MSG": ObjectSymbol(0, True)}
+
+    write(tmp_path / "bad.asm", "TWICE EQU HERE << 1\nHERE:\n    DB TWICE\n")
+    with pytest.raises(AssemblerError, match="the value of 'TWICE' cannot be relocated"):
+        ObjectAssembler(str(tmp_path / "bad.asm"), None).assemble()
+
+
+def test_linked_program_matches_single_assembly(tmp_path):
+    write(tmp_path / "lib.asm", LIBRARY)
+    write(tmp_path / "main.asm", MAIN)
+    assemble_object(tmp_path / "lib.asm")
+    assemble_object(tmp_path / "main.asm")
+    linker = Linker([str(tmp_path / "main.asm.o"), str(tmp_path / "lib.asm.o")], str(tmp_path / "out"))
+    linker.link()
+
+    write(tmp_path / "whole.asm", MAIN + LIBRARY.replace(".loop", ".lib_loop"))
+    direct = Assembler(str(tmp_path / "whole.asm"), None, ROM)
+    direct.assemble()
+    assert rom_image(linker) == rom_image(direct)
+    assert linker.symbols["PRINT"] == direct.symbols["PRINT"] == 0xF008
+    assert [(p.section, p.address, p.region) for p in linker.placements] == [("ORG_F000", 0xF000, "ROM"), ("CODE", 0xF008, "ROM")]
+    assert [os.path.basename(path) for path in linker.write_output_files()] == ["ROM.hex"]
+
+
+def test_library_object_is_linked_at_different_addresses(tmp_path):
+    write(tmp_path / "lib.asm", LIBRARY)
+    assemble_object(tmp_path / "lib.asm")
+    for padding in (0, 0x80):
+        write(tmp_path / "main.asm", MAIN + f"    DB {', '.join(['0'] * padding) or '0'}\n")
+        assemble_object(tmp_path / "main.asm")
+        linker = Linker([str(tmp_path / "main.asm.o"), str(tmp_path / "lib.asm.o")], None)
+        linker.link()
+        print_address = linker.symbols["PRINT"]
+        msg = print_address + 16
+        image = rom_image(linker)[print_address - 0xF000:]
+        assert image[:4] == bytes([0xB2, msg & 0xFF, 0xB1, (msg + 1) >> 8])
+        assert image[21:23] == bytes([print_address & 0xFF, print_address >> 8])
+
+
+def test_absolute_section_refers_to_relocatable_label(tmp_path):
+    write(tmp_path / "boot.asm", "RESET:\n    JMP RESET\n    ORG $FFFC\n    DW RESET\n")
+    obj = assemble_object(tmp_path / "boot.asm").object_file
+    assert [(section.name, section.address) for section in obj.sections] == [("CODE", None), ("ORG_FFFC", 0xFFFC)]
+    assert [(r.section, r.offset, r.kind) for r in obj.relocations] == [(0, 1, RELOC_WORD), (1, 0, RELOC_WORD)]
+
+    linker = Linker([str(tmp_path / "boot.asm.o")], None)
+    linker.link()
+    rom = next(region for region in linker.regions if region.name == "ROM")
+    assert rom.data[1:3] == bytes([0x00, 0xF0])  # CODE placed at the start of ROM
+    assert rom.data[0xFFC:0xFFE] == bytes([0x00, 0xF0])
+
+
+def test_operand_with_two_relocatable_targets_is_rejected(tmp_path):
+    write(tmp_path / "bad.asm", "HERE:\n    DW HERE + ELSEWHERE\n")
+    with pytest.raises(AssemblerError, match="more than one relocatable address"):
+        ObjectAssembler(str(tmp_path / "bad.asm"), None).assemble()
+
+
+def test_non_address_use_of_label_is_rejected(tmp_path):
+    write(tmp_path / "bad.asm", "HERE:\n    DB HERE << 1\n")
+    with pytest.raises(AssemblerError, match="cannot be relocated"):
+        ObjectAssembler(str(tmp_path / "bad.asm"), None).assemble()
+
+
+def test_regions_are_not_accepted_for_objects(tmp_path):
+    with pytest.raises(AssemblerError, match="chosen when linking"):
+        ObjectAssembler(write(tmp_path / "lib.asm", LIBRARY), None, ROM)
+
+
+@pytest.mark.parametrize("main_text, message", [
+    ("    ORG $F000\n    HLT\n", "Undefined symbol 'SEND_BYTE'"),
+    (MAIN + "PRINT:\n    RET\n", "'PRINT' is exported by both"),
+    (MAIN.replace("ASCII_CR EQU $0D", "ASCII_CR EQU $1234"), "out of 8-bit range"),
+])
+def test_link_errors(tmp_path, main_text, message):
+    write(tmp_path / "lib.asm", LIBRARY)
+    write(tmp_path / "main.asm", main_text)
+    assemble_object(tmp_path / "lib.asm")
+    assemble_object(tmp_path / "main.asm")
+    with pytest.raises(LinkError, match=message):
+        Linker([str(tmp_path / "main.asm.o"), str(tmp_path / "lib.asm.o")], None).link()
+
+
+def test_overlapping_absolute_sections_and_full_region(tmp_path):
+    write(tmp_path / "a.asm", "    ORG $F000\n    DB 1, 2, 3\n")
+    write(tmp_path / "b.asm", "    ORG $F002\n    DB 4\n")
+    write(tmp_path / "lib.asm", LIBRARY)
+    for name in ("a.asm", "b.asm", "lib.asm"):
+        assemble_object(tmp_path / name)
+
+    with pytest.raises(LinkError, match="overlaps section ORG_F000 of a.asm.o at address 0xF002"):
+        Linker([str(tmp_path / "a.asm.o"), str(tmp_path / "b.asm.o")], None).link()
+    with pytest.raises(LinkError, match="No room for section CODE"):
+        Linker([str(tmp_path / "lib.asm.o")], None, [("ROM", "F000", "F00F")]).link()
+
+
+def test_main_writes_object_and_dependency_file(tmp_path):
+    write(tmp_path / "lib.asm", LIBRARY)
+    written = main(str(tmp_path / "lib.asm"), str(tmp_path / "obj" / "lib.o"), None,
+                   dependency_file="", object_output=True)
+    assert written == [str(tmp_path / "obj" / "lib.o")]
+    assert ObjectFile.load(written[0]).exports["PRINT"] == ObjectSymbol(0, True)
+    assert (tmp_path / "obj" / "lib.d").read_text().startswith(f"{written[0]}: {tmp_path / 'lib.asm'}\n")
+
+
+def test_monitor_linked_from_separately_assembled_routines(tmp_path):
+    shutil.copytree(os.path.join(PROGRAMS_DIR, "includes"), tmp_path / "includes")
+    with open(os.path.join(PROGRAMS_DIR, "monitor.asm")) as f:
+        monitor = [line for line in f if 'INCLUDE "includes/routines' not in line]
+    write(tmp_path / "monitor_main.asm", "".join(monitor))
+    routines = ["includes/routines_uart.inc", "includes/routines_delay.inc"]
+    objects = [assemble_object(tmp_path / name).output_specifier for name in ["monitor_main.asm"] + routines]
+    linker = Linker(objects, None)
+    linker.link()
+
+    # The same program with the routines INCLUDEd where the linker places them: after everything else
+    write(tmp_path / "monitor_whole.asm", "".join(monitor).rstrip("\n") + "\n" + "".join(f'INCLUDE "{name}"\n' for name in routines))
+    direct = Assembler(str(tmp_path / "monitor_whole.asm"), None, ROM)
+    direct.assemble()
+    assert rom_image(linker) == rom_image(direct)
@@ -433,4 +433,72 @@ class TestMacroIntegration:
                         assert len(content.strip()) > 0
                         
             finally:
-                os.unlink(f.name)
\ No newline at end of file
+                os.unlink(f.name)
+
+class TestMacroTemplates:
+    """Test macro bodies compiled into slot templates at definition time"""
+
+    def _parse(self, tmp_path, asm_content):
+        path = tmp_path / "main.asm"
+        path.write_text(asm_content)
+        return Parser(str(path))
+
+    def test_template_slots_and_call_sites(self):
+        from src.parser import MacroDefinition, EXPANSION_ID_SLOT
+        macro = MacroDefinition(name="M", parameters=["reg", "value"],
+                                body_lines=["@@top: LDI reg, value", "    INNER value", "    reg"],
+                                source_file="m.inc", line_no=1)
+        first, second, third = macro.template
+        assert first.parts == ("__MACRO_", EXPANSION_ID_SLOT, "_top: LDI ", 0, ", ", 1)
+        assert first.call_name == "LDI" and not first.needs_scan
+        assert second.call_name == "INNER"
+        assert third.needs_scan  # Mnemonic supplied by a parameter
+        assert first.render(["A", "#$10", "7"]) == "__MACRO_7_top: LDI A, #$10"
+
+    def test_expansion_does_not_build_regexes(self, tmp_path, monkeypatch):
+        import re
+        parser_src = """
+        MACRO LOAD reg, value
+            LDI reg, value
+        ENDM
+        LOAD A, #1
+        LOAD B, #2
+        """
+        calls = []
+        original_sub = re.sub
+        monkeypatch.setattr(re, "sub", lambda *a, **k: calls.append(a) or original_sub(*a, **k))
+        parser = self._parse(tmp_path, parser_src)
+        assert calls == []
+        assert [(t.mnemonic, t.operand) for t in parser.tokens] == [("LDI_A", "#1"), ("LDI_B", "#2")]
+
+    def test_arguments_are_inserted_verbatim(self, tmp_path):
+        parser = self._parse(tmp_path, """
+        MACRO LOAD_CHAR ch
+            LDI A, #ch
+        ENDM
+        LOAD_CHAR '\\n'
+        """)
+        assert parser.tokens[0].operand == "#'\\n'"
+
+    def test_arguments_are_not_resubstituted(self, tmp_path):
+        parser = self._parse(tmp_path, """
+        MACRO PAIR first, second
+            LDI A, #first
+            LDI B, #second
+        ENDM
+        PAIR second, 5
+        """)
+        assert [t.operand for t in parser.tokens] == ["#second", "#5"]
+
+    def test_parameter_as_nested_macro_name(self, tmp_path):
+        parser = self._parse(tmp_path, """
+        MACRO TWICE op
+            op
+            op
+        ENDM
+        MACRO PAUSE
+            NOP
+        ENDM
+        TWICE PAUSE
+        """)
+        assert [t.mnemonic for t in parser.tokens] == ["NOP", "NOP"]
@@ -0,0 +1,68 @@
+# software/assembler/test/test_output_formats.py
+import pytest
+from src.assembler import Assembler, AssemblerError, MemoryRegion
+from src.output_formats import _ihex_record, _srec_record, output_path, render
+
+
+PROGRAM = """
+        ORG $F000
+START:  LDI A, #$42
+        JMP START
+        ORG $F010
+        DB $01, $02
+"""
+
+
+@pytest.fixture
+def assembled(tmp_path):
+    source = tmp_path / "prog.asm"
+    source.write_text(PROGRAM)
+    out_dir = tmp_path / "out"
+    assembler = Assembler(str(source), str(out_dir), [("ROM", "F000", "F0FF")],
+                          output_formats=["readmemh", "bin", "ihex", "srec"])
+    assembler.assemble()
+    assembler.write_output_files()
+    return out_dir
+
+
+class TestOutputFormats:
+    def test_record_checksums(self):
+        assert _ihex_record(0x00, 0x0030, bytes([0x02, 0x33, 0x7A])) == ":0300300002337A1E"
+        assert _ihex_record(0x01, 0x0000, b"") == ":00000001FF"
+        data = bytes([0x0A, 0x0A, 0x0D]) + bytes(13)
+        assert _srec_record(1, 0x7AF0, data) == "S1137AF00A0A0D0000000000000000000000000061"
+
+    def test_all_formats_written_from_one_assembly(self, assembled):
+        assert (assembled / "ROM.hex").read_text().split() == [
+            "@0000", "B0", "42", "10", "00", "F0", "@0010", "01", "02"]
+
+        image = (assembled / "ROM.bin").read_bytes()
+        assert len(image) == 0x100
+        assert image[:5] == bytes([0xB0, 0x42, 0x10, 0x00, 0xF0])
+        assert image[0x10:0x12] == bytes([0x01, 0x02])
+        assert image[5:0x10] == bytes(0x0B)
+
+        assert (assembled / "ROM.ihx").read_text().split() == [
+            _ihex_record(0x00, 0xF000, bytes([0xB0, 0x42, 0x10, 0x00, 0xF0])),
+            _ihex_record(0x00, 0xF010, bytes([0x01, 0x02])),
+            ":00000001FF"]
+
+        srec_lines = (assembled / "ROM.srec").read_text().split()
+        assert srec_lines[0] == _srec_record(0, 0x0000, b"ROM")
+        assert srec_lines[1:] == [
+            _srec_record(1, 0xF000, bytes([0xB0, 0x42, 0x10, 0x00, 0xF0])),
+            _srec_record(1, 0xF010, bytes([0x01, 0x02])),
+            "S9030000FC"]
+
+    def test_records_split_at_sixteen_bytes(self):
+        region = MemoryRegion(name="ROM", start_addr=0xF000, end_addr=0xF0FF, output_filename="ROM.hex")
+        region.store(0, list(range(20)))
+        lines = render(region, "ihex").decode().split()
+        assert lines[0].startswith(":10F00000")
+        assert lines[1].startswith(":04F01000")
+
+    def test_output_paths_and_unknown_format(self, tmp_path):
+        assert output_path("out/prog.hex", "readmemh") == "out/prog.hex"
+        assert output_path("out/prog.hex", "bin") == "out/prog.bin"
+        with pytest.raises(AssemblerError, match="Unknown output format"):
+            Assembler(str(tmp_path / "p.asm"), str(tmp_path / "p.hex"), None, output_formats=["elf"])
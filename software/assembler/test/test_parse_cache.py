@@ -0,0 +1,112 @@
+# software/assembler/test/test_parse_cache.py
+import json
+import pytest
+from src.parser import Parser, ParserError
+from src.parse_cache import ParseCache, assembler_fingerprint
+
+
+INCLUDE_TEXT = """
+MY_CONST EQU $10
+MACRO LOAD_CONST reg
+    LDI reg, #MY_CONST
+ENDM
+SUB: RET
+"""
+
+MAIN_TEXT = """
+INCLUDE "defs.inc"
+START: LOAD_CONST A
+    HLT
+"""
+
+
+@pytest.fixture
+def program(tmp_path):
+    (tmp_path / "defs.inc").write_text(INCLUDE_TEXT)
+    main_file = tmp_path / "main.asm"
+    main_file.write_text(MAIN_TEXT)
+    return str(main_file), str(tmp_path / "cache")
+
+
+def _count_scans(monkeypatch):
+    scanned = []
+    original_scan = Parser._parse_line_components
+
+    def counting_scan(instance_self, raw_line_text, source_file, line_no):
+        scanned.append((source_file, raw_line_text.strip()))
+        return original_scan(instance_self, raw_line_text, source_file, line_no)
+
+    monkeypatch.setattr(Parser, "_parse_line_components", counting_scan)
+    return scanned
+
+
+class TestParseCache:
+    def test_second_run_reuses_cached_scans_and_macros(self, program, monkeypatch):
+        main_path, cache_dir = program
+        first = Parser(main_path, cache_dir=cache_dir)
+        assert first.source_manager.parse_cache.misses == 2
+
+        scanned = _count_scans(monkeypatch)
+        monkeypatch.setattr(Parser, "_parse_macro_definition",
+                            lambda *args: pytest.fail("macro should come from the cache"))
+        second = Parser(main_path, cache_dir=cache_dir)
+
+        assert second.source_manager.parse_cache.hits == 2
+        # Only the macro expansion output is scanned; no source line is
+        assert [text for _, text in scanned] == ["START:     LDI A, #MY_CONST"]
+        assert second.tokens == first.tokens
+        assert second.symbol_table == first.symbol_table
+        assert second.macros == first.macros
+
+    def test_cached_macro_still_detects_redefinition(self, program, tmp_path):
+        main_path, cache_dir = program
+        Parser(main_path, cache_dir=cache_dir)
+
+        (tmp_path / "main.asm").write_text(MAIN_TEXT + 'INCLUDE "defs.inc"\n')
+        with pytest.raises(ParserError, match="Macro 'LOAD_CONST' already defined"):
+            Parser(main_path, cache_dir=cache_dir)
+
+    def test_stale_entry_is_rebuilt(self, program, monkeypatch):
+        main_path, cache_dir = program
+        parser = Parser(main_path, cache_dir=cache_dir)
+        include_source = next(f for f in parser.source_manager._files.values() if f.path.endswith("defs.inc"))
+        entry_path = ParseCache(cache_dir)._entry_path(include_source)
+
+        with open(entry_path) as f:
+            entry = json.load(f)
+        assert entry["assembler"] == assembler_fingerprint()
+        entry["assembler"] = "older-assembler"
+        entry["components"] = {}
+        with open(entry_path, "w") as f:
+            json.dump(entry, f)
+
+        scanned = _count_scans(monkeypatch)
+        rebuilt = Parser(main_path, cache_dir=cache_dir)
+
+        assert rebuilt.source_manager.parse_cache.misses == 1
+        assert any(path.endswith("defs.inc") for path, _ in scanned)
+        assert [t.mnemonic for t in rebuilt.tokens] == ["EQU", "RET", "LDI_A", "HLT"]
+        with open(entry_path) as f:
+            assert json.load(f)["assembler"] == assembler_fingerprint()
+
+    def test_unreadable_entry_is_ignored(self, program):
+        main_path, cache_dir = program
+        parser = Parser(main_path, cache_dir=cache_dir)
+        for source in parser.source_manager._files.values():
+            with open(ParseCache(cache_dir)._entry_path(source), "w") as f:
+                f.write("{not json")
+
+        reparsed = Parser(main_path, cache_dir=cache_dir)
+        assert reparsed.source_manager.parse_cache.hits == 0
+        assert reparsed.tokens == parser.tokens
+
+    def test_failed_write_leaves_no_temporary_file(self, program, tmp_path, monkeypatch):
+        main_path, cache_dir = program
+
+        def failing_dump(obj, f):
+            f.write("{")
+            raise OSError("disk full")
+
+        monkeypatch.setattr("src.parse_cache.json.dump", failing_dump)
+        Parser(main_path, cache_dir=cache_dir)
+        assert list((tmp_path / "cache").iterdir()) == []
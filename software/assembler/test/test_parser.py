@@ -6,7 +6,7 @@ from io import StringIO
 
 # Adjust import path based on how pytest discovers your modules.
 # If running pytest from `software/assembler/` directory:
-from src.parser import Parser, ParserError, Token, LINE_PATTERN, CSV_SPLIT_REGEX
+from src.parser import Parser, ParserError, Token
 from src.constants import INSTRUCTION_SET # For checking mnemonic validity in some tests
 
 class TestParserUnit:
@@ -354,4 +354,70 @@ class TestParserUnit:
         assert parser.tokens[0].label is None # NOP line has no label directly on it
         assert parser.tokens[0].line_no == 3   # "NOP" is on line 3 of asm_content
         assert parser.tokens[1].label is None # HLT line has no label directly on it
-        assert parser.tokens[1].line_no == 5   # "HLT" is on line 5
\ No newline at end of file
+        assert parser.tokens[1].line_no == 5   # "HLT" is on line 5
+
+class TestEquDependencyOrder:
+    @staticmethod
+    def _parse(monkeypatch, asm_content):
+        def mock_load(instance_self, filepath_to_load, requesting_file, requesting_line_no):
+            return asm_content.splitlines()
+        monkeypatch.setattr(Parser, "_load_lines_from_physical_file", mock_load)
+        return Parser(main_input_filepath="/dummy/equ_order.asm")
+
+    def test_forward_references_resolve(self, monkeypatch):
+        parser = self._parse(monkeypatch, """
+        SIZE_PLUS_ONE EQU SIZE + 1
+        TABLE_LOW     EQU LOW_BYTE(TABLE)
+        SIZE          EQU END_ADDR - TABLE
+                ORG $0100
+        TABLE:  DB 1, 2, 3
+        END_ADDR:
+                HLT
+        """)
+        assert parser.symbol_table["SIZE"] == 3
+        assert parser.symbol_table["SIZE_PLUS_ONE"] == 4
+        assert parser.symbol_table["TABLE_LOW"] == 0x00
+
+    def test_each_equ_is_evaluated_once(self, monkeypatch):
+        evaluated = []
+        original = Parser._parse_simple_expression
+
+        def counting(instance_self, expression_str, source_file, line_no):
+            evaluated.append(expression_str)
+            return original(instance_self, expression_str, source_file, line_no)
+
+        monkeypatch.setattr(Parser, "_parse_simple_expression", counting)
+        self._parse(monkeypatch, """
+        C EQU B + A
+        B EQU A + 1
+        A EQU BASE + 1
+        D EQU C | 1
+        BASE: NOP
+        """)
+        assert sorted(evaluated) == sorted(["B + A", "A + 1", "BASE + 1", "C | 1"])
+
+    def test_cycle_is_named(self, monkeypatch):
+        with pytest.raises(ParserError, match=re.escape("Circular EQU definition: A -> B -> C -> A")):
+            self._parse(monkeypatch, """
+            A EQU B + 1
+            B EQU C + 1
+            C EQU A + 1
+            """)
+
+    def test_undefined_reference_reported_at_equ(self, monkeypatch):
+        with pytest.raises(ParserError, match="EQU value 'MISSING \\+ 1' for 'X' could not be resolved") as exc_info:
+            self._parse(monkeypatch, """
+            NOP
+            X EQU MISSING + 1
+            """)
+        assert exc_info.value.line_no == 3
+
+    def test_deferred_equ_counts_as_defined_for_ifdef(self, monkeypatch):
+        parser = self._parse(monkeypatch, """
+        LATE EQU LATER_LABEL + 1
+        IFNDEF LATE
+            LATE EQU $10
+        ENDIF
+        LATER_LABEL: NOP
+        """)
+        assert parser.symbol_table["LATE"] == 1
@@ -0,0 +1,62 @@
+# software/assembler/test/test_source_manager.py
+import pytest
+from src.parser import Parser
+from src.source_manager import SourceManager
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+class TestSourceManager:
+    def test_each_file_loaded_once_per_assembly(self, tmp_path, monkeypatch):
+        _write(tmp_path / "defs.inc", "MY_CONST EQU $10\n")
+        _write(tmp_path / "routines.inc", "MACRO LOAD_CONST\n    LDI A, #MY_CONST\nENDM\nSUB: RET\n")
+        main_path = _write(tmp_path / "main.asm",
+                           'INCLUDE "defs.inc"\nSTART: LOAD_CONST\n    HLT\nINCLUDE "routines.inc"\n')
+
+        load_calls = []
+        original_load = Parser._load_lines_from_physical_file
+
+        def counting_load(instance_self, filepath, requesting_file, requesting_line_no):
+            load_calls.append(filepath)
+            return original_load(instance_self, filepath, requesting_file, requesting_line_no)
+
+        monkeypatch.setattr(Parser, "_load_lines_from_physical_file", counting_load)
+        parser = Parser(main_path)
+
+        assert sorted(load_calls) == sorted(set(load_calls))
+        assert len(load_calls) == 3
+        assert parser.source_manager.load_count == 3
+        assert [t.mnemonic for t in parser.tokens] == ["EQU", "LDI_A", "HLT", "RET"]
+
+    def test_components_scanned_once_across_phases(self, tmp_path, monkeypatch):
+        main_path = _write(tmp_path / "main.asm", "START: NOP\n    JMP START\n")
+
+        scanned = []
+        original_scan = Parser._parse_line_components
+
+        def counting_scan(instance_self, raw_line_text, source_file, line_no):
+            scanned.append(line_no)
+            return original_scan(instance_self, raw_line_text, source_file, line_no)
+
+        monkeypatch.setattr(Parser, "_parse_line_components", counting_scan)
+        Parser(main_path)
+
+        assert scanned == [1, 2]
+
+    def test_shared_manager_reuses_unchanged_files(self, tmp_path):
+        main_file = tmp_path / "main.asm"
+        main_path = _write(main_file, "START: NOP\n")
+        manager = SourceManager()
+
+        Parser(main_path, source_manager=manager)
+        Parser(main_path, source_manager=manager)
+        assert manager.load_count == 1
+
+        # A changed file (different size) must be reloaded
+        main_file.write_text("START: NOP\n    HLT\n")
+        parser = Parser(main_path, source_manager=manager)
+        assert manager.load_count == 2
+        assert [t.mnemonic for t in parser.tokens] == ["NOP", "HLT"]
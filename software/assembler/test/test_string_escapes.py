@@ -3,8 +3,7 @@ import pytest
 import tempfile
 import os
 from src.assembler import Assembler, AssemblerError
-from src.parser import Parser, ParserError, Token
-from src.constants import InstrInfo
+from src.parser import Parser, ParserError
 
 class TestStringEscapeSequences:
     """Test cases for enhanced string literal support with escape sequences"""
@@ -13,94 +12,90 @@ class TestStringEscapeSequences:
         """Setup test assembler instance"""
         self.assembler = Assembler.__new__(Assembler)
         self.assembler.symbols = {}
-        # Mock token for testing
-        self.mock_token = Token(line_no=1, source_file="test.asm", label=None, mnemonic="DB", operand=None)
-        # Mock instruction info for DB directive
-        self.db_instr = InstrInfo(opcode=None, size=1)
 
-    def test_basic_strings_still_work(self):
+    def test_basic_strings_still_work(self, encode_token):
         """Ensure existing string functionality remains unchanged"""        
-        result = self.assembler._encode_operand('"Hello World"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Hello World"')
         expected = [ord(c) for c in "Hello World"]
         assert result == expected
 
-    def test_newline_escape_sequence(self):
+    def test_newline_escape_sequence(self, encode_token):
         """Test \\n escape sequence converts to ASCII 10"""
-        result = self.assembler._encode_operand('"Line1\\nLine2"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Line1\\nLine2"')
         expected = [ord('L'), ord('i'), ord('n'), ord('e'), ord('1'), 10, 
                    ord('L'), ord('i'), ord('n'), ord('e'), ord('2')]
         assert result == expected
 
-    def test_tab_escape_sequence(self):
+    def test_tab_escape_sequence(self, encode_token):
         """Test \\t escape sequence converts to ASCII 9"""
-        result = self.assembler._encode_operand('"Col1\\tCol2"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Col1\\tCol2"')
         expected = [ord('C'), ord('o'), ord('l'), ord('1'), 9,
                    ord('C'), ord('o'), ord('l'), ord('2')]
         assert result == expected
 
-    def test_carriage_return_escape_sequence(self):
+    def test_carriage_return_escape_sequence(self, encode_token):
         """Test \\r escape sequence converts to ASCII 13"""
-        result = self.assembler._encode_operand('"Line1\\rLine2"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Line1\\rLine2"')
         expected = [ord('L'), ord('i'), ord('n'), ord('e'), ord('1'), 13,
                    ord('L'), ord('i'), ord('n'), ord('e'), ord('2')]
         assert result == expected
 
-    def test_null_terminator_escape_sequence(self):
+    def test_null_terminator_escape_sequence(self, encode_token):
         """Test \\0 escape sequence converts to ASCII 0"""
-        result = self.assembler._encode_operand('"Hello\\0World"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Hello\\0World"')
         expected = [ord('H'), ord('e'), ord('l'), ord('l'), ord('o'), 0,
                    ord('W'), ord('o'), ord('r'), ord('l'), ord('d')]
         assert result == expected
 
-    def test_backslash_escape_sequence(self):
+    def test_backslash_escape_sequence(self, encode_token):
         """Test \\\\ escape sequence converts to single backslash (ASCII 92)"""
-        result = self.assembler._encode_operand('"Path\\\\File"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Path\\\\File"')
         expected = [ord('P'), ord('a'), ord('t'), ord('h'), 92,
                    ord('F'), ord('i'), ord('l'), ord('e')]
         assert result == expected
 
-    def test_quote_escape_sequence(self):
+    def test_quote_escape_sequence(self, encode_token):
         """Test \\" escape sequence converts to double quote (ASCII 34)"""
-        result = self.assembler._encode_operand('"Say \\"Hello\\""', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Say \\"Hello\\""')
         expected = [ord('S'), ord('a'), ord('y'), ord(' '), 34,
                    ord('H'), ord('e'), ord('l'), ord('l'), ord('o'), 34]
         assert result == expected
 
-    def test_hex_escape_sequences(self):
+    def test_hex_escape_sequences(self, encode_token):
         """Test \\xHH hex escape sequences"""
-        result = self.assembler._encode_operand('"Bell: \\x07"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Bell: \\x07"')
         expected = [ord('B'), ord('e'), ord('l'), ord('l'), ord(':'), ord(' '), 7]
         assert result == expected
 
-    def test_multiple_hex_escapes(self):
+    def test_multiple_hex_escapes(self, encode_token):
         """Test multiple hex escape sequences in one string"""
-        result = self.assembler._encode_operand('"\\x41\\x42\\x43"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"\\x41\\x42\\x43"')
         expected = [0x41, 0x42, 0x43]  # A, B, C
         assert result == expected
 
-    def test_mixed_escape_sequences(self):
+    def test_mixed_escape_sequences(self, encode_token):
         """Test mixing different escape sequences in one string"""
-        result = self.assembler._encode_operand('"Line1\\nTab\\tQuote\\"End\\x00"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"Line1\\nTab\\tQuote\\"End\\x00"')
         expected = [ord('L'), ord('i'), ord('n'), ord('e'), ord('1'), 10,  # Line1\n
                    ord('T'), ord('a'), ord('b'), 9,                        # Tab\t  
                    ord('Q'), ord('u'), ord('o'), ord('t'), ord('e'), 34,   # Quote\"
                    ord('E'), ord('n'), ord('d'), 0]                        # End\x00
         assert result == expected
 
-    def test_invalid_hex_escape_too_short(self):
+    def test_invalid_hex_escape_too_short(self, encode_token):
         """Test error handling for incomplete hex escape sequences"""
         with pytest.raises(AssemblerError, match="[Ii]ncomplete hex escape"):
-            self.assembler._encode_operand('"Bad \\x4"', self.db_instr, self.mock_token)
+            encode_token(self.assembler, "DB", '"Bad \\x4"')
 
-    def test_invalid_hex_escape_bad_digits(self):
+    def test_invalid_hex_escape_bad_digits(self, encode_token):
         """Test error handling for invalid hex digits in escape sequences"""
         with pytest.raises(AssemblerError, match="[Ii]nvalid hex escape"):
-            self.assembler._encode_operand('"Bad \\xGH"', self.db_instr, self.mock_token)
+            encode_token(self.assembler, "DB", '"Bad \\xGH"')
 
-    def test_unknown_escape_sequence(self):
+    def test_unknown_escape_sequence(self, encode_token):
         """Test error handling for unknown escape sequences"""
         with pytest.raises(AssemblerError, match="[Uu]nknown escape sequence"):
-            self.assembler._encode_operand('"Bad \\z sequence"', self.db_instr, self.mock_token)
+            encode_token(self.assembler, "DB", '"Bad \\z sequence"')
 
     def test_escape_sequences_in_parser_size_calculation(self):
         """Test that parser correctly calculates string sizes with escape sequences"""
@@ -123,19 +118,19 @@ class TestStringEscapeSequences:
             finally:
                 os.unlink(f.name)
 
-    def test_empty_string_with_escapes(self):
+    def test_empty_string_with_escapes(self, encode_token):
         """Test handling of empty strings and strings with only escapes"""
         # Empty string should produce no bytes
-        result_empty = self.assembler._encode_operand('""', self.db_instr, self.mock_token)
+        result_empty = encode_token(self.assembler, "DB", '""')
         assert result_empty == []
         
         # String with just null should produce one zero byte
-        result_null = self.assembler._encode_operand('"\\x00"', self.db_instr, self.mock_token)
+        result_null = encode_token(self.assembler, "DB", '"\\x00"')
         assert result_null == [0]
 
-    def test_complex_real_world_string(self):
+    def test_complex_real_world_string(self, encode_token):
         """Test a realistic string with multiple escape types"""
-        result = self.assembler._encode_operand('"CPU Boot v1.0\\nPress \\"ENTER\\" to continue...\\x0D\\x0A\\x00"', self.db_instr, self.mock_token)
+        result = encode_token(self.assembler, "DB", '"CPU Boot v1.0\\nPress \\"ENTER\\" to continue...\\x0D\\x0A\\x00"')
         
         # Verify key parts of the string
         assert result[0:13] == [ord(c) for c in "CPU Boot v1.0"]  # Start of string
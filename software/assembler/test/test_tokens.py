@@ -0,0 +1,104 @@
+# software/assembler/test/test_tokens.py
+import pytest
+from src.constants import INSTRUCTION_SET
+from src.parser import Parser, Token
+from src.tokens import TokenStore, ENCODER_TABLE, TOKEN_KIND_SKIP, TOKEN_KIND_ORG, TOKEN_KIND_IMM8, TOKEN_KIND_UNKNOWN
+
+
+def _store(*tokens):
+    store = TokenStore()
+    for token in tokens:
+        store.append(token)
+    return store
+
+
+class TestTokenStore:
+    def test_behaves_like_a_token_list(self):
+        tokens = [
+            Token(1, "main.asm", "START", "NOP", None),
+            Token(2, "main.asm", None, "LDI_A", "#$10"),
+            Token(1, "lib.inc", None, "NOP", None),
+        ]
+        store = _store(*tokens)
+
+        assert len(store) == 3
+        assert list(store) == tokens
+        assert store == tokens
+        assert store[1] == tokens[1]
+        assert store[-1] == tokens[-1]
+        assert store[1:] == tokens[1:]
+        with pytest.raises(IndexError):
+            store[3]
+
+    def test_files_and_mnemonics_are_interned(self):
+        store = TokenStore()
+        for line_no in range(1, 101):
+            store.add(line_no, "main.asm", None, "NOP" if line_no % 2 else "HLT", None)
+        store.add(1, "lib.inc", None, "NOP", None)
+
+        assert store.files == ["main.asm", "lib.inc"]
+        assert store.mnemonics == ["NOP", "HLT"]
+        assert store[100].source_file == "lib.inc"
+
+    def test_kinds_are_resolved_once_per_mnemonic(self):
+        store = _store(
+            Token(1, "f.asm", "CONST", "EQU", "$10"),
+            Token(2, "f.asm", None, "ORG", "$F000"),
+            Token(3, "f.asm", None, "LDI_A", "#CONST"),
+            Token(4, "f.asm", None, "LDI_A", "#1"),
+            Token(5, "f.asm", None, "BOGUS", None),
+        )
+
+        assert store.mnemonics == ["EQU", "ORG", "LDI_A", "BOGUS"]
+        assert store.mnemonic_kinds == [TOKEN_KIND_SKIP, TOKEN_KIND_ORG, TOKEN_KIND_IMM8, TOKEN_KIND_UNKNOWN]
+        assert store.mnemonic_instr_infos == [None, None, INSTRUCTION_SET["LDI_A"], None]
+
+
+class TestParserTokenStore:
+    def test_parser_tokens_reference_interned_files(self, monkeypatch):
+        main_content = 'START: NOP\nINCLUDE "lib.inc"\n    HLT\n'
+        lib_content = "SUB: NOP\n    RET\n"
+
+        def mock_load(instance_self, filepath, requesting_file, requesting_line_no):
+            if filepath.endswith("main.asm"):
+                return main_content.splitlines()
+            if filepath.endswith("lib.inc"):
+                return lib_content.splitlines()
+            raise FileNotFoundError(filepath)
+
+        monkeypatch.setattr(Parser, "_load_lines_from_physical_file", mock_load)
+        parser = Parser("/dummy/main.asm")
+
+        assert isinstance(parser.tokens, TokenStore)
+        assert [t.mnemonic for t in parser.tokens] == ["NOP", "NOP", "RET", "HLT"]
+        assert parser.tokens.files == ["/dummy/main.asm", "/dummy/lib.inc"]
+        assert parser.tokens.mnemonics == ["NOP", "RET", "HLT"]
+
+
+class TestEncoderTable:
+    def test_every_instruction_has_an_encoder_kind(self):
+        from src.tokens import TOKEN_KIND_IMPLIED, TOKEN_KIND_ABS16, TOKEN_KIND_DB, TOKEN_KIND_DW
+        assert set(INSTRUCTION_SET) <= set(ENCODER_TABLE)
+        assert ENCODER_TABLE["NOP"] == (TOKEN_KIND_IMPLIED, INSTRUCTION_SET["NOP"])
+        assert ENCODER_TABLE["ANI"][0] == TOKEN_KIND_IMM8
+        assert ENCODER_TABLE["JMP"][0] == TOKEN_KIND_ABS16
+        assert ENCODER_TABLE["DB"][0] == TOKEN_KIND_DB
+        assert ENCODER_TABLE["DW"][0] == TOKEN_KIND_DW
+
+    def test_dispatched_binds_handlers_per_mnemonic(self):
+        store = _store(
+            Token(1, "f.asm", "CONST", "EQU", "$10"),
+            Token(2, "f.asm", None, "ORG", "$F000"),
+            Token(3, "f.asm", None, "LDI_A", "#CONST"),
+            Token(4, "f.asm", None, "LDI_A", "#1"),
+            Token(5, "f.asm", None, "BOGUS", None),
+        )
+        handlers = {TOKEN_KIND_ORG: "org", TOKEN_KIND_IMM8: "imm8", TOKEN_KIND_UNKNOWN: "unknown"}
+
+        dispatched = [(token.line_no, handler, instr_info) for token, handler, instr_info in store.dispatched(handlers)]
+        assert dispatched == [
+            (2, "org", None),
+            (3, "imm8", INSTRUCTION_SET["LDI_A"]),
+            (4, "imm8", INSTRUCTION_SET["LDI_A"]),
+            (5, "unknown", None),
+        ]
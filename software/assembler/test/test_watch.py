@@ -0,0 +1,101 @@
+# software/assembler/test/test_watch.py
+import os
+
+import pytest
+from src import assembler
+from src.assembler import SourceWatcher, build_argument_parser
+
+ROM = [("ROM", "F000", "FFFF")]
+
+
+def touch(path, text):
+    """Rewrite a file and move its mtime forward, as an editor save would."""
+    before = os.stat(path).st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+@pytest.fixture
+def program(tmp_path):
+    (tmp_path / "defs.inc").write_text("VALUE EQU $11\n")
+    (tmp_path / "code.inc").write_text("    DB VALUE\n")
+    main_file = tmp_path / "main.asm"
+    main_file.write_text('    INCLUDE "defs.inc"\n    ORG $F000\n    INCLUDE "code.inc"\n')
+    return tmp_path
+
+
+def rom_hex(tmp_path):
+    return (tmp_path / "out" / "ROM.hex").read_text()
+
+
+def test_first_build_watches_the_include_closure(program):
+    watcher = SourceWatcher(str(program / "main.asm"), str(program / "out"), ROM)
+
+    assert watcher.build()
+    assert rom_hex(program) == "@0000\n11\n"
+    assert sorted(os.path.basename(path) for path in watcher.watched) == ["code.inc", "defs.inc", "main.asm"]
+    assert watcher.changed_files() == []
+
+
+def test_changed_include_is_the_only_file_reloaded(program):
+    watcher = SourceWatcher(str(program / "main.asm"), str(program / "out"), ROM)
+    watcher.build()
+    loads = watcher.source_manager.load_count
+
+    touch(program / "defs.inc", "VALUE EQU $22\n")
+    assert watcher.changed_files() == [str(program / "defs.inc")]
+    assert watcher.build()
+
+    assert rom_hex(program) == "@0000\n22\n"
+    assert watcher.source_manager.load_count == loads + 1
+    assert watcher.changed_files() == []
+
+
+def test_failed_build_keeps_watching_and_recovers(program):
+    watcher = SourceWatcher(str(program / "main.asm"), str(program / "out"), ROM)
+    watcher.build()
+
+    touch(program / "code.inc", "    DB UNDEFINED_SYMBOL\n")
+    assert not watcher.build()
+    assert rom_hex(program) == "@0000\n11\n"  # Previous outputs are left alone
+    assert str(program / "code.inc") in watcher.watched
+
+    touch(program / "code.inc", "    DB VALUE + 1\n")
+    assert watcher.changed_files() == [str(program / "code.inc")]
+    assert watcher.build()
+    assert rom_hex(program) == "@0000\n12\n"
+
+
+@pytest.mark.parametrize("edited", ["main.asm", "code.inc"])
+def test_save_during_assembly_is_not_lost(program, monkeypatch, edited):
+    watcher = SourceWatcher(str(program / "main.asm"), str(program / "out"), ROM)
+    original = assembler._assemble_and_write
+
+    def assemble_then_save(*args, **kwargs):
+        result = original(*args, **kwargs)
+        touch(program / edited, (program / edited).read_text() + "    NOP\n")
+        return result
+
+    monkeypatch.setattr(assembler, "_assemble_and_write", assemble_then_save)
+    assert watcher.build()  # First build: signatures come from the files as they were loaded
+    assert watcher.changed_files() == [str(program / edited)]
+    assert watcher.build()  # Rebuild: signatures come from before the assembly
+    assert watcher.changed_files() == [str(program / edited)]
+
+
+def test_dropped_include_is_no_longer_watched_or_held(program):
+    watcher = SourceWatcher(str(program / "main.asm"), str(program / "out"), ROM)
+    watcher.build()
+
+    touch(program / "main.asm", '    INCLUDE "defs.inc"\n    ORG $F000\n    DB VALUE\n')
+    assert watcher.build()
+
+    code_inc = str(program / "code.inc")
+    assert code_inc not in watcher.watched
+    assert code_inc not in watcher.source_manager.paths()
+
+
+def test_watch_arguments():
+    args = build_argument_parser().parse_args(["prog.asm", "out", "--watch", "--watch-interval", "0.5"])
+    assert args.watch and args.watch_interval == 0.5
+    assert not build_argument_parser().parse_args([]).watch